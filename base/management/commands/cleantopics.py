@@ -0,0 +1,75 @@
+"""Purpose of this file
+
+This file contains the management command which deletes the orphaned topics.
+"""
+
+from django.core.management.base import BaseCommand
+
+from base.models import Topic
+
+
+class Command(BaseCommand):
+    """Clean topics
+
+    Deletes the topics which are neither part of a course structure nor contain any
+    contents, e.g. topics created in the structure editor which were never saved. The
+    orphans are selected with one anti-join per batch and deleted in batches, so the
+    command can run periodically (e.g. as a cron job) on large databases.
+
+    :attr Command.help: The help text of the command
+    :type Command.help: str
+    """
+    help = 'Deletes the topics which are not used in any course structure and have no contents'
+
+    def add_arguments(self, parser):
+        """Arguments
+
+        Adds the arguments of the command.
+
+        :param parser: The argument parser
+        :type parser: CommandParser
+        """
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of topics to delete per query')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report the number of orphaned topics')
+
+    @staticmethod
+    def clean(batch_size):
+        """Clean
+
+        Deletes the orphaned topics in batches.
+
+        :param batch_size: The number of topics to delete per batch
+        :type batch_size: int
+
+        :return: the number of deleted topics and batches
+        :rtype: tuple[int, int]
+        """
+        deleted = batches = 0
+        while True:
+            ids = list(Topic.objects.orphans().values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted, batches
+            # The condition is checked again, a topic may have been used in the meantime
+            # The total of delete also counts the cascaded rows, e.g. of the course topics
+            _, counts = Topic.objects.orphans().filter(pk__in=ids).delete()
+            deleted += counts.get(Topic._meta.label, 0)
+            batches += 1
+
+    def handle(self, *args, **options):
+        """Handle
+
+        Deletes or counts the orphaned topics and reports the result.
+
+        :param args: The arguments
+        :type args: Any
+        :param options: The options of the command
+        :type options: dict[str, Any]
+        """
+        if options['dry_run']:
+            count = Topic.objects.orphans().count()
+            self.stdout.write(f'{count} orphaned topics found')
+            return
+        deleted, batches = self.clean(options['batch_size'])
+        self.stdout.write(f'{deleted} orphaned topics deleted in {batches} batches')
@@ -0,0 +1,104 @@
+"""Purpose of this file
+
+This file contains the management command which runs the local worker process.
+"""
+
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from base.models import Job
+
+
+class Command(BaseCommand):
+    """Run worker
+
+    Processes the jobs of all concrete job models. The queue is stored in the database,
+    so no external message broker is required. The worker polls the database for pending
+    jobs and sleeps if there is nothing to do. Periodically, the jobs abandoned by crashed
+    workers are marked as failed and the expired jobs are deleted.
+
+    :attr Command.help: The help text of the command
+    :type Command.help: str
+    """
+    help = 'Processes the pending background jobs (e.g. course exports)'
+
+    def add_arguments(self, parser):
+        """Arguments
+
+        Adds the arguments of the command.
+
+        :param parser: The argument parser
+        :type parser: CommandParser
+        """
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Seconds to wait before polling again if the queue is empty')
+        parser.add_argument('--cleanup-interval', type=float, default=60.0,
+                            help='Seconds between the cleanups of stale and expired jobs')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit as soon as the queue is empty')
+
+    @staticmethod
+    def job_models():
+        """Job models
+
+        Returns all concrete models derived from Job.
+
+        :return: the job models
+        :rtype: list[type[Job]]
+        """
+        return [model for model in apps.get_models() if issubclass(model, Job)]
+
+    def cleanup(self):
+        """Cleanup
+
+        Fails the stale running jobs and deletes the expired jobs of each job model.
+        """
+        for model in self.job_models():
+            failed, deleted = model.cleanup()
+            if failed or deleted:
+                self.stdout.write(f'{model.__name__}: {failed} stale, {deleted} expired')
+
+    def process(self):
+        """Process
+
+        Claims and executes one job of each job model.
+
+        :return: the number of executed jobs
+        :rtype: int
+        """
+        executed = 0
+        for model in self.job_models():
+            job = model.claim()
+            if job is None:
+                continue
+            self.stdout.write(f'{model.__name__} {job.pk}: started')
+            job.execute()
+            self.stdout.write(f'{model.__name__} {job.pk}: {job.status}')
+            executed += 1
+        return executed
+
+    def handle(self, *args, **options):
+        """Handle
+
+        Runs the worker loop.
+
+        :param args: The arguments
+        :type args: Any
+        :param options: The options of the command
+        :type options: dict[str, Any]
+        """
+        last_cleanup = None
+        while True:
+            # Long running process: drop connections which became unusable
+            close_old_connections()
+            if last_cleanup is None \
+                    or time.monotonic() - last_cleanup >= options['cleanup_interval']:
+                self.cleanup()
+                last_cleanup = time.monotonic()
+            if self.process() == 0:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
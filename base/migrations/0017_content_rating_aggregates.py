@@ -0,0 +1,38 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:09
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def aggregate_ratings(apps, schema_editor):
+    Content = apps.get_model('base', 'Content')
+    Rating = apps.get_model('base', 'Rating')
+    aggregates = Rating.objects.values('content_id') \
+        .annotate(rating_sum=Sum('rating'), rating_count=Count('pk'))
+    contents = []
+    for aggregate in aggregates:
+        contents.append(Content(pk=aggregate['content_id'],
+                                rating_sum=aggregate['rating_sum'],
+                                rating_count=aggregate['rating_count']))
+    Content.objects.bulk_update(contents, ['rating_sum', 'rating_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0016_auto_20210302_2352'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Number of ratings'),
+        ),
+        migrations.AddField(
+            model_name='content',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Sum of ratings'),
+        ),
+        migrations.RunPython(aggregate_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0017_content_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['topic', 'type'], name='content_topic_type_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 3.0.7 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+def split_index(apps, schema_editor):
+    CourseStructureEntry = apps.get_model('base', 'CourseStructureEntry')
+    entries = list(CourseStructureEntry.objects.all())
+    for entry in entries:
+        positions = [int(position) for position in entry.index.split('/')]
+        entry.position = positions[0]
+        entry.sub_position = positions[1] if len(positions) > 1 else 0
+    CourseStructureEntry.objects.bulk_update(entries, ['position', 'sub_position'],
+                                             batch_size=500)
+
+
+def join_index(apps, schema_editor):
+    CourseStructureEntry = apps.get_model('base', 'CourseStructureEntry')
+    entries = list(CourseStructureEntry.objects.all())
+    for entry in entries:
+        entry.index = f'{entry.position}' if entry.sub_position == 0 \
+            else f'{entry.position}/{entry.sub_position}'
+    CourseStructureEntry.objects.bulk_update(entries, ['index'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0018_content_topic_type_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestructureentry',
+            name='position',
+            field=models.PositiveIntegerField(default=0, verbose_name='Position'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='coursestructureentry',
+            name='sub_position',
+            field=models.PositiveIntegerField(default=0, verbose_name='Sub position'),
+        ),
+        migrations.AlterField(
+            model_name='coursestructureentry',
+            name='index',
+            field=models.CharField(default='', max_length=50, verbose_name='Index'),
+        ),
+        migrations.RunPython(split_index, join_index),
+        migrations.RemoveField(
+            model_name='coursestructureentry',
+            name='index',
+        ),
+        migrations.AddIndex(
+            model_name='coursestructureentry',
+            index=models.Index(fields=['course', 'position', 'sub_position'], name='structure_position_idx'),
+        ),
+    ]
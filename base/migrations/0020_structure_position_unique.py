@@ -0,0 +1,49 @@
+# Generated by Django 3.0.7 on 2026-10-18 21:40
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def renumber_duplicates(apps, schema_editor):
+    # Legacy indexes like '1' and '01' were split to the same position, keep the first entry
+    # in place and move the others behind the last entry, so no topic is lost
+    CourseStructureEntry = apps.get_model('base', 'CourseStructureEntry')
+    duplicates = CourseStructureEntry.objects.values('course', 'position', 'sub_position') \
+        .annotate(count=Count('pk'), first=Min('pk')).filter(count__gt=1).order_by()
+    for duplicate in duplicates:
+        entries = CourseStructureEntry.objects.filter(course=duplicate['course'],
+                                                      position=duplicate['position'],
+                                                      sub_position=duplicate['sub_position']) \
+            .exclude(pk=duplicate['first']).order_by('pk')
+        for entry in entries:
+            if entry.sub_position == 0:
+                # A main topic becomes the last main topic of the course
+                last = CourseStructureEntry.objects.filter(course=entry.course_id) \
+                    .aggregate(last=Max('position'))['last']
+                entry.position = last + 1
+            else:
+                # A sub topic becomes the last sub topic of its main topic
+                last = CourseStructureEntry.objects.filter(course=entry.course_id,
+                                                           position=entry.position) \
+                    .aggregate(last=Max('sub_position'))['last']
+                entry.sub_position = last + 1
+            entry.save(update_fields=['position', 'sub_position'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0019_structure_position'),
+    ]
+
+    operations = [
+        migrations.RunPython(renumber_duplicates, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='coursestructureentry',
+            name='structure_position_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='coursestructureentry',
+            constraint=models.UniqueConstraint(fields=('course', 'position', 'sub_position'), name='structure_position_unique'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.7 on 2026-10-18 23:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def average_ratings(apps, schema_editor):
+    Content = apps.get_model('base', 'Content')
+    Content.objects.filter(rating_count__gt=0) \
+        .update(rating_average=F('rating_sum') / F('rating_count'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0020_structure_position_unique'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='rating_average',
+            field=models.SmallIntegerField(default=-1, editable=False, verbose_name='Average rating'),
+        ),
+        migrations.RunPython(average_ratings, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='content',
+            index=models.Index(fields=['topic', '-rating_average', 'id'], name='content_topic_rating_idx'),
+        ),
+    ]
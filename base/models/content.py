@@ -6,8 +6,7 @@ content of the course book and can be registered in admin.py.
 """
 
 from django.conf import settings
-from django.db import models
-from django.db.models import Avg, Count
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -202,7 +201,7 @@ class Course(models.Model):
         :return: the sorted topic list
         :rtype: QuerySet
         """
-        return self.topics.order_by('child_topic__index')
+        return self.topics.order_by('child_topic__position', 'child_topic__sub_position')
 
     def __str__(self):
         """String representation
@@ -215,6 +214,25 @@ class Course(models.Model):
         return self.title
 
 
+class TopicQuerySet(models.QuerySet):
+    """Topic query set
+
+    Selects the topics in the database.
+    """
+
+    def orphans(self):
+        """Orphans
+
+        Returns the topics which are neither part of a course structure nor contain any
+        contents. The condition is a single anti-join, the reverse relations are joined
+        with LEFT OUTER JOIN and tested for NULL.
+
+        :return: the orphaned topics
+        :rtype: TopicQuerySet
+        """
+        return self.filter(child_topic__isnull=True, contents__isnull=True)
+
+
 class Topic(models.Model):
     """Topic
 
@@ -232,6 +250,8 @@ class Topic(models.Model):
                                  related_name="topics",
                                  on_delete=models.CASCADE)
 
+    objects = TopicQuerySet.as_manager()
+
     class Meta:
         """Meta options
 
@@ -269,34 +289,7 @@ class Topic(models.Model):
         :return: the sorted and filtered contents belonging to this topic
         :rtype: QuerySet[Content]
         """
-        contents = self.contents.all()
-        # filtered by is a String and represents the decision of the user
-        # , how they want to filter the data,
-        # e.g. 'Text' means they want to only see all text fields in the topic
-        if filtered_by != 'None' and filtered_by is not None:
-            if filtered_by == 'Text':
-                contents = contents.filter(textfield__isnull=False)
-            elif filtered_by == 'Latex':
-                contents = contents.filter(latex__isnull=False)
-            elif filtered_by == 'Image':
-                contents = contents.filter(imagecontent__isnull=False)
-            elif filtered_by == 'YouTube-Video':
-                contents = contents.filter(ytvideocontent__isnull=False)
-            elif filtered_by == 'PDF':
-                contents = contents.filter(pdfcontent__isnull=False)
-            else:
-                contents = contents.filter()
-        # the topic can be sorted (even as an addition to filter)
-        # the user decides, if they want to sort by rating or by date
-        # and the String represent their decision
-        if sorted_by != 'None' and sorted_by is not None:
-            if sorted_by == 'Rating':
-                contents = sorted(contents, key=lambda x: x.get_rate(), reverse=True)
-            elif sorted_by == 'Date':
-                contents = contents.order_by('-' + 'creation_date')
-            else:
-                contents = contents.order_by('-' + sorted_by)
-        return contents
+        return self.contents.filtered_by(filtered_by).sorted_by(sorted_by)
 
 
 class Tag(models.Model):
@@ -340,6 +333,61 @@ class Tag(models.Model):
         return self.title
 
 
+class ContentQuerySet(models.QuerySet):
+    """Content query set
+
+    Filters and sorts the contents in the database, so the result stays a query set which
+    can be paginated or combined with select_related and prefetch_related.
+
+    :attr ContentQuerySet.FILTER_TYPES: The content types by the filter choices
+    :type ContentQuerySet.FILTER_TYPES: dict[str, str]
+    """
+    FILTER_TYPES = {
+        'Text': 'Textfield',
+        'Latex': 'Latex',
+        'Image': 'Image',
+        'YouTube-Video': 'YouTubeVideo',
+        'PDF': 'PDF',
+    }
+
+    def filtered_by(self, filtered_by):
+        """Filtered by
+
+        Filters the contents by the type of the filter choice, e.g. 'Text' returns only
+        the text fields. Unknown choices do not filter the contents.
+
+        :param filtered_by: The filter choice
+        :type filtered_by: str
+
+        :return: the filtered contents
+        :rtype: ContentQuerySet
+        """
+        if filtered_by in self.FILTER_TYPES:
+            return self.filter(type=self.FILTER_TYPES[filtered_by])
+        return self
+
+    def sorted_by(self, sorted_by):
+        """Sorted by
+
+        Sorts the contents by the sorting choice: 'Rating' sorts by the stored average rating
+        with unrated contents last (see the index content_topic_rating_idx), 'Date' by the
+        creation date, otherwise descending by the given field.
+
+        :param sorted_by: The sorting choice
+        :type sorted_by: str
+
+        :return: the sorted contents
+        :rtype: ContentQuerySet
+        """
+        if sorted_by == 'None' or sorted_by is None:
+            return self
+        if sorted_by == 'Rating':
+            return self.order_by('-rating_average', 'pk')
+        if sorted_by == 'Date':
+            return self.order_by('-creation_date', 'pk')
+        return self.order_by('-' + sorted_by)
+
+
 class Content(models.Model):
     """Content
 
@@ -372,6 +420,12 @@ class Content(models.Model):
     :type Content.preview: ImageField
     :attr Content.ratings: The ratings from the user to the content
     :type Content.ratings: ManyToManyField - Profile
+    :attr Content.rating_sum: The sum of the ratings of the content
+    :type Content.rating_sum: PositiveIntegerField
+    :attr Content.rating_count: The number of ratings of the content
+    :type Content.rating_count: PositiveIntegerField
+    :attr Content.rating_average: The average rating of the content, -1 if there are no ratings
+    :type Content.rating_average: SmallIntegerField
     """
     topic = models.ForeignKey(Topic, verbose_name=_("Topic"),
                               related_name='contents',
@@ -409,6 +463,20 @@ class Content(models.Model):
 
     ratings = models.ManyToManyField("Profile",
                                      through='Rating')
+    # Denormalized from the ratings and kept consistent by rate_content, so the
+    # content cards and the rating sort do not aggregate the ratings per content,
+    # the average is stored as well, so the rating sort can use an index
+    rating_sum = models.PositiveIntegerField(verbose_name=_("Sum of ratings"),
+                                             default=0,
+                                             editable=False)
+    rating_count = models.PositiveIntegerField(verbose_name=_("Number of ratings"),
+                                               default=0,
+                                               editable=False)
+    rating_average = models.SmallIntegerField(verbose_name=_("Average rating"),
+                                              default=-1,
+                                              editable=False)
+
+    objects = ContentQuerySet.as_manager()
 
     class Meta:
         """Meta options
@@ -419,9 +487,15 @@ class Content(models.Model):
         :type Meta.verbose_name: __proxy__
         :attr Meta.verbose_name_plural: A human-readable name for the object in plural
         :type Meta.verbose_name_plural: __proxy__
+        :attr Meta.indexes: The indexes of the contents of a topic filtered by type and
+        sorted by rating
+        :type Meta.indexes: list[Index]
         """
         verbose_name = _("Content")
         verbose_name_plural = _("Contents")
+        indexes = [models.Index(fields=['topic', 'type'], name='content_topic_type_idx'),
+                   models.Index(fields=['topic', '-rating_average', 'id'],
+                                name='content_topic_rating_idx')]
 
     def __str__(self):
         """String representation
@@ -456,7 +530,7 @@ class Content(models.Model):
         :rtype: int
 
         """
-        return Rating.objects.filter(content_id=self.id).aggregate(Count('rating'))['rating__count']
+        return self.rating_count
 
     def get_rate(self):
         """Average rating
@@ -466,10 +540,7 @@ class Content(models.Model):
         :return: the average number of ratings
         :rtype: float
         """
-        rating = Rating.objects.filter(content_id=self.id).aggregate(Avg('rating'))['rating__avg']
-        if rating is not None:
-            return int(rating)
-        return -1
+        return self.rating_average
 
     def get_rate_count(self):
         """ Ratings count
@@ -479,7 +550,7 @@ class Content(models.Model):
         :return: the total count of ratings
         :rtype: int
         """
-        return self.ratings.count()
+        return self.rating_count
 
     def user_already_rated(self, user):
         """Already rated
@@ -520,10 +591,17 @@ class Content(models.Model):
         :param user: The user of the rating
         :type user: User
         """
-        Rating.objects.filter(user_id=user.user.id, content_id=self.id).delete()
-        rating = Rating.objects.create(user=user, content=self, rating=rating)  # user = profile
-        rating.save()
-        self.save()
+        with transaction.atomic():
+            # Lock the rating of the user, so concurrent ratings do not count twice
+            # The rating aggregates are updated by the receiver of the saved rating
+            previous = Rating.objects.select_for_update() \
+                .filter(user=user, content=self).first()  # user = profile
+            if previous is None:
+                Rating.objects.create(user=user, content=self, rating=rating)
+            else:
+                previous.rating = rating
+                previous.save(update_fields=['rating'])
+        self.refresh_from_db(fields=['rating_sum', 'rating_count', 'rating_average'])
 
     def get_index_in_course(self, course):
         """Index in the course structure
@@ -544,25 +622,29 @@ class CourseStructureEntry(models.Model):
 
     This model represents the structure of the courses. The course structure consists
     of main topics and each main topics can contain sub topics. The main topics and sub topics
-    are differentiated through its index. Sub topics contains the index of the main topic and
-    its own index position in the main topic
+    are differentiated through their sub position: main topics have the sub position 0, sub
+    topics have the position of their main topic and their own position in the main topic.
+    Ordering by the position and the sub position is the order of the structure.
 
     For example:
 
-    - 1 is a main topic
-    - 1/2 is a second sub topic in the main topic 1
+    - 1 (position 1, sub position 0) is a main topic
+    - 1/2 (position 1, sub position 2) is a second sub topic in the main topic 1
 
     :attr CourseStructureEntry.course: The course whose structure is meant
     :type CourseStructureEntry.course: ForeignKey - Course
-    :attr CourseStructureEntry.index: The position of the (sub) topic
-    :type CourseStructureEntry.index: CharField
+    :attr CourseStructureEntry.position: The position of the (main) topic
+    :type CourseStructureEntry.position: PositiveIntegerField
+    :attr CourseStructureEntry.sub_position: The position of the sub topic, 0 for a main topic
+    :type CourseStructureEntry.sub_position: PositiveIntegerField
     :attr CourseStructureEntry.topic: The topic at the specified position/index
     :type CourseStructureEntry.topic: ForeignKey - Topic
     """
     course = models.ForeignKey(Course, verbose_name=_("Course"),
                                on_delete=models.CASCADE)
-    index = models.CharField(verbose_name=_("Index"),
-                             max_length=50)
+    position = models.PositiveIntegerField(verbose_name=_("Position"))
+    sub_position = models.PositiveIntegerField(verbose_name=_("Sub position"),
+                                               default=0)
     topic = models.ForeignKey(Topic, related_name='child_topic',
                               verbose_name=_("Topic"),
                               on_delete=models.DO_NOTHING)
@@ -576,9 +658,42 @@ class CourseStructureEntry(models.Model):
         :type Meta.verbose_name: __proxy__
         :attr Meta.verbose_name_plural: A human-readable name for the object in plural
         :type Meta.verbose_name_plural: __proxy__
+        :attr Meta.constraints: The unique position of an entry, its index orders the
+        structure of a course
+        :type Meta.constraints: list[Constraint]
         """
         verbose_name = _("Course Structure Entry")
         verbose_name_plural = _("Course Structure Entries")
+        constraints = [models.UniqueConstraint(fields=['course', 'position', 'sub_position'],
+                                               name='structure_position_unique')]
+
+    @property
+    def index(self):
+        """Index
+
+        Returns the index of the entry as displayed to the user, e.g. 1/2 for the
+        second sub topic of the first main topic. The index can also be set, e.g. by
+        CourseStructureEntry(index='1/2').
+
+        :return: the index of the entry
+        :rtype: str
+        """
+        if self.sub_position == 0:
+            return f'{self.position}'
+        return f'{self.position}/{self.sub_position}'
+
+    @index.setter
+    def index(self, value):
+        """Index
+
+        Sets the position and the sub position from the given index.
+
+        :param value: The index of the entry, e.g. 1/2 or 1
+        :type value: str or int
+        """
+        positions = [int(position) for position in str(value).split('/')]
+        self.position = positions[0]
+        self.sub_position = positions[1] if len(positions) > 1 else 0
 
     def __str__(self):
         """String representation
@@ -0,0 +1,210 @@
+"""Purpose of this file
+
+This file describes or defines the background jobs which are processed by the
+local worker process (see the management command runworker).
+"""
+
+import traceback
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class Job(models.Model):
+    """Job
+
+    This abstract model represents a job in the database backed job queue. A job is created
+    in the web process and will be claimed and executed by the worker process. The state of
+    the job and its progress are stored in the database, so the web process can report them
+    to the user. Each concrete job model defines the actual work in the method run.
+
+    :attr Job.PENDING: The status of a job waiting for a worker
+    :type Job.PENDING: str
+    :attr Job.RUNNING: The status of a job being executed by a worker
+    :type Job.RUNNING: str
+    :attr Job.DONE: The status of a successfully executed job
+    :type Job.DONE: str
+    :attr Job.FAILED: The status of a job whose execution raised an error
+    :type Job.FAILED: str
+    :attr Job.STATUS_CHOICES: The choices of the status
+    :type Job.STATUS_CHOICES: list[tuple[str, __proxy__]]
+    :attr Job.status: The status of the job
+    :type Job.status: CharField
+    :attr Job.progress: The progress of the job in percent
+    :type Job.progress: PositiveSmallIntegerField
+    :attr Job.error: The error message if the job failed
+    :type Job.error: TextField
+    :attr Job.creation_date: The date when the job was queued
+    :type Job.creation_date: DateTimeField
+    :attr Job.start_date: The date when a worker claimed the job
+    :type Job.start_date: DateTimeField
+    :attr Job.end_date: The date when the job was finished
+    :type Job.end_date: DateTimeField
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    ]
+
+    status = models.CharField(verbose_name=_("Status"),
+                              max_length=10,
+                              choices=STATUS_CHOICES,
+                              default=PENDING,
+                              db_index=True)
+    progress = models.PositiveSmallIntegerField(verbose_name=_("Progress"),
+                                                default=0)
+    error = models.TextField(verbose_name=_("Error"),
+                             blank=True)
+    creation_date = models.DateTimeField(verbose_name=_('Creation Date'),
+                                         default=timezone.now)
+    start_date = models.DateTimeField(verbose_name=_('Start Date'),
+                                      blank=True,
+                                      null=True)
+    end_date = models.DateTimeField(verbose_name=_('End Date'),
+                                    blank=True,
+                                    null=True)
+
+    class Meta:
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.abstract: Describes whether this model is an abstract model (class)
+        :type Meta.abstract: bool
+        :attr Meta.ordering: The default ordering for the object
+        :type Meta.ordering: list[str]
+        """
+        abstract = True
+        ordering = ['creation_date']
+
+    @property
+    def finished(self):
+        """Finished
+
+        Returns true if the job will not be processed any further.
+
+        :return: true if the job is done or failed
+        :rtype: bool
+        """
+        return self.status in (self.DONE, self.FAILED)
+
+    @staticmethod
+    def expiry():
+        """Expiry
+
+        Returns the number of seconds after which finished jobs are deleted by the worker.
+        Concrete jobs with results, e.g. exports, may keep them longer.
+
+        :return: the expiry in seconds
+        :rtype: int
+        """
+        return settings.JOB_EXPIRY
+
+    @staticmethod
+    def stale_date():
+        """Stale date
+
+        Returns the date before which running jobs are considered to be abandoned, e.g.
+        because their worker crashed. Jobs may run for JOB_TIMEOUT seconds.
+
+        :return: the stale date
+        :rtype: datetime
+        """
+        return timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT)
+
+    @classmethod
+    def active(cls):
+        """Active
+
+        Returns the jobs which will still be processed: the pending jobs and the running
+        jobs which are not stale.
+
+        :return: the active jobs
+        :rtype: QuerySet
+        """
+        return cls.objects.filter(Q(status=cls.PENDING)
+                                  | Q(status=cls.RUNNING, start_date__gte=cls.stale_date()))
+
+    @classmethod
+    def cleanup(cls):
+        """Cleanup
+
+        Marks the stale running jobs as failed and deletes the expired finished jobs.
+
+        :return: the number of failed and deleted jobs
+        :rtype: tuple[int, int]
+        """
+        now = timezone.now()
+        failed = cls.objects.filter(status=cls.RUNNING, start_date__lt=cls.stale_date()) \
+            .update(status=cls.FAILED, end_date=now,
+                    error='The job was abandoned by its worker')
+        _, deleted = cls.objects.filter(status__in=[cls.DONE, cls.FAILED],
+                                        end_date__lt=now - timedelta(seconds=cls.expiry())) \
+            .delete()
+        return failed, deleted.get(cls._meta.label, 0)
+
+    @classmethod
+    def claim(cls):
+        """Claim
+
+        Claims the oldest pending job for the calling worker. The status is changed
+        with a conditional update, so a job is claimed by at most one worker even
+        if several workers are running at the same time.
+
+        :return: the claimed job or None if there is no pending job
+        :rtype: None or Job
+        """
+        pending = cls.objects.filter(status=cls.PENDING).order_by('creation_date')
+        for pk in pending.values_list('pk', flat=True)[:10]:
+            claimed = cls.objects.filter(pk=pk, status=cls.PENDING) \
+                .update(status=cls.RUNNING, start_date=timezone.now())
+            if claimed:
+                return cls.objects.get(pk=pk)
+        return None
+
+    def set_progress(self, progress):
+        """Set progress
+
+        Stores the progress of the job without touching the other fields.
+
+        :param progress: The progress in percent
+        :type progress: int
+        """
+        self.progress = max(0, min(100, int(progress)))
+        type(self).objects.filter(pk=self.pk).update(progress=self.progress)
+
+    def execute(self):
+        """Execute
+
+        Runs the job and stores its result. If the job raises an error, the job
+        is marked as failed and the traceback is stored.
+        """
+        try:
+            self.run()
+        except Exception:  # pylint: disable=broad-except
+            self.status = self.FAILED
+            self.error = traceback.format_exc()
+        else:
+            self.status = self.DONE
+            self.progress = 100
+        self.end_date = timezone.now()
+        self.save()
+
+    def run(self):
+        """Run
+
+        Does the actual work of the job. Must be implemented by the concrete jobs.
+        """
+        raise NotImplementedError
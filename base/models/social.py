@@ -4,6 +4,10 @@ This file describes or defines the social interaction in the course book.
 """
 
 from django.db import models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
 
 
@@ -68,6 +72,45 @@ class Rating(models.Model):
         return f"Rating for {self.content} by {self.user}"
 
 
+    @classmethod
+    def update_aggregates(cls, content_id):
+        """Update aggregates
+
+        Recomputes the rating sum, count and average of the content from its ratings in a
+        single query, so the denormalized values cannot drift from the ratings.
+
+        :param content_id: The id of the content
+        :type content_id: int
+        """
+        content_model = cls._meta.get_field('content').related_model
+        ratings = cls.objects.filter(content=OuterRef('pk')).order_by().values('content')
+        content_model.objects.filter(pk=content_id).update(
+            rating_sum=Coalesce(Subquery(ratings.annotate(total=Sum('rating'))
+                                         .values('total')), 0),
+            rating_count=Coalesce(Subquery(ratings.annotate(number=Count('pk'))
+                                           .values('number')), 0),
+            rating_average=Coalesce(Subquery(ratings.annotate(
+                average=Sum('rating') / Count('pk')).values('average')), -1))
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def update_rating(sender, instance, **kwargs):
+    """Update rating
+
+    Updates the rating aggregates of the content of a saved or deleted rating, e.g. of
+    a rating changed in the admin panel or of a deleted user.
+
+    :param sender: The model of the rating
+    :type sender: type
+    :param instance: The saved or deleted rating
+    :type instance: Rating
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    sender.update_aggregates(instance.content_id)
+
+
 class Comment(models.Model):
     """Comment
 
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/3.0/ref/settings/
 """
 
 import os
+import tempfile
 
 from django.utils.translation import gettext_lazy as _
 
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
     'content',
     'content.attachment',
     'export',
+    'search',
     'debug_toolbar',
     'reversion',  # https://github.com/etianen/django-reversion
     'reversion_compare',  # https://github.com/jedie/django-reversion-compare
@@ -164,6 +166,62 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Width of the rendered previews of PDF contents in pixels, the height keeps the aspect ratio
+CONTENT_PREVIEW_WIDTH = 600
+
+# Seconds after which a running background job is considered to be abandoned by its worker
+JOB_TIMEOUT = 60 * 60
+# Seconds after which finished background jobs are deleted by the worker
+JOB_EXPIRY = 24 * 60 * 60
+
+# Compiled LaTeX documents (export)
+# Seconds after which finished course exports and their PDFs are deleted
+EXPORT_EXPIRY = 7 * 24 * 60 * 60
+# Seconds after which the manifests of coursebook exports and their pinned sections are deleted
+EXPORT_MANIFEST_EXPIRY = 30 * 24 * 60 * 60
+# Directory of the content-addressed cache of compiled PDFs
+EXPORT_CACHE_DIR = os.path.join(BASE_DIR, 'cache', 'export')
+# Maximum size of the cache in bytes including the preamble formats and the pinned sections,
+# least recently used PDFs are evicted first
+EXPORT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+# Compile each content of a course export separately and merge the PDFs afterwards
+EXPORT_FRAGMENTS = True
+# Maximum number of fragments compiled in parallel
+EXPORT_FRAGMENT_WORKERS = os.cpu_count()
+# Start compilations from a precompiled format of the preamble of the export template
+EXPORT_PRECOMPILED_PREAMBLE = True
+# Maximum number of concurrent PDF LaTeX processes on this host (shared by all processes)
+EXPORT_POOL_SIZE = os.cpu_count()
+# Directory of the slot lock files of the PDF LaTeX processes of this host
+EXPORT_POOL_DIR = os.path.join(tempfile.gettempdir(), 'collab-coursebook-pdflatex')
+# Wall-clock limit of a single PDF LaTeX run in seconds
+EXPORT_POOL_TIMEOUT = 60
+# Memory (address space) limit of a single PDF LaTeX process in bytes, None to disable
+EXPORT_POOL_MEMORY = 1024 * 1024 * 1024
+
+# Cache of the rendered course page fragments and their versions. A cache shared by all
+# processes (e.g. FileBasedCache) is required if the application runs in multiple processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'collab-coursebook',
+    }
+}
+# Lifetime of a cached course page fragment in seconds
+COURSE_PAGE_CACHE_TIMEOUT = 60 * 60
+# Maximum number of contents a duplicated course may contain to be copied during the
+# request, larger courses are copied by the worker process
+COURSE_DUPLICATION_SYNC_LIMIT = 200
+
+# Backend of the search index, the FTS5 backend requires SQLite, the Postgres backend PostgreSQL
+SEARCH_BACKEND = 'search.backends.FTS5Backend'
+# Maximum number of counted search results, larger numbers are displayed as estimate
+SEARCH_COUNT_LIMIT = 1000
+# Maximum age of the autocompletion index of a process in seconds
+SEARCH_AUTOCOMPLETE_MAX_AGE = 5 * 60
+# Maximum number of characters of the text of a PDF page in the search index
+SEARCH_PDF_PAGE_LENGTH = 20000
+
 # Used for Debug Toolbar
 INTERNAL_IPS = [
     '127.0.0.1',
@@ -32,4 +32,17 @@ DATABASES = {
     }
 }
 
-# TODO: caching
+### CACHE ###
+
+# Shared by all processes, so a changed content invalidates the course page everywhere
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': '/var/tmp/collab-coursebook-cache',
+    }
+}
+
+### SEARCH ###
+
+# FTS5 is only available with SQLite, PostgreSQL has its own full-text search
+SEARCH_BACKEND = 'search.backends.PostgresBackend'
@@ -0,0 +1,35 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0019_structure_position'),
+        ('content', '0008_auto_20210302_2352'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PreviewJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progress')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('creation_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation Date')),
+                ('start_date', models.DateTimeField(blank=True, null=True, verbose_name='Start Date')),
+                ('end_date', models.DateTimeField(blank=True, null=True, verbose_name='End Date')),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='preview_jobs', to='base.Content', verbose_name='Content')),
+            ],
+            options={
+                'verbose_name': 'Preview Job',
+                'verbose_name_plural': 'Preview Jobs',
+                'ordering': ['creation_date'],
+                'abstract': False,
+            },
+        ),
+    ]
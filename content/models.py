@@ -5,9 +5,13 @@ that extends the models.Model class represents a content type and can be
 registered in admin.py.
 """
 
-import os
+import hashlib
+
+from io import BytesIO
 
 from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
@@ -15,7 +19,7 @@ import reversion
 
 from pdf2image import convert_from_path
 
-from base.models import Content
+from base.models import Content, Job
 
 from content.mixin import GeneratePreviewMixin
 from content.validator import Validator
@@ -72,25 +76,44 @@ class BasePDFModel(models.Model):
         """
         abstract = True
 
+    def file_hash(self):
+        """File hash
+
+        Returns the SHA-256 hash of the PDF. The file is read in chunks, so the memory
+        usage does not depend on the size of the file.
+
+        :return: the hexadecimal hash or None if there is no PDF
+        :rtype: None or str
+        """
+        if not self.pdf:
+            return None
+        sha256 = hashlib.sha256()
+        with self.pdf.open('rb') as file:
+            for chunk in file.chunks():
+                sha256.update(chunk)
+        return sha256.hexdigest()
+
     def generate_preview(self):
         """Generate preview
 
-        Generates a preview of this model, more precisely the PDF is generated as a preview.
+        Generates a preview of this model, more precisely the first page of the PDF is
+        rendered with the width CONTENT_PREVIEW_WIDTH. The preview is named after the hash
+        of the PDF, so it is only rendered once for identical files and not again if the
+        PDF did not change.
 
         :return: the string which represents the concatenated path components.
         :rtype: str
         """
-        # Path of the preview folder
-        preview_folder = 'uploads/previews/'
-        # Checks if Folder exists
-        if not os.path.exists(os.path.join(settings.MEDIA_ROOT, preview_folder)):
-            os.makedirs(os.path.join(settings.MEDIA_ROOT, preview_folder))
-        base_filename = os.path.splitext(os.path.basename(self.pdf.name))[0] + '.jpg'
-        # Get images for every page
-        pages = convert_from_path(self.pdf.path, last_page=2)
-        # Save first page to disk
-        pages[0].save(os.path.join(settings.MEDIA_ROOT, preview_folder, base_filename))
-        return os.path.join(preview_folder, base_filename)
+        preview = f'uploads/previews/{self.file_hash()}.jpg'
+        if not default_storage.exists(preview):
+            page = convert_from_path(self.pdf.path, first_page=1, last_page=1,
+                                     size=(settings.CONTENT_PREVIEW_WIDTH, None))[0]
+            image = BytesIO()
+            page.save(image, 'JPEG')
+            # Another worker may have rendered the same file in the meantime
+            if not default_storage.exists(preview):
+                default_storage.save(preview, ContentFile(image.getvalue()))
+        return preview
 
 
 class BaseSourceModel(models.Model):
@@ -361,6 +384,70 @@ CONTENT_TYPES = {
     Latex.TYPE: Latex,
 }
 
+
+class PreviewJob(Job):
+    """Preview job
+
+    This model represents the rendering of the preview of a content with a PDF. The
+    preview is rendered by the worker process, so the upload of a PDF does not wait for it.
+
+    :attr PreviewJob.content: The content of the preview
+    :type PreviewJob.content: ForeignKey - Content
+    """
+    content = models.ForeignKey(Content,
+                                verbose_name=_("Content"),
+                                on_delete=models.CASCADE,
+                                related_name='preview_jobs')
+
+    class Meta(Job.Meta):
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        """
+        verbose_name = _("Preview Job")
+        verbose_name_plural = _("Preview Jobs")
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.content_id} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, content):
+        """Enqueue
+
+        Queues the rendering of the preview of the content if its content type has a PDF
+        and no rendering is already pending.
+
+        :param content: The content
+        :type content: Content
+        """
+        if issubclass(CONTENT_TYPES.get(content.type), BasePDFModel) \
+                and not cls.objects.filter(content=content, status=cls.PENDING).exists():
+            cls.objects.create(content=content)
+
+    def run(self):
+        """Run
+
+        Renders the preview and stores it in the content.
+        """
+        content = self.content
+        obj = CONTENT_TYPES[content.type].objects.get(pk=content.pk)
+        preview = obj.generate_preview() if obj.pdf else None
+        if content.preview.name != preview:
+            content.preview.name = preview
+            content.save(update_fields=['preview'])
+
 # Register models for reversion if it is not already done in admin,
 # else we can specify configuration
 reversion.register(ImageContent,
@@ -0,0 +1,372 @@
+"""Purpose of this file
+
+This file contains the persistent on-disk cache for compiled LaTeX documents.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+
+
+class CompileCache:
+    """Compile cache
+
+    Content-addressed cache of compiled PDFs. An entry is identified by the hash of
+    the fully rendered LaTeX code and the hashes of all files referenced by it
+    (e.g. image attachments). Each entry consists of the PDF and the PDF LaTeX
+    output of the compilation. The modification time of the PDF is used as the
+    time of the last access, which allows to evict the least recently used
+    entries as soon as the cache exceeds its maximum size. The size of the cache
+    includes its subdirectories, e.g. the formats of the precompiled preambles and
+    the sections pinned by the export manifests.
+
+    :attr CompileCache.pdf_suffix: The file suffix of a cached PDF
+    :type CompileCache.pdf_suffix: str
+    :attr CompileCache.log_suffix: The file suffix of a cached PDF LaTeX output
+    :type CompileCache.log_suffix: str
+    :attr CompileCache.chunk_size: The size of the chunks used to hash files
+    :type CompileCache.chunk_size: int
+    :attr CompileCache.low_water: The ratio of the maximum size to which the cache is
+    reduced by an eviction
+    :type CompileCache.low_water: float
+    :attr CompileCache.hits: The number of cache hits of this process
+    :type CompileCache.hits: int
+    :attr CompileCache.misses: The number of cache misses of this process
+    :type CompileCache.misses: int
+    """
+    pdf_suffix = '.pdf'
+    log_suffix = '.log'
+    chunk_size = 64 * 1024
+    low_water = 0.9
+
+    hits = 0
+    misses = 0
+
+    # Guards the counters and the eviction
+    _lock = threading.Lock()
+    # File digests by (path, modification time, size) to avoid rehashing unchanged files
+    _file_digests = {}
+    # Bytes which can be stored by cache directory before the next eviction
+    _budgets = {}
+
+    @staticmethod
+    def directory():
+        """Directory
+
+        Returns the directory of the cache and creates it if it does not exist yet.
+
+        :return: the path of the cache directory
+        :rtype: str
+        """
+        directory = settings.EXPORT_CACHE_DIR
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @classmethod
+    def file_digest(cls, path):
+        """File digest
+
+        Returns the SHA-256 hash of the given file. The file is read in chunks, so
+        large files do not have to be loaded into memory. If the file does not exist,
+        the hash of its path will be returned instead.
+
+        :param path: The path of the file
+        :type path: str
+
+        :return: the hex digest of the file
+        :rtype: str
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return hashlib.sha256(path.encode('utf-8')).hexdigest()
+
+        memo_key = (path, stat.st_mtime_ns, stat.st_size)
+        digest = cls._file_digests.get(memo_key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(cls.chunk_size), b''):
+                    sha.update(chunk)
+            digest = sha.hexdigest()
+            cls._file_digests[memo_key] = digest
+        return digest
+
+    @classmethod
+    def key(cls, tex, assets=()):
+        """Key
+
+        Computes the cache key of the given rendered LaTeX code and its assets.
+
+        :param tex: The rendered LaTeX code
+        :type tex: bytes
+        :param assets: The paths of the files referenced by the LaTeX code
+        :type assets: Iterable[str]
+
+        :return: the cache key
+        :rtype: str
+        """
+        sha = hashlib.sha256(tex)
+        for path in sorted(set(assets)):
+            sha.update(b'\0')
+            sha.update(cls.file_digest(path).encode('ascii'))
+        return sha.hexdigest()
+
+    @classmethod
+    def path(cls, key, suffix=pdf_suffix):
+        """Path
+
+        Returns the path of the cache entry with the given key.
+
+        :param key: The cache key
+        :type key: str
+        :param suffix: The file suffix of the entry
+        :type suffix: str
+
+        :return: the path of the entry
+        :rtype: str
+        """
+        return os.path.join(cls.directory(), key + suffix)
+
+    @classmethod
+    def get(cls, key):
+        """Get
+
+        Returns the cached PDF and PDF LaTeX output of the given key and marks
+        the entry as recently used. If there is no such entry, None will be
+        returned.
+
+        :param key: The cache key
+        :type key: str
+
+        :return: the cached PDF and its PDF LaTeX output
+        :rtype: None or tuple[bytes, bytes]
+        """
+        cached = cls.get_file(key)
+        if cached is None:
+            return None
+        pdf_path, log = cached
+        try:
+            with open(pdf_path, 'rb') as file:
+                return file.read(), log
+        except FileNotFoundError:
+            # Evicted in the meantime
+            return None
+
+    @classmethod
+    def get_file(cls, key):
+        """Get file
+
+        Returns the path of the cached PDF and the PDF LaTeX output of the given key
+        and marks the entry as recently used. The PDF is not read, so large documents
+        can be streamed from the cache. If there is no such entry, None will be returned.
+
+        :param key: The cache key
+        :type key: str
+
+        :return: the path of the cached PDF and its PDF LaTeX output
+        :rtype: None or tuple[str, bytes]
+        """
+        pdf_path = cls.path(key)
+        try:
+            os.utime(pdf_path)
+            # The log is optional, it only serves the rendering error page
+            try:
+                with open(cls.path(key, cls.log_suffix), 'rb') as file:
+                    log = file.read()
+            except FileNotFoundError:
+                log = b''
+        except FileNotFoundError:
+            with cls._lock:
+                cls.misses += 1
+            return None
+
+        with cls._lock:
+            cls.hits += 1
+        return pdf_path, log
+
+    @classmethod
+    def temp_path(cls):
+        """Temporary path
+
+        Returns the path of a new empty file in the cache directory. A file written to
+        this path can be moved into the cache atomically with put_file.
+
+        :return: the path of the temporary file
+        :rtype: str
+        """
+        file_descriptor, tmp_path = tempfile.mkstemp(dir=cls.directory(), suffix='.tmp')
+        os.close(file_descriptor)
+        return tmp_path
+
+    @classmethod
+    def put(cls, key, pdf, log=b''):
+        """Put
+
+        Stores the PDF and its PDF LaTeX output under the given key. The files are
+        written atomically, so concurrent readers never see partially written entries.
+        Afterwards the least recently used entries are evicted if the cache exceeds
+        its maximum size (see stored).
+
+        :param key: The cache key
+        :type key: str
+        :param pdf: The compiled PDF
+        :type pdf: bytes
+        :param log: The PDF LaTeX output
+        :type log: bytes
+        """
+        tmp_path = cls.temp_path()
+        with open(tmp_path, 'wb') as file:
+            file.write(pdf)
+        cls.put_file(key, tmp_path, log)
+
+    @classmethod
+    def put_file(cls, key, path, log=b''):
+        """Put file
+
+        Moves the PDF at the given path into the cache under the given key without
+        reading it. The file is moved atomically if it is located in the cache directory
+        (see temp_path), otherwise it is copied first. Afterwards the least recently used
+        entries except this one are evicted if the cache exceeds its maximum size
+        (see stored).
+
+        :param key: The cache key
+        :type key: str
+        :param path: The path of the compiled PDF
+        :type path: str
+        :param log: The PDF LaTeX output
+        :type log: bytes
+        """
+        tmp_path = cls.temp_path()
+        with open(tmp_path, 'wb') as file:
+            file.write(log)
+        os.replace(tmp_path, cls.path(key, cls.log_suffix))
+
+        if os.path.dirname(os.path.abspath(path)) != os.path.abspath(cls.directory()):
+            tmp_path = cls.temp_path()
+            shutil.copyfile(path, tmp_path)
+            path = tmp_path
+        os.replace(path, cls.path(key))
+        cls.stored(os.path.getsize(cls.path(key)) + len(log), keep=key)
+
+    @classmethod
+    def stored(cls, size, keep=None):
+        """Stored
+
+        Accounts the size of a stored entry. The cache is only scanned and the least
+        recently used entries are only evicted if the entries stored since the last scan
+        of this process exceed the remaining space of the cache. The eviction frees a part
+        of the cache (see low_water), so the cache is not scanned on every put. Entries
+        stored by other processes are noticed by the next scan.
+
+        :param size: The size of the stored entry in bytes
+        :type size: int
+        :param keep: The key of the stored entry which must not be evicted
+        :type keep: None or str
+        """
+        directory = cls.directory()
+        with cls._lock:
+            budget = cls._budgets.get(directory)
+            if budget is not None:
+                cls._budgets[directory] = budget - size
+                if budget >= size:
+                    return
+        cls.evict(int(settings.EXPORT_CACHE_MAX_SIZE * cls.low_water), keep)
+
+    @classmethod
+    def scan(cls, directory):
+        """Scan
+
+        Determines the total size of the cache directory including its subdirectories,
+        e.g. the formats of the precompiled preambles and the sections pinned by the
+        export manifests. Hard linked files are counted once. Only the entries in the
+        cache directory itself can be evicted, an entry frees the size of its files
+        which are not linked elsewhere.
+
+        :param directory: The cache directory
+        :type directory: str
+
+        :return: the evictable entries (last access, key, freed size) and the total size
+        :rtype: tuple[list[tuple[float, str, int]], int]
+        """
+        inodes = set()
+        freed = {}
+        access = {}
+        total = 0
+        for root, _, names in os.walk(directory):
+            for name in names:
+                try:
+                    stat = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                if (stat.st_dev, stat.st_ino) in inodes:
+                    continue
+                inodes.add((stat.st_dev, stat.st_ino))
+                total += stat.st_size
+                if root != directory:
+                    continue
+                key, suffix = os.path.splitext(name)
+                if suffix not in (cls.pdf_suffix, cls.log_suffix):
+                    continue
+                if stat.st_nlink == 1:
+                    freed[key] = freed.get(key, 0) + stat.st_size
+                if suffix == cls.pdf_suffix:
+                    access[key] = stat.st_mtime
+        entries = [(mtime, key, freed.get(key, 0)) for key, mtime in access.items()]
+        return entries, total
+
+    @classmethod
+    def evict(cls, max_size=None, keep=None):
+        """Evict
+
+        Removes the least recently used entries until the total size of the cache
+        does not exceed the maximum size.
+
+        :param max_size: The maximum size in bytes, defaults to the configured size
+        :type max_size: None or int
+        :param keep: The key of an entry which must not be evicted, e.g. the entry
+        which was just stored and will be read next
+        :type keep: None or str
+        """
+        if max_size is None:
+            max_size = settings.EXPORT_CACHE_MAX_SIZE
+        directory = cls.directory()
+
+        with cls._lock:
+            entries, total = cls.scan(directory)
+
+            # Oldest access first
+            entries.sort()
+            for _, key, size in entries:
+                if total <= max_size:
+                    break
+                if key == keep:
+                    continue
+                for suffix in (cls.pdf_suffix, cls.log_suffix):
+                    try:
+                        os.remove(cls.path(key, suffix))
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+            # Files which can not be evicted could keep the cache above its maximum size,
+            # the next scan is still deferred by a part of the cache
+            max_size = settings.EXPORT_CACHE_MAX_SIZE
+            cls._budgets[directory] = max(max_size - total,
+                                          int(max_size * (1 - cls.low_water)))
+
+    @classmethod
+    def stats(cls):
+        """Statistics
+
+        Returns the hit and miss counters of this process.
+
+        :return: the number of hits and misses
+        :rtype: dict[str, int]
+        """
+        with cls._lock:
+            return {'hits': cls.hits, 'misses': cls.misses}
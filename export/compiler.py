@@ -0,0 +1,104 @@
+"""Purpose of this file
+
+This file contains functions related to compiling courses and contents to PDF.
+"""
+
+from django.conf import settings
+
+from base.models import Course
+
+from export.helper_functions import Latex
+from export.loader import ExportLoader
+
+
+def pdf_compile(user, pk, exp_all,  # pylint: disable=invalid-name
+                template="content/export/base.tex",
+                context=None, fragments=None, progress=None, stream=False, manifest=None):
+    """Generate course book
+
+    Generates a PDF file with name tags for students in the queryset. There is also
+    a flag which indicates if the whole core or only the coursebook should be
+    exported. In the fragment mode every content is compiled separately and the
+    PDFs are merged afterwards (see Latex.render_fragments). If the manifest of the previous
+    export is given, the coursebook is exported incrementally, only the contents changed
+    since the last export of the user are recompiled (see ExportManifest).
+
+    :param user: The user who exports the course
+    :type user: User
+    :param pk: The primary key of the course
+    :type pk: int
+    :param exp_all: Indicator if the whole course (T) or the coursebook (F)should b eexported
+    :type exp_all: bool
+    :param template: The path of the LaTeX template to use
+    :type template: str
+    :param context: The context of the content
+    :type context: dict[str, Any]
+    :param fragments: Indicator if the fragment mode should be used, defaults to the settings
+    :type fragments: None or bool
+    :param progress: Receives the ratio of compiled fragments
+    :type progress: None or Callable[[float], None]
+    :param stream: Indicator if the path of the cached PDF is returned instead of its bytes
+    :type stream: bool
+    :param manifest: The manifest of the previous export of the coursebook, only used in the
+    fragment mode
+    :type manifest: None or ExportManifest
+
+    :return: the generated coursebook as PDF, PDF LaTeX output and as an rendered template
+    :rtype: tuple[bytes or str, tuple[bytes, bytes], str]
+    """
+
+    if context is None:
+        context = {}
+    if fragments is None:
+        fragments = settings.EXPORT_FRAGMENTS
+    course = Course.objects.get(pk=pk)
+
+    # Set Context
+    context['user'] = user
+    context['course'] = course
+    context['export_pdf'] = True
+
+    # Check if we want to export the whole course or only the coursebook
+    if exp_all:
+        context['contents'] = ExportLoader.course_contents(course)
+    else:
+        context['contents'] = ExportLoader.favorite_contents(user.profile, course)
+
+    # Perform compilation given context and template
+    if fragments:
+        return Latex.render_fragments(context, template, progress, stream, manifest)
+    (pdf, pdflatex_output, tex_template) = Latex.render(context, template, [], stream=stream)
+    return pdf, pdflatex_output, tex_template
+
+
+def generate_pdf_from_latex(user, content, template="content/export/base.tex", context=None):
+    """Generate PDF
+
+    Generates a PDF file with name tags for students in the queryset.
+    This method is used to compile a specific latex content into a PDF.
+
+    :param user: The user of the content
+    :type user: User
+    :param content: The content of the PDF
+    :type content: Content
+    :param template: The path of the LaTeX template to use
+    :type template: str
+    :param context: The context of the content
+    :type context: dict[str, Any]
+
+    return: the generated PDF
+    rtype: bytes
+    """
+    if context is None:
+        context = {}
+
+    # Set Context
+    context['user'] = user
+    context['topic'] = content.topic
+    context['contents'] = [content]
+    context['export_pdf'] = False
+
+    # Performs compilation given context and template
+    # pdf = pdf, pdflatex_output, tex_template
+    pdf = Latex.render(context, template, [])
+    return pdf[0]
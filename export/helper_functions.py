@@ -5,14 +5,24 @@ This file contains utility functions related to exporting and rendering files.
 
 import os
 import re
+import shutil
 import tempfile
 
-from subprocess import Popen, PIPE
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from django.conf import settings
 from django.template.loader import get_template
 
+from export.cache import CompileCache
+from export.pool import CompilePool, CompileTimeout
+from export.preamble import Preamble
 from export.templatetags.cc_export_tags import export_template, tex_escape, ret_path
 
+# A compile error with its line in the rendered LaTeX code and the primary key of the
+# content which contains the line (None if unknown)
+LatexError = namedtuple('LatexError', ['line', 'message', 'content'])
+
 
 class Latex:
     """LaTeX Export
@@ -27,18 +37,33 @@ class Latex:
     :type Latex.error_prefix: str
     :attr Latex.error_template: The name of the error template
     :type Latex.error_template: str
+    :attr Latex.options: The options of PDF LaTeX, stop at the first error without prompting
+    :type Latex.options: list[str]
+    :attr Latex.content_pattern: The pattern of the line which precedes a rendered content
+    :type Latex.content_pattern: Pattern
+    :attr Latex.line_pattern: The pattern of the line number in the context of an error
+    :type Latex.line_pattern: Pattern
+    :attr Latex.placeholder_pattern: The pattern of the escaped braces and image placeholders
+    :type Latex.placeholder_pattern: Pattern
     """
     encoding = 'utf-8'
     error_prefix = '!'
     error_template = 'error'
+    options = ['-interaction=nonstopmode', '-halt-on-error']
+    content_pattern = re.compile(rb'^%%% Content (\d+)$', re.MULTILINE)
+    line_pattern = re.compile(r'^l\.(\d+)')
+    # Either the escape '{~~' or an image placeholder, e.g. \includegraphics[width=5cm]{Image-0}
+    placeholder_pattern = re.compile(r'\{~~|\\includegraphics(\[.*?])?\{(?:~~)?Image-(\d+)}')
 
-    # TODO documentation parameters
     @staticmethod
-    def render(context, template_name, assets, app='export', external_assets=None):
+    def render(context, template_name, assets, app='export', external_assets=None,
+               stream=False):
         """Render
 
         Renders the LaTeX code with its content and then compiles the code to generate
-        a PDF with its log.
+        a PDF with its log. The compiled PDF is stored in the compile cache, keyed by the
+        rendered LaTeX code and the files referenced by it. If the same document was
+        compiled before, the cached PDF will be returned without invoking PDF LaTeX.
 
         https://github.com/d120/pyophase/blob/master/ophasebase/helper.py
         Retrieved 10.08.2020
@@ -47,77 +72,387 @@ class Latex:
         :type context: dict
         :param template_name: The name of the template to use
         :type template_name: str
-        :param assets:
-        :type assets:
+        :param assets: The paths of additional files referenced by the template
+        :type assets: list[str]
         :param app:
         :type: str
         :param external_assets:
         :type external_assets:
+        :param stream: Indicator if the path of the cached PDF is returned instead of its bytes
+        :type stream: bool
 
         :return: the rendered LaTeX code as PDF, PDF LaTeX output and its the rendered template
-        :rtype: tuple[bytes, tuple[bytes, bytes], str]
+        :rtype: tuple[bytes or str, tuple[bytes, bytes], str]
         """
         template = get_template(template_name)
         rendered_tpl = template.render(context).encode(Latex.encoding)
         # Prerender content templates
         for content in context['contents']:
+            rendered_tpl += Latex.content_marker(content)
             rendered_tpl += Latex.pre_render(content, context['export_pdf'])
         rendered_tpl += r"\end{document}".encode(Latex.encoding)
 
+        def error_tpl():
+            # Prerender errors templates, without title the error document does not
+            # depend on the context and is compiled only once (compile cache)
+            tpl = template.render(dict(context, fragment=True)).encode(Latex.encoding)
+            tpl += Latex.pre_render(None, context['export_pdf'],
+                                    Latex.error_template, False)
+            return tpl + r"\end{document}".encode(Latex.encoding)
+
+        pdf, pdflatex_output, rendered_tpl, _, _ = Latex.compile(
+            rendered_tpl, list(assets) + Latex.assets(context['contents']), error_tpl,
+            stream=stream)
+        return pdf, pdflatex_output, rendered_tpl
+
+    @staticmethod
+    def compile(tex, assets=(), error_tpl=None, runs=1, files=None, stream=False):
+        """Compile
+
+        Compiles the rendered LaTeX code to a PDF. The compiled PDF is stored in the compile
+        cache, keyed by the rendered LaTeX code and the files referenced by it. If the same
+        document was compiled before, the cached PDF will be returned without invoking
+        PDF LaTeX. If the compilation reports errors and an error template is given, the
+        PDF of the error template will be cached under the key of the original code. The
+        error template is static and compiled through the cache as well, so in general a
+        failing compilation only costs the single PDF LaTeX run which found the errors. The
+        errors themselves are returned, e.g. to be listed on the rendering error page. A
+        compilation exceeding the time limit is reported as error as well, but it is not
+        cached.
+
+        In the stream mode the PDF is moved into the cache without reading it and the path
+        of the cache entry is returned, so the memory usage does not depend on the size of
+        the document.
+
+        :param tex: The rendered LaTeX code
+        :type tex: bytes
+        :param assets: The paths of the files referenced by the LaTeX code
+        :type assets: Iterable[str]
+        :param error_tpl: Renders the error template
+        :type error_tpl: None or Callable[[], bytes]
+        :param runs: The number of PDF LaTeX passes, e.g. 2 to resolve the table of contents
+        :type runs: int
+        :param files: The files to provide in the working directory by name, either their
+        content or their path
+        :type files: None or dict[str, bytes or str]
+        :param stream: Indicator if the path of the cached PDF is returned instead of its bytes
+        :type stream: bool
+
+        :return: the PDF, PDF LaTeX output, the compiled LaTeX code, the cache key and
+        the errors of the compilation
+        :rtype: tuple[bytes or str, tuple[bytes, bytes], bytes, str, list[LatexError]]
+        """
+        # Lookup the compiled document in the cache
+        key = CompileCache.key(tex, assets)
+        cached = CompileCache.get_file(key) if stream else CompileCache.get(key)
+        if cached is not None:
+            pdf, log = cached
+            return pdf, (log, b''), tex, key, Latex.parse_errors(log, tex)
+
+        target = CompileCache.temp_path() if stream else None
+        try:
+            pdf, pdflatex_output = Latex.run(tex, runs, files, target)
+        except CompileTimeout as timeout:
+            # The output reports the timeout as error, but the next compilation may succeed,
+            # so the error document is not cached under the key of the code
+            errors = Latex.parse_errors(timeout.output[0], tex)
+            pdf = Latex.compile(error_tpl(), stream=stream)[0] \
+                if error_tpl is not None else None
+            return pdf, timeout.output, tex, key, errors
+
+        # Extract the errors from the output of the first run
+        errors = Latex.parse_errors(pdflatex_output[0], tex)
+        if len(errors) != 0 and error_tpl is not None:
+            pdf = Latex.compile(error_tpl())[0]
+
+        # Only compilations which produced a PDF are cached
+        log = pdflatex_output[0] or b''
+        if isinstance(pdf, bytes):
+            CompileCache.put(key, pdf, log)
+        elif pdf is not None:
+            CompileCache.put_file(key, pdf, log)
+        if target is not None and os.path.exists(target):
+            os.remove(target)
+        if stream and pdf:
+            pdf = CompileCache.path(key)
+        return pdf, pdflatex_output, tex, key, errors
+
+    @staticmethod
+    def run(tex, runs=1, files=None, target=None):
+        """Run
+
+        Runs PDF LaTeX on the given code in a temporary directory. The processes are
+        managed by the compile pool which limits their concurrency, time and memory.
+        If possible, PDF LaTeX starts from the precompiled preamble (see Preamble).
+        PDF LaTeX stops at the first error instead of prompting for input.
+
+        :param tex: The rendered LaTeX code
+        :type tex: bytes
+        :param runs: The number of PDF LaTeX passes
+        :type runs: int
+        :param files: The files to provide in the working directory by name, either their
+        content or their path
+        :type files: None or dict[str, bytes or str]
+        :param target: The path to move the PDF to instead of reading it
+        :type target: None or str
+
+        :return: the PDF or its path (None if no PDF was generated) and the PDF LaTeX output
+        :rtype: tuple[bytes or str, tuple[bytes, bytes]]
+
+        :raises CompileTimeout: if a PDF LaTeX pass exceeded the time limit
+        """
+        args, tex = Preamble.args(tex)
         with tempfile.TemporaryDirectory() as tempdir:
+            files = dict(files or {}, **{'texput.tex': tex})
+            for name, data in files.items():
+                path = os.path.join(tempdir, name)
+                if isinstance(data, str):
+                    Latex.link(data, path)
+                    continue
+                with open(path, 'wb') as file:
+                    file.write(data)
 
-            process = Popen(['pdflatex'], stdin=PIPE, stdout=PIPE, cwd=tempdir, )
+            for _ in range(runs):
+                # Output is a byte tuple of stdout and stderr
+                pdflatex_output = CompilePool.run(args + Latex.options + ['texput.tex'], b'',
+                                                  tempdir)
 
-            # Output is a byte tuple of stdout and stderr
-            pdflatex_output = process.communicate(rendered_tpl)
+            pdf_path = os.path.join(tempdir, 'texput.pdf')
+            if not os.path.exists(pdf_path):
+                pdf = None
+            elif target is not None:
+                shutil.move(pdf_path, target)
+                pdf = target
+            else:
+                with open(pdf_path, 'rb') as file:
+                    pdf = file.read()
+        return pdf, pdflatex_output
 
-            # Filter error messages in log (stdout)
-            error_log = Latex.errors(pdflatex_output[0])
-            # Error log
-            if len(error_log) != 0:
-                rendered_tpl = template.render(context).encode(Latex.encoding)
-                # Prerender errors templates
-                rendered_tpl += Latex.pre_render(len(error_log), context['export_pdf'],
-                                                 Latex.error_template, False)
-                rendered_tpl += r"\end{document}".encode(Latex.encoding)
+    @staticmethod
+    def link(source, destination):
+        """Link
 
-                process = Popen(['pdflatex'], stdin=PIPE, stdout=PIPE, cwd=tempdir, )
-                pdflatex_output = process.communicate(rendered_tpl)
+        Provides the file at the source path at the destination path without reading it.
+        The file is hard linked if possible and copied otherwise.
 
-            try:
-                with open(os.path.join(tempdir, 'texput.pdf'), 'rb') as file:
-                    pdf = file.read()
-            except FileNotFoundError:
-                pdf = None
-        return pdf, pdflatex_output, rendered_tpl
+        :param source: The path of the file
+        :type source: str
+        :param destination: The path to provide the file at
+        :type destination: str
+        """
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copyfile(source, destination)
 
     @staticmethod
-    def errors(lob):
-        """Error log
+    def render_fragments(context, template_name, progress=None, stream=False, manifest=None):
+        """Render fragments
 
-        Checks the given log (stdout) if there are error messages and returns the
-        messages. If there are none, an empty list will be returned.
+        Renders and compiles every content to its own PDF (fragment) and merges the
+        fragments into one document with a table of contents afterwards. The fragments
+        do not depend on the course or the user, so they are shared between all exports
+        through the compile cache and only changed contents have to be recompiled. An
+        error in a content only replaces its own fragment with the error template.
+
+        The fragments are compiled in parallel. Each compilation runs in its own PDF LaTeX
+        process, the threads of the pool only wait for them. The fragments are never read,
+        they are linked from the compile cache into the working directory of the merge.
+
+        If a manifest of the previous export is given, the fragments whose revision (cache
+        key) did not change are taken from the manifest without compiling them, even if
+        they were evicted from the compile cache. Afterwards the manifest is updated.
+
+        :param context: The context of the document to be rendered
+        :type context: dict
+        :param template_name: The name of the template to use
+        :type template_name: str
+        :param progress: Receives the ratio of compiled fragments
+        :type progress: None or Callable[[float], None]
+        :param stream: Indicator if the path of the cached PDF is returned instead of its bytes
+        :type stream: bool
+        :param manifest: The manifest of the previous export
+        :type manifest: None or ExportManifest
+
+        :return: the merged PDF, PDF LaTeX output and the rendered template of the merge
+        :rtype: tuple[bytes or str, tuple[bytes, bytes], str]
+        """
+        template = get_template(template_name)
+        fragment_context = dict(context, fragment=True)
+        preamble = template.render(fragment_context).encode(Latex.encoding)
+
+        def error_tpl():
+            # Prerender errors templates
+            return preamble + Latex.pre_render(None, context['export_pdf'],
+                                               Latex.error_template, False) \
+                   + r"\end{document}".encode(Latex.encoding)
+
+        # Render all fragments first, rendering accesses the database
+        jobs = []
+        for content in context['contents']:
+            tex = preamble + Latex.content_marker(content) \
+                  + Latex.pre_render(content, context['export_pdf']) \
+                  + r"\end{document}".encode(Latex.encoding)
+            jobs.append((tex, Latex.assets([content]), error_tpl))
+
+        keys = [CompileCache.key(tex, assets) for tex, assets, _ in jobs]
+
+        with tempfile.TemporaryDirectory() as fragment_dir:
+            def provide(key, pdf):
+                # Link the fragment right away, it could be evicted from the cache
+                # by the following fragments
+                path = os.path.join(fragment_dir, f'{key}.pdf')
+                if not os.path.exists(path):
+                    Latex.link(pdf, path)
+                return path
+
+            # Unchanged fragments of the previous export
+            fragments = [None] * len(jobs)
+            for index, key in enumerate(keys):
+                pinned = manifest.fragment(key) if manifest is not None else None
+                if pinned is not None:
+                    fragments[index] = provide(key, pinned)
+            done = len(jobs) - fragments.count(None)
+
+            with ThreadPoolExecutor(max_workers=settings.EXPORT_FRAGMENT_WORKERS) as executor:
+                futures = {executor.submit(Latex.compile, *job, stream=True): index
+                           for index, job in enumerate(jobs) if fragments[index] is None}
+                for future in as_completed(futures):
+                    pdf, _, _, key, _ = future.result()
+                    if pdf:
+                        fragments[futures[future]] = provide(key, pdf)
+                    done += 1
+                    if progress is not None:
+                        progress(done / len(jobs))
+
+            result = Latex.merge(context, template, fragments, stream)
+            if manifest is not None:
+                manifest.update([(content.pk, key) for content, key in
+                                 zip(context['contents'], keys)],
+                                {key: path for key, path in zip(keys, fragments) if path})
+            return result
+
+    @staticmethod
+    def merge(context, template, fragments, stream=False):
+        """Merge
+
+        Merges the compiled fragments page by page into one document with a table of
+        contents. The fragments are provided to PDF LaTeX by their cache key.
+
+        :param context: The context of the document to be rendered
+        :type context: dict
+        :param template: The template to use
+        :type template: Template
+        :param fragments: The paths of the compiled fragments of the contents (None if
+        a content could not be compiled)
+        :type fragments: list[str or None]
+        :param stream: Indicator if the path of the cached PDF is returned instead of its bytes
+        :type stream: bool
+
+        :return: the merged PDF, PDF LaTeX output and the rendered template of the merge
+        :rtype: tuple[bytes or str, tuple[bytes, bytes], str]
+        """
+        merged_tpl = template.render(context).encode(Latex.encoding)
+        merged_tpl += "\\tableofcontents\n\\newpage\n".encode(Latex.encoding)
+        files = {}
+        last_topic = None
+        for index, (content, path) in enumerate(zip(context['contents'], fragments)):
+            if not path:
+                continue
+            name = os.path.basename(path)
+            files[name] = path
+            # Add a section to the table of contents for each topic
+            toc = ''
+            if content.topic_id != last_topic:
+                last_topic = content.topic_id
+                toc = f', addtotoc={{1, section, 1, {{{tex_escape(content.topic.title)}}}, ' \
+                      f'fragment-{index}}}'
+            merged_tpl += (f'\\includepdf[pages=-, pagecommand={{\\thispagestyle{{plain}}}}'
+                           f'{toc}]{{{name}}}\n').encode(Latex.encoding)
+        merged_tpl += r"\end{document}".encode(Latex.encoding)
+
+        # Two passes to resolve the table of contents
+        pdf, pdflatex_output, merged_tpl, _, _ = Latex.compile(merged_tpl, runs=2, files=files,
+                                                               stream=stream)
+        return pdf, pdflatex_output, merged_tpl
+
+    @staticmethod
+    def assets(contents):
+        """Assets
+
+        Returns the paths of the files that are referenced by the rendered templates
+        of the given contents, i.e. the image attachments, images and PDFs.
+
+        :param contents: The contents to be rendered
+        :type contents: list[Content]
+
+        :return: the paths of the referenced files
+        :rtype: list[str]
+        """
+        paths = []
+        for content in contents:
+            files = [attachment.image for attachment in content.ImageAttachments.all()]
+            if content.type == 'Image' and hasattr(content, 'imagecontent'):
+                files.append(content.imagecontent.image)
+            elif content.type == 'PDF' and hasattr(content, 'pdfcontent'):
+                files.append(content.pdfcontent.pdf)
+            paths += [file.path for file in files if file]
+        return paths
+
+    @staticmethod
+    def parse_errors(lob, tex=b''):
+        """Parse errors
+
+        Extracts the errors from the given log (stdout) in a single pass. In the non stop
+        mode the output contains the same error messages and contexts as the log file.
+        The line of an error is taken from its context ('l.<line>') and the content is
+        determined by the last content marker before that line in the rendered code.
 
         :param lob: The bytes representing the LaTeX compile log
         :type lob: bytes
+        :param tex: The rendered LaTeX code
+        :type tex: bytes
 
-        :return: the error messages from the log
-        :rtype: list[str]
+        :return: the errors from the log
+        :rtype: list[LatexError]
         """
-        # Decode bytes to string and split the string by the delimiter '\n'
-        lines = lob.decode(Latex.encoding, errors='ignore').splitlines()
-        found = []
-        for line in lines:
-            # LaTeX log errors contains '!'
-            index = line.find(Latex.error_prefix)
-            if index != -1:
-                tmp = line[index:]
-                # Do not add duplicates
-                if found.__contains__(tmp):
-                    continue
-                tmp = tex_escape(tmp)
-                found.append(tmp)
-        return found
+        # Line numbers of the content markers in ascending order
+        markers = [(tex.count(b'\n', 0, match.start()) + 1, int(match.group(1)))
+                   for match in Latex.content_pattern.finditer(tex)]
+
+        errors = []
+        error = None
+        for line in lob.decode(Latex.encoding, errors='ignore').splitlines():
+            if line.startswith(Latex.error_prefix):
+                error = LatexError(None, line[len(Latex.error_prefix):].strip(), None)
+                errors.append(error)
+                continue
+            match = Latex.line_pattern.match(line)
+            if error is not None and match is not None:
+                number = int(match.group(1))
+                content = None
+                for marker_line, content_id in markers:
+                    if marker_line > number:
+                        break
+                    content = content_id
+                errors[-1] = LatexError(number, error.message, content)
+                error = None
+        return errors
+
+    @staticmethod
+    def content_marker(content):
+        """Content marker
+
+        Returns the comment which precedes the rendered code of the given content, it
+        associates the errors with the content.
+
+        :param content: The content to be rendered
+        :type content: Content
+
+        :return: the content marker
+        :rtype: bytes
+        """
+        return f'\n%%% Content {content.pk}\n'.encode(Latex.encoding)
 
     @staticmethod
     def pre_render(content, export_flag, template_type=None, no_error=True):
@@ -156,21 +491,40 @@ class Latex:
         # render the template and use escape for triple braces with escape character ~~
         # this is relevant when using triple braces for file paths in tex data
         rendered_tpl = template.render(context)
-        rendered_tpl = re.sub('{~~', '{', rendered_tpl)
 
         # Check that we are not compiling an error template (otherwise the content would be an int)
+        paths = []
         if no_error:
-
             # If there exists an attachment, replace all placeholders in the tex file with
             # image path
-            if content.ImageAttachments.count() > 0:
-                attachments = content.ImageAttachments.all()
-
-                for idx, attachment in enumerate(attachments):
-                    path = ret_path(attachment.image.url)
-                    rendered_tpl = re.sub(rf"\\includegraphics(\[.*])?{{Image-{idx}}}",
-                                          rf"\\includegraphics\1{{{path}}}",
-                                          rendered_tpl)
+            paths = [ret_path(attachment.image.url)
+                     for attachment in content.ImageAttachments.all()]
 
         # Encode the template with Latex Encoding
-        return rendered_tpl.encode(Latex.encoding)
+        return Latex.resolve_placeholders(rendered_tpl, paths).encode(Latex.encoding)
+
+    @staticmethod
+    def resolve_placeholders(rendered_tpl, paths):
+        """Resolve placeholders
+
+        Replaces the escaped braces '{~~' with '{' and the image placeholders 'Image-N' of
+        graphics with the path of the N-th image attachment in a single pass over the code.
+        Placeholders without a corresponding attachment are left unchanged.
+
+        :param rendered_tpl: The rendered template
+        :type rendered_tpl: str
+        :param paths: The paths of the image attachments
+        :type paths: list[str]
+
+        :return: the rendered template with the resolved placeholders
+        :rtype: str
+        """
+        def resolve(match):
+            if match.group(2) is None:
+                return '{'
+            idx = int(match.group(2))
+            if idx >= len(paths):
+                return match.group(0).replace('{~~', '{')
+            return f'\\includegraphics{match.group(1) or ""}{{{paths[idx]}}}'
+
+        return Latex.placeholder_pattern.sub(resolve, rendered_tpl)
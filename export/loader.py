@@ -0,0 +1,77 @@
+"""Purpose of this file
+
+This file contains the loader of the contents of an export.
+"""
+
+from base.models import Content, CourseStructureEntry, Favorite
+
+from content.models import CONTENT_TYPES
+
+
+class ExportLoader:
+    """Export loader
+
+    Loads the contents of a course or a coursebook with everything the export templates
+    access: the topic, the type specific model (e.g. Latex) and the image attachments.
+    The number of queries does not depend on the number of topics or contents.
+    """
+
+    @staticmethod
+    def queryset():
+        """Query set
+
+        Returns the query set of the contents which joins the topic and the type specific
+        models and prefetches the image attachments.
+
+        :return: the query set of the contents
+        :rtype: QuerySet[Content]
+        """
+        # The reverse one to one relation is named by the model
+        type_models = [model._meta.model_name for model in CONTENT_TYPES.values()]
+        return Content.objects.select_related('topic', *type_models) \
+            .prefetch_related('ImageAttachments') \
+            .order_by('pk')
+
+    @staticmethod
+    def course_contents(course):
+        """Course contents
+
+        Returns the contents of all topics of the course ordered by the course structure.
+        A topic which occurs multiple times in the structure is exported multiple times.
+
+        :param course: The course to export
+        :type course: Course
+
+        :return: the contents of the course
+        :rtype: list[Content]
+        """
+        topic_ids = list(CourseStructureEntry.objects.filter(course=course)
+                         .order_by('position', 'sub_position')
+                         .values_list('topic_id', flat=True))
+
+        contents_by_topic = {}
+        for content in ExportLoader.queryset().filter(topic_id__in=topic_ids):
+            contents_by_topic.setdefault(content.topic_id, []).append(content)
+        return [content
+                for topic_id in topic_ids
+                for content in contents_by_topic.get(topic_id, [])]
+
+    @staticmethod
+    def favorite_contents(profile, course):
+        """Favorite contents
+
+        Returns the contents the user marked as favorite in the course in the order
+        they were marked.
+
+        :param profile: The profile of the user
+        :type profile: Profile
+        :param course: The course to export
+        :type course: Course
+
+        :return: the favorite contents of the user
+        :rtype: list[Content]
+        """
+        content_ids = list(Favorite.objects.filter(user=profile, course=course)
+                           .order_by('pk').values_list('content_id', flat=True))
+        contents = ExportLoader.queryset().in_bulk(content_ids)
+        return [contents[content_id] for content_id in content_ids if content_id in contents]
@@ -0,0 +1,42 @@
+# Generated by Django 3.0.7 on 2026-10-18 16:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('base', '0016_auto_20210302_2352'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progress')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('creation_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation Date')),
+                ('start_date', models.DateTimeField(blank=True, null=True, verbose_name='Start Date')),
+                ('end_date', models.DateTimeField(blank=True, null=True, verbose_name='End Date')),
+                ('exp_all', models.BooleanField(default=True, verbose_name='Export whole course')),
+                ('file_name', models.CharField(max_length=250, verbose_name='File name')),
+                ('pdf', models.FileField(blank=True, upload_to='uploads/exports/%Y/%m/%d/', verbose_name='PDF')),
+                ('log', models.TextField(blank=True, verbose_name='PDF LaTeX output')),
+                ('tex', models.TextField(blank=True, verbose_name='LaTeX template')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='base.Course', verbose_name='Course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to='base.Profile', verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Export Job',
+                'verbose_name_plural': 'Export Jobs',
+                'ordering': ['creation_date'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0016_auto_20210302_2352'),
+        ('export', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportManifest',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sections', models.TextField(default='[]', verbose_name='Sections')),
+                ('update_date', models.DateTimeField(auto_now=True, verbose_name='Update date')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_manifests', to='base.Course', verbose_name='Course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_manifests', to='base.Profile', verbose_name='User')),
+            ],
+            options={
+                'verbose_name': 'Export Manifest',
+                'verbose_name_plural': 'Export Manifests',
+                'unique_together': {('user', 'course')},
+            },
+        ),
+    ]
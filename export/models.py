@@ -0,0 +1,318 @@
+"""Purpose of this file
+
+This file describes or defines the models of the export.
+"""
+
+import json
+import os
+import shutil
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import models
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from base.models import Course, Job, Profile
+
+from export.compiler import pdf_compile
+from export.helper_functions import Latex
+
+
+class ExportJob(Job):
+    """Export job
+
+    This model represents the export of a course or a coursebook as PDF. The export is
+    compiled in the background by the worker process, the web process only creates the
+    job and reports its progress. If the compilation fails, the PDF LaTeX output and the
+    rendered template will be stored to show the error to the user.
+
+    :attr ExportJob.course: The course to export
+    :type ExportJob.course: ForeignKey - Course
+    :attr ExportJob.user: The user who requested the export
+    :type ExportJob.user: ForeignKey - Profile
+    :attr ExportJob.exp_all: Indicator if the whole course (T) or the coursebook (F) is exported
+    :type ExportJob.exp_all: BooleanField
+    :attr ExportJob.file_name: The name of the exported file without suffix
+    :type ExportJob.file_name: CharField
+    :attr ExportJob.pdf: The exported PDF
+    :type ExportJob.pdf: FileField
+    :attr ExportJob.log: The PDF LaTeX output if the compilation failed
+    :type ExportJob.log: TextField
+    :attr ExportJob.tex: The rendered template if the compilation failed
+    :type ExportJob.tex: TextField
+    """
+    course = models.ForeignKey(Course,
+                               verbose_name=_("Course"),
+                               on_delete=models.CASCADE,
+                               related_name='export_jobs')
+    user = models.ForeignKey(Profile,
+                             verbose_name=_("User"),
+                             on_delete=models.CASCADE,
+                             related_name='export_jobs')
+    exp_all = models.BooleanField(verbose_name=_("Export whole course"),
+                                  default=True)
+    file_name = models.CharField(verbose_name=_("File name"),
+                                 max_length=250)
+    pdf = models.FileField(verbose_name=_("PDF"),
+                           upload_to='uploads/exports/%Y/%m/%d/',
+                           blank=True)
+    log = models.TextField(verbose_name=_("PDF LaTeX output"),
+                           blank=True)
+    tex = models.TextField(verbose_name=_("LaTeX template"),
+                           blank=True)
+
+    class Meta(Job.Meta):
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        """
+        verbose_name = _("Export Job")
+        verbose_name_plural = _("Export Jobs")
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.file_name} ({self.status})"
+
+    @staticmethod
+    def expiry():
+        """Expiry
+
+        Returns the number of seconds after which finished exports and their PDFs are
+        deleted by the worker.
+
+        :return: the expiry in seconds
+        :rtype: int
+        """
+        return settings.EXPORT_EXPIRY
+
+    @classmethod
+    def cleanup(cls):
+        """Cleanup
+
+        Marks the stale running exports as failed and deletes the expired exports. The
+        expired export manifests are deleted as well (see ExportManifest.cleanup).
+
+        :return: the number of failed and deleted exports
+        :rtype: tuple[int, int]
+        """
+        ExportManifest.cleanup()
+        return super().cleanup()
+
+    def run(self):
+        """Run
+
+        Compiles the course or coursebook and stores the PDF. In the fragment mode the
+        coursebook is exported incrementally based on the manifest of the previous export.
+        The PDF is copied from the compile cache to the storage without reading it into
+        memory.
+        """
+        manifest = None
+        if settings.EXPORT_FRAGMENTS and not self.exp_all:
+            # The coursebook is exported incrementally based on the previous export
+            manifest = ExportManifest.objects.get_or_create(user=self.user,
+                                                            course=self.course)[0]
+
+        self.set_progress(10)
+        pdf, pdflatex_output, tex_template = pdf_compile(
+            self.user.user, self.course_id, self.exp_all,
+            progress=lambda ratio: self.set_progress(10 + 80 * ratio), stream=True,
+            manifest=manifest)
+        if not pdf:
+            self.log = pdflatex_output[0].decode('utf-8', errors='ignore')
+            self.tex = tex_template.decode('utf-8', errors='ignore')
+            raise RuntimeError('PDF LaTeX did not produce a PDF')
+        self.set_progress(90)
+        with open(pdf, 'rb') as file:
+            self.pdf.save(f"{self.file_name}.pdf", File(file), save=False)
+
+
+@receiver(post_delete, sender=ExportJob)
+def delete_export_pdf(sender, instance, **kwargs):
+    """Delete export PDF
+
+    Deletes the exported PDF of a deleted export job.
+
+    :param sender: The model of the export job
+    :type sender: type[ExportJob]
+    :param instance: The deleted export job
+    :type instance: ExportJob
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    if instance.pdf:
+        instance.pdf.delete(save=False)
+
+
+class ExportManifest(models.Model):
+    """Export manifest
+
+    This model represents the last coursebook export of a user in a course. It lists the
+    exported sections (the content and the revision hash of its rendered code) and pins
+    the compiled sections outside of the compile cache, so they can not be evicted. The
+    next export only recompiles the sections whose revision changed and merges them with
+    the pinned sections of the previous export. Manifests which were not updated for
+    EXPORT_MANIFEST_EXPIRY seconds are deleted with their pinned sections by the worker.
+
+    :attr ExportManifest.user: The user who exported the coursebook
+    :type ExportManifest.user: ForeignKey - Profile
+    :attr ExportManifest.course: The course of the coursebook
+    :type ExportManifest.course: ForeignKey - Course
+    :attr ExportManifest.sections: The exported sections as json list of content id and revision
+    :type ExportManifest.sections: TextField
+    :attr ExportManifest.update_date: The date of the last export
+    :type ExportManifest.update_date: DateTimeField
+    """
+    user = models.ForeignKey(Profile,
+                             verbose_name=_("User"),
+                             on_delete=models.CASCADE,
+                             related_name='export_manifests')
+    course = models.ForeignKey(Course,
+                               verbose_name=_("Course"),
+                               on_delete=models.CASCADE,
+                               related_name='export_manifests')
+    sections = models.TextField(verbose_name=_("Sections"),
+                                default='[]')
+    update_date = models.DateTimeField(verbose_name=_("Update date"),
+                                       auto_now=True)
+
+    class Meta:
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        :param Meta.unique_together: Sets of field names that, taken together, must be unique
+        :type Meta.unique_together: tuple[str, str]
+        """
+        verbose_name = _("Export Manifest")
+        verbose_name_plural = _("Export Manifests")
+        unique_together = ('user', 'course')
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.user} -> {self.course}"
+
+    def directory(self):
+        """Directory
+
+        Returns the directory of the pinned sections.
+
+        :return: the path of the directory
+        :rtype: str
+        """
+        return os.path.join(settings.EXPORT_CACHE_DIR, 'manifests',
+                            f'{self.user_id}-{self.course_id}')
+
+    @classmethod
+    def cleanup(cls):
+        """Cleanup
+
+        Deletes the manifests which were not updated for EXPORT_MANIFEST_EXPIRY seconds
+        and releases their pinned sections. Directories of pinned sections without a
+        manifest, e.g. left behind by an interrupted deletion, are removed as well.
+
+        :return: the number of deleted manifests
+        :rtype: int
+        """
+        expired = timezone.now() - timedelta(seconds=settings.EXPORT_MANIFEST_EXPIRY)
+        _, deleted = cls.objects.filter(update_date__lt=expired).delete()
+
+        directory = os.path.join(settings.EXPORT_CACHE_DIR, 'manifests')
+        if os.path.isdir(directory):
+            names = {f'{user_id}-{course_id}' for user_id, course_id
+                     in cls.objects.values_list('user_id', 'course_id')}
+            for name in os.listdir(directory):
+                if name not in names:
+                    shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        return deleted.get(cls._meta.label, 0)
+
+    def get_sections(self):
+        """Get sections
+
+        Returns the sections of the last export.
+
+        :return: the content ids and revisions of the sections
+        :rtype: list[tuple[int, str]]
+        """
+        return [tuple(section) for section in json.loads(self.sections)]
+
+    def fragment(self, revision):
+        """Fragment
+
+        Returns the path of the pinned section with the given revision.
+
+        :param revision: The revision of the section
+        :type revision: str
+
+        :return: the path of the compiled section or None if it is not pinned
+        :rtype: None or str
+        """
+        path = os.path.join(self.directory(), f'{revision}.pdf')
+        return path if os.path.exists(path) else None
+
+    def update(self, sections, fragments):
+        """Update
+
+        Pins the compiled sections of the current export, releases the sections which are
+        not exported anymore and saves the manifest.
+
+        :param sections: The content ids and revisions of the exported sections
+        :type sections: list[tuple[int, str]]
+        :param fragments: The paths of the compiled sections by revision
+        :type fragments: dict[str, str]
+        """
+        directory = self.directory()
+        os.makedirs(directory, exist_ok=True)
+        for revision, path in fragments.items():
+            pinned = os.path.join(directory, f'{revision}.pdf')
+            if not os.path.exists(pinned):
+                Latex.link(path, pinned)
+
+        revisions = {f'{revision}.pdf' for _, revision in sections}
+        for name in os.listdir(directory):
+            if name not in revisions:
+                os.remove(os.path.join(directory, name))
+
+        self.sections = json.dumps(sections)
+        self.save()
+
+
+@receiver(post_delete, sender=ExportManifest)
+def delete_manifest_sections(sender, instance, **kwargs):
+    """Delete manifest sections
+
+    Releases the pinned sections of a deleted manifest.
+
+    :param sender: The model of the manifest
+    :type sender: type[ExportManifest]
+    :param instance: The deleted manifest
+    :type instance: ExportManifest
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    shutil.rmtree(instance.directory(), ignore_errors=True)
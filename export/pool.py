@@ -0,0 +1,231 @@
+"""Purpose of this file
+
+This file contains the pool which manages the PDF LaTeX processes of this host.
+"""
+
+import collections
+import logging
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from subprocess import Popen, PIPE, TimeoutExpired
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+class CompileTimeout(Exception):
+    """Compile timeout
+
+    Raised if a compilation exceeded its time limit. The output reports the timeout as
+    LaTeX error, but unlike a LaTeX error the timeout may not recur.
+
+    :attr CompileTimeout.output: The output of PDF LaTeX (stdout, stderr)
+    :type CompileTimeout.output: tuple[bytes, bytes]
+    """
+
+    def __init__(self, output):
+        """Initializer
+
+        Initializes the exception with the output of the killed process.
+
+        :param output: The output of PDF LaTeX (stdout, stderr)
+        :type output: tuple[bytes, bytes]
+        """
+        super().__init__('The compilation exceeded its time limit')
+        self.output = output
+
+
+class CompilePool:
+    """Compile pool
+
+    Limits the number of concurrent PDF LaTeX processes and enforces a wall-clock and
+    a memory limit per compilation. Within a process, waiting compilations are served
+    first come, first served. Across processes (e.g. uwsgi workers and the background
+    worker) the limit is enforced by slot lock files, so the limit applies to the whole
+    host. The processes poll for a free slot file, so the order of arrival is only kept
+    per process, not across processes. A compilation exceeding its time limit is killed
+    and CompileTimeout is raised.
+
+    The metrics (queue depth, compile latency) are collected per process.
+
+    :attr CompilePool.poll_interval: Seconds to wait before retrying to get a host slot
+    :type CompilePool.poll_interval: float
+    :attr CompilePool.timeout_message: The error appended to the output after a timeout
+    :type CompilePool.timeout_message: str
+    """
+    poll_interval = 0.05
+    timeout_message = '! Emergency stop: the compilation exceeded the time limit of {} seconds.'
+
+    # Waiting compilations in order of arrival
+    _queue = collections.deque()
+    _condition = threading.Condition()
+    _running = 0
+    _metrics = {
+        'compilations': 0,
+        'timeouts': 0,
+        'latency_total': 0.0,
+        'latency_max': 0.0,
+        'wait_total': 0.0,
+    }
+
+    @staticmethod
+    def size():
+        """Size
+
+        Returns the maximum number of concurrent PDF LaTeX processes.
+
+        :return: the size of the pool
+        :rtype: int
+        """
+        return max(1, settings.EXPORT_POOL_SIZE)
+
+    @classmethod
+    @contextmanager
+    def _host_slot(cls):
+        """Host slot
+
+        Acquires one of the slot lock files shared by all processes of this host and
+        waits until a slot is available. The slot file stays open and locked until the
+        context is left. Nothing is locked if file locks are not supported.
+        """
+        if fcntl is None:
+            yield
+            return
+        directory = settings.EXPORT_POOL_DIR
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            for index in range(cls.size()):
+                path = os.path.join(directory, f'slot-{index}.lock')
+                # Closing the file releases the lock
+                with open(path, 'a', encoding='utf-8') as slot_file:
+                    try:
+                        fcntl.flock(slot_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except OSError:
+                        continue
+                    yield
+                    return
+            time.sleep(cls.poll_interval)
+
+    @classmethod
+    @contextmanager
+    def slot(cls):
+        """Slot
+
+        Waits for a free slot in the pool. The compilations of this process get their
+        slots in the order of their arrival, the compilations of other processes compete
+        for the host slots without order.
+        """
+        arrival = time.monotonic()
+        ticket = object()
+        with cls._condition:
+            cls._queue.append(ticket)
+            while cls._queue[0] is not ticket or cls._running >= cls.size():
+                cls._condition.wait()
+            cls._queue.popleft()
+            cls._running += 1
+            cls._condition.notify_all()
+
+        try:
+            with cls._host_slot():
+                with cls._condition:
+                    cls._metrics['wait_total'] += time.monotonic() - arrival
+                yield
+        finally:
+            with cls._condition:
+                cls._running -= 1
+                cls._condition.notify_all()
+
+    @staticmethod
+    def _limit_memory(pid):
+        """Limit memory
+
+        Limits the address space of the process with the given id.
+
+        :param pid: The process id
+        :type pid: int
+        """
+        limit = settings.EXPORT_POOL_MEMORY
+        if limit and resource is not None and hasattr(resource, 'prlimit'):
+            try:
+                resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+            except (OSError, ValueError):
+                # The process already terminated or the limit is not permitted
+                pass
+
+    @classmethod
+    def run(cls, args, tex, cwd):
+        """Run
+
+        Runs PDF LaTeX as soon as a slot is available.
+
+        :param args: The command line of PDF LaTeX
+        :type args: list[str]
+        :param tex: The LaTeX code passed to the standard input
+        :type tex: bytes
+        :param cwd: The working directory
+        :type cwd: str
+
+        :return: the output of PDF LaTeX (stdout, stderr)
+        :rtype: tuple[bytes, bytes]
+
+        :raises CompileTimeout: if the compilation exceeded the time limit
+        """
+        timeout = settings.EXPORT_POOL_TIMEOUT
+        with cls.slot():
+            start = time.monotonic()
+            process = Popen(args, stdin=PIPE, stdout=PIPE, cwd=cwd)
+            cls._limit_memory(process.pid)
+            timed_out = False
+            try:
+                pdflatex_output = process.communicate(tex, timeout=timeout)
+            except TimeoutExpired:
+                timed_out = True
+                process.kill()
+                stdout, stderr = process.communicate()
+                message = cls.timeout_message.format(timeout).encode('utf-8')
+                pdflatex_output = ((stdout or b'') + b'\n' + message + b'\n', stderr)
+            latency = time.monotonic() - start
+
+        with cls._condition:
+            cls._metrics['compilations'] += 1
+            cls._metrics['timeouts'] += int(timed_out)
+            cls._metrics['latency_total'] += latency
+            cls._metrics['latency_max'] = max(cls._metrics['latency_max'], latency)
+            queue_depth = len(cls._queue)
+        logger.info('pdflatex finished in %.2fs (timed out: %s, queue depth: %d)',
+                    latency, timed_out, queue_depth)
+        if timed_out:
+            raise CompileTimeout(pdflatex_output)
+        return pdflatex_output
+
+    @classmethod
+    def stats(cls):
+        """Statistics
+
+        Returns the metrics of the pool in this process.
+
+        :return: the metrics
+        :rtype: dict[str, Any]
+        """
+        with cls._condition:
+            metrics = dict(cls._metrics)
+            metrics['queue_depth'] = len(cls._queue)
+            metrics['running'] = cls._running
+        compilations = metrics['compilations']
+        metrics['latency_avg'] = metrics['latency_total'] / compilations if compilations else 0.0
+        metrics['size'] = cls.size()
+        return metrics
@@ -0,0 +1,173 @@
+"""Purpose of this file
+
+This file contains the precompiled preamble (format file) of the LaTeX export.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+from subprocess import run, PIPE
+
+from django.conf import settings
+
+from export.pool import CompilePool, CompileTimeout
+
+
+class Preamble:
+    """Precompiled preamble
+
+    Loading the packages of the preamble dominates the compile time of small documents.
+    The part of the rendered LaTeX code before the marker does not depend on the context,
+    so it is dumped once into a format file and every compilation starts from the format
+    instead of loading the packages again. The formats are stored next to the compile
+    cache and named by the hash of the preamble and the PDF LaTeX version, so a changed
+    template or an updated TeX distribution builds a new format automatically.
+
+    :attr Preamble.marker: The marker which ends the precompiled preamble
+    :type Preamble.marker: bytes
+    :attr Preamble.suffix: The suffix of the format files
+    :type Preamble.suffix: str
+    """
+    marker = b'%%% End of preamble'
+    suffix = '.fmt'
+
+    _lock = threading.Lock()
+    # Keys of the preambles which could not be dumped
+    _failed = set()
+    _version = None
+
+    @staticmethod
+    def directory():
+        """Directory
+
+        Returns the directory of the format files and creates it if it does not exist.
+
+        :return: the path of the format directory
+        :rtype: str
+        """
+        directory = os.path.join(settings.EXPORT_CACHE_DIR, 'formats')
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    @classmethod
+    def version(cls):
+        """Version
+
+        Returns the version information of PDF LaTeX, a format can only be loaded by
+        the version which dumped it.
+
+        :return: the version information
+        :rtype: bytes
+        """
+        if cls._version is None:
+            try:
+                cls._version = run(['pdflatex', '--version'], stdout=PIPE, check=False).stdout
+            except OSError:
+                cls._version = b''
+        return cls._version
+
+    @classmethod
+    def split(cls, tex):
+        """Split
+
+        Splits the rendered LaTeX code into the preamble and the remaining code. The
+        preamble is replaced by empty lines in the remaining code, so the line numbers in
+        the log still refer to the rendered code.
+
+        :param tex: The rendered LaTeX code
+        :type tex: bytes
+
+        :return: the preamble and the remaining code or None if there is no marker
+        :rtype: None or tuple[bytes, bytes]
+        """
+        index = tex.find(cls.marker)
+        if index == -1:
+            return None
+        preamble = tex[:index]
+        return preamble, b'\n' * preamble.count(b'\n') + tex[index:]
+
+    @classmethod
+    def format(cls, preamble):
+        """Format
+
+        Returns the format file of the preamble and builds it if it does not exist.
+
+        :param preamble: The preamble
+        :type preamble: bytes
+
+        :return: the path of the format without suffix or None if the dump failed
+        :rtype: None or str
+        """
+        key = hashlib.sha256(cls.version() + preamble).hexdigest()
+        path = os.path.join(cls.directory(), key)
+        if os.path.exists(path + cls.suffix):
+            return path
+
+        with cls._lock:
+            if key in cls._failed:
+                return None
+            # Another thread could have built the format in the meantime
+            if not os.path.exists(path + cls.suffix) and not cls.build(preamble, path):
+                cls._failed.add(key)
+                return None
+        return path
+
+    @classmethod
+    def build(cls, preamble, path):
+        """Build
+
+        Dumps the preamble into a format file.
+
+        :param preamble: The preamble
+        :type preamble: bytes
+        :param path: The path of the format without suffix
+        :type path: str
+
+        :return: True if the format was built
+        :rtype: bool
+        """
+        with tempfile.TemporaryDirectory() as tempdir:
+            with open(os.path.join(tempdir, 'preamble.tex'), 'wb') as file:
+                file.write(preamble + b'\n\\dump\n')
+            try:
+                CompilePool.run(['pdflatex', '-ini', '-interaction=batchmode',
+                                 '-jobname=preamble', '&pdflatex', 'preamble.tex'], b'', tempdir)
+            except CompileTimeout:
+                return False
+            dumped = os.path.join(tempdir, 'preamble' + cls.suffix)
+            if not os.path.exists(dumped):
+                return False
+
+            # Write to a temporary file first, so other processes never see a partial format
+            file_descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(file_descriptor, 'wb') as file, open(dumped, 'rb') as source:
+                shutil.copyfileobj(source, file)
+            os.replace(temp_path, path + cls.suffix)
+        return True
+
+    @classmethod
+    def args(cls, tex):
+        """Arguments
+
+        Returns the PDF LaTeX arguments and the LaTeX code to compile the given code,
+        starting from the precompiled preamble if possible.
+
+        :param tex: The rendered LaTeX code
+        :type tex: bytes
+
+        :return: the command line and the LaTeX code to compile
+        :rtype: tuple[list[str], bytes]
+        """
+        args = ['pdflatex']
+        if not settings.EXPORT_PRECOMPILED_PREAMBLE:
+            return args, tex
+        parts = cls.split(tex)
+        if parts is None:
+            return args, tex
+        path = cls.format(parts[0])
+        if path is None:
+            return args, tex
+        return args + [f'-fmt={path}'], parts[1]
@@ -19,6 +19,32 @@ import content
 
 register = template.Library()
 
+# Replacements for left character with right character
+TEX_REPLACEMENTS = {
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\^{}',
+    '\\': r'\textbackslash{}',
+    '<': r'\textless{}',
+    '>': r'\textgreater{}',
+    '\n': r'\newline '
+}
+
+# Compiled once into a pattern object
+TEX_ESCAPE_PATTERN = re.compile(
+    # Concatenate the escaped characters to one string
+    '|'.join(
+        # Escape special characters in pattern
+        re.escape(key) for key in TEX_REPLACEMENTS
+    )
+)
+
 
 @register.filter
 def export_template(content_type):
@@ -80,29 +106,4 @@ def tex_escape(value):
     :return: the escaped LaTeX code
     :rtype: str
     """
-    # Replacements for left character with right character
-    replacements = {
-        '&': r'\&',
-        '%': r'\%',
-        '$': r'\$',
-        '#': r'\#',
-        '_': r'\_',
-        '{': r'\{',
-        '}': r'\}',
-        '~': r'\textasciitilde{}',
-        '^': r'\^{}',
-        '\\': r'\textbackslash{}',
-        '<': r'\textless{}',
-        '>': r'\textgreater{}',
-        '\n': r'\newline '
-    }
-
-    # Compile into pattern objects
-    regex = re.compile(
-        # Concatenate the escaped characters to one string
-        '|'.join(
-            # Escape special characters in pattern
-            re.escape(key) for key in replacements
-        )
-    )
-    return regex.sub(lambda match: replacements[match.group()], value)
+    return TEX_ESCAPE_PATTERN.sub(lambda match: TEX_REPLACEMENTS[match.group()], value)
@@ -3,95 +3,261 @@
 This file contains functions related to generating views.
 """
 
-from django.http import HttpResponse
-from django.shortcuts import render
+import re
 
-from base.models import Course, Favorite, Content
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse, FileResponse, \
+    HttpResponseNotModified, StreamingHttpResponse
+from django.shortcuts import render, get_object_or_404
+from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
 
+from base.models import Course
+
+from export.cache import CompileCache
 from export.helper_functions import Latex
+from export.models import ExportJob
+from export.pool import CompilePool
 
+# A single byte range, e.g. 'bytes=0-499', 'bytes=500-' or 'bytes=-500'
+RANGE_PATTERN = re.compile(r'^bytes=(\d*)-(\d*)$')
 
 
-def pdf_compile(request, pk, exp_all,  # pylint: disable=invalid-name
-                        template="content/export/base.tex",
-                        context=None):
-    """Generate course book
+@login_required
+def queue_export(request, pk, exp_all, file_name=None):  # pylint: disable=invalid-name
+    """Queue export
 
-    Generates a PDF file with name tags for students in the queryset. There is also
-    a flag which indicates if the whole core or only the coursebook should be
-    exported.
+    Queues the export of the course or the coursebook as PDF and redirects to the
+    page showing the progress of the export. The PDF is compiled in the background
+    by the worker process. If the user already waits for the same export, the
+    existing job will be reused unless it is stale.
 
     :param request: The given request
     :type request: WSGIRequest
     :param pk: The primary key of the course
     :type pk: int
-    :param exp_all: Indicator if the whole course (T) or the coursebook (F)should b eexported
+    :param exp_all: Indicator if the whole course (T) or the coursebook (F) should be exported
     :type exp_all: bool
-    :param template: The path of the LaTeX template to use
-    :type template: str
-    :param context: The context of the content
-    :type context: dict[str, Any]
+    :param file_name: The name of the file
+    :type file_name: str
 
-    :return: the generated coursebook as PDF, PDF LaTeX output and as an rendered template
-    :rtype: tuple[bytes, tuple[bytes, bytes], str]
+    :return: the redirection to the page of the export job
+    :rtype: HttpResponseRedirect
     """
+    course = get_object_or_404(Course, pk=pk)
+    profile = request.user.profile
 
-    if context is None:
-        context = {}
-    user = request.user
-    course = Course.objects.get(pk=pk)
-
-    # Set Context
-    context['user'] = user
-    context['course'] = course
-    context['export_pdf'] = True
-    context['contents'] = []
-
-    # Check if we want to export the whole course or only the coursebook
-    if exp_all:
-        for topic in course.topics.all():
-            contents = list(Content.objects.filter(topic=topic))
-            for content in contents:
-                context['contents'].append(content)
-    else:
-        context['contents'] = [
-            favorite.content
-            for favorite in
-            Favorite.objects.filter(user=user.profile, course=course)
-        ]
+    # If we have no file name, name the file after the course title
+    if not file_name:
+        file_name = f"{course.title}"
 
-    # Perform compilation given context and template
-    (pdf, pdflatex_output, tex_template) = Latex.render(context, template, [])
-    return pdf, pdflatex_output, tex_template
+    job = ExportJob.active().filter(course=course, user=profile, exp_all=exp_all).first()
+    if job is None:
+        job = ExportJob.objects.create(course=course, user=profile, exp_all=exp_all,
+                                       file_name=str(file_name))
+    return HttpResponseRedirect(reverse('frontend:export-job', args=(course.pk, job.pk)))
 
 
-def generate_coursebook_response(request, pk, exp_all, file_name = None):  # pylint: disable=invalid-name
-    """Generate coursebook response
+def get_export_job(request, pk, job_id):  # pylint: disable=invalid-name
+    """Get export job
 
-    Generates a PDF file with name tags for students in the queryset and sends it to the browser.
-    This method generates a pdf file for the course content
+    Returns the export job of the course which belongs to the user of the request.
 
     :param request: The given request
     :type request: WSGIRequest
     :param pk: The primary key of the course
     :type pk: int
-    :param exp_all: Indicator if the whole course (T) or the coursebook (F) should be exported
-    :type exp_all: bool
-    :param file_name: The name of the file
-    :type file_name: str
+    :param job_id: The primary key of the export job
+    :type job_id: int
+
+    :return: the export job
+    :rtype: ExportJob
+    """
+    return get_object_or_404(ExportJob, pk=job_id, course_id=pk, user=request.user.profile)
+
 
-    :return: the http response of the generated PDF file
+@login_required
+def export_job(request, pk, job_id):  # pylint: disable=invalid-name
+    """Export job
+
+    Displays the progress of the export job.
+
+    :param request: The given request
+    :type request: WSGIRequest
+    :param pk: The primary key of the course
+    :type pk: int
+    :param job_id: The primary key of the export job
+    :type job_id: int
+
+    :return: the http response of the progress page
     :rtype: HttpResponse
     """
+    job = get_export_job(request, pk, job_id)
+    return render(request, "frontend/coursebook/export.html", {"job": job, "course": job.course})
+
+
+@login_required
+def export_job_status(request, pk, job_id):  # pylint: disable=invalid-name
+    """Export job status
+
+    Returns the status and the progress of the export job as json. The errors of a
+    failed compilation are listed with their lines and contents.
+
+    :param request: The given request
+    :type request: WSGIRequest
+    :param pk: The primary key of the course
+    :type pk: int
+    :param job_id: The primary key of the export job
+    :type job_id: int
+
+    :return: the json response with the status of the job
+    :rtype: JsonResponse
+    """
+    job = get_export_job(request, pk, job_id)
+    data = {'status': job.status, 'progress': job.progress, 'finished': job.finished,
+            'download_url': None, 'errors': []}
+    if job.finished:
+        data['download_url'] = reverse('frontend:export-job-download', args=(pk, job.pk))
+    if job.log:
+        data['errors'] = [error._asdict() for error in
+                          Latex.parse_errors(job.log.encode('utf-8'), job.tex.encode('utf-8'))]
+    return JsonResponse(data=data)
+
+
+@user_passes_test(lambda user: user.is_superuser)
+def export_metrics(request):
+    """Export metrics
+
+    Returns the metrics of the compile pool and the compile cache of the current
+    process as json.
+
+    :param request: The given request
+    :type request: WSGIRequest
+
+    :return: the json response with the metrics
+    :rtype: JsonResponse
+    """
+    return JsonResponse(data={'pool': CompilePool.stats(), 'cache': CompileCache.stats()})
+
+
+@login_required
+def export_job_download(request, pk, job_id):  # pylint: disable=invalid-name
+    """Export job download
+
+    Sends the exported PDF to the browser. If the compilation failed, the rendering
+    error will be shown instead. If the job is not finished yet, the user will be
+    redirected to the progress page.
+
+    :param request: The given request
+    :type request: WSGIRequest
+    :param pk: The primary key of the course
+    :type pk: int
+    :param job_id: The primary key of the export job
+    :type job_id: int
+
+    :return: the http response of the exported PDF
+    :rtype: HttpResponse
+    """
+    job = get_export_job(request, pk, job_id)
+    if not job.finished:
+        return HttpResponseRedirect(reverse('frontend:export-job', args=(pk, job.pk)))
+    if job.status == ExportJob.FAILED or not job.pdf:
+        return write_response(request, None, ((job.log or job.error).encode("utf-8"), b''),
+                              job.tex.encode("utf-8"), job.file_name + ".pdf")
+    # The PDF of a job never changes
+    etag = f'{job.pk}-{job.end_date.timestamp():.0f}'
+    return stream_response(request, job.pdf.open('rb'), job.file_name + ".pdf", etag)
 
-    # If we have no file name, name the file after the course title
-    if not file_name:
-        course = Course.objects.get(pk=pk)
-        file_name = f"{course.title}"
 
-    # Call the method for pdf compilation and write the output afterwards
-    (pdf, pdflatex_output, tex_template) = pdf_compile(request, pk, exp_all)
-    return write_response(request, pdf, pdflatex_output, tex_template, file_name + ".pdf")
+def stream_response(request, file, filename, etag, content_type='application/pdf'):
+    """Stream response
+
+    Streams the given file to the browser without reading it into memory. The response
+    supports conditional requests by the given entity tag and single byte ranges, so
+    interrupted downloads can be resumed.
+
+    :param request: The given request
+    :type request: WSGIRequest
+    :param file: The opened file
+    :type file: File
+    :param filename: The name of the file
+    :type filename: str
+    :param etag: The entity tag of the file, changes whenever the file changes
+    :type etag: str
+    :param content_type: The type of the content (file)
+    :type content_type: str
+
+    :return: the http response of the streamed file
+    :rtype: HttpResponseBase
+    """
+    etag = quote_etag(etag)
+    if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+        file.close()
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    size = file.size
+    start, end = 0, size - 1
+    partial = False
+    if_range = request.META.get('HTTP_IF_RANGE')
+    match = RANGE_PATTERN.match(request.META.get('HTTP_RANGE', '').strip())
+    # Invalid or multiple ranges are ignored and the whole file is sent
+    if match is not None and any(match.groups()) and if_range in (None, etag):
+        first, last = match.groups()
+        if first == '':
+            # Suffix range, e.g. the last 500 bytes
+            start = max(0, size - int(last))
+        else:
+            start = int(first)
+            end = min(int(last), end) if last else end
+        if start > end:
+            file.close()
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        partial = True
+
+    if partial:
+        file.seek(start)
+        response = StreamingHttpResponse(read_chunks(file, end - start + 1), status=206,
+                                         content_type=content_type)
+        response['Content-Length'] = end - start + 1
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    else:
+        response = FileResponse(file, as_attachment=True, filename=filename,
+                                content_type=content_type)
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    return response
+
+
+def read_chunks(file, length, chunk_size=FileResponse.block_size):
+    """Read chunks
+
+    Reads the given number of bytes from the current position of the file in chunks
+    and closes the file afterwards.
+
+    :param file: The opened file
+    :type file: File
+    :param length: The number of bytes to read
+    :type length: int
+    :param chunk_size: The maximum size of a chunk
+    :type chunk_size: int
+
+    :return: the chunks
+    :rtype: Iterator[bytes]
+    """
+    try:
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
 
 
 def write_response(request, pdf, pdflatex_output, tex_template, filename,
@@ -120,41 +286,9 @@ def write_response(request, pdf, pdflatex_output, tex_template, filename,
         return render(request,
                       "frontend/coursebook/rendering-error.html",
                       {"content": pdflatex_output[0].decode("utf-8"),
+                       "errors": Latex.parse_errors(pdflatex_output[0], tex_template),
                        "tex_template": tex_template.decode("utf-8")})
     response = HttpResponse(content_type=content_type)
     response['Content-Disposition'] = 'attachment; filename=' + filename
     response.write(pdf)
     return response
-
-
-def generate_pdf_from_latex(user, content, template="content/export/base.tex", context=None):
-    """Generate PDF
-
-    Generates a PDF file with name tags for students in the queryset.
-    This method is used to compile a specific latex content into a PDF.
-
-    :param user: The user of the content
-    :type user: User
-    :param content: The content of the PDF
-    :type content: Content
-    :param template: The path of the LaTeX template to use
-    :type template: str
-    :param context: The context of the content
-    :type context: dict[str, Any]
-
-    return: the generated PDF
-    rtype: bytes
-    """
-    if context is None:
-        context = {}
-
-    # Set Context
-    context['user'] = user
-    context['topic'] = content.topic
-    context['contents'] = [content]
-    context['export_pdf'] = False
-
-    # Performs compilation given context and template
-    # pdf = pdf, pdflatex_output, tex_template
-    pdf = Latex.render(context, template, [])
-    return pdf[0]
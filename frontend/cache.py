@@ -0,0 +1,236 @@
+"""Purpose of this file
+
+This file contains the versions of the cached fragments of the course page.
+"""
+
+import uuid
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from base.models import Content, CourseStructureEntry, Favorite, Rating, Topic
+
+
+class PageCache:
+    """Page cache
+
+    The topic sections and the coursebook of the course page are cached as template
+    fragments (see the cache tag in frontend/course/view.html). The key of a fragment
+    contains the versions of everything it displays, so a fragment is invalidated by
+    replacing a version instead of searching the fragments. The versions are stored in
+    the same cache as the fragments; a missing version, e.g. after an eviction, gets a new
+    random value, so an old fragment can never be reused.
+
+    The versions are replaced by the signal receivers below:
+
+    - the version of a topic if the topic, one of its contents or a rating of one of its
+      contents changes
+    - the version of the structure of a course if an entry of the structure or one of its
+      topics changes
+    - the version of the coursebook of a user if a favorite or a favored content changes
+
+    :attr PageCache.prefix: The prefix of the keys of the versions
+    :type PageCache.prefix: str
+    """
+    prefix = 'course-page-version'
+
+    @classmethod
+    def topic_key(cls, topic_id):
+        """Topic key
+
+        Returns the key of the version of a topic.
+
+        :param topic_id: The id of the topic
+        :type topic_id: int
+
+        :return: the key of the version
+        :rtype: str
+        """
+        return f'{cls.prefix}:topic:{topic_id}'
+
+    @classmethod
+    def structure_key(cls, course_id):
+        """Structure key
+
+        Returns the key of the version of the structure of a course.
+
+        :param course_id: The id of the course
+        :type course_id: int
+
+        :return: the key of the version
+        :rtype: str
+        """
+        return f'{cls.prefix}:structure:{course_id}'
+
+    @classmethod
+    def coursebook_key(cls, profile_id, course_id):
+        """Coursebook key
+
+        Returns the key of the version of the coursebook of a user.
+
+        :param profile_id: The id of the profile of the user
+        :type profile_id: int
+        :param course_id: The id of the course
+        :type course_id: int
+
+        :return: the key of the version
+        :rtype: str
+        """
+        return f'{cls.prefix}:coursebook:{profile_id}:{course_id}'
+
+    @staticmethod
+    def versions(keys):
+        """Versions
+
+        Returns the versions of the given keys with a single cache request and creates
+        the missing versions.
+
+        :param keys: The keys of the versions
+        :type keys: list[str]
+
+        :return: the versions by their keys
+        :rtype: dict[str, str]
+        """
+        versions = cache.get_many(keys)
+        missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+        if missing:
+            cache.set_many(missing, timeout=None)
+            versions.update(missing)
+        return versions
+
+    @staticmethod
+    def invalidate(keys):
+        """Invalidate
+
+        Invalidates the fragments which contain one of the given versions.
+
+        :param keys: The keys of the versions
+        :type keys: list[str]
+        """
+        cache.delete_many(keys)
+
+    @classmethod
+    def invalidate_content(cls, content_id, topic_id):
+        """Invalidate content
+
+        Invalidates the fragments which display the given content: the section of its
+        topic and the coursebooks which contain it.
+
+        :param content_id: The id of the content
+        :type content_id: int
+        :param topic_id: The id of the topic of the content
+        :type topic_id: int
+        """
+        favorites = Favorite.objects.filter(content_id=content_id).values_list('user_id',
+                                                                               'course_id')
+        cls.invalidate([cls.topic_key(topic_id)]
+                       + [cls.coursebook_key(profile_id, course_id)
+                          for profile_id, course_id in favorites])
+
+
+@receiver(post_save, sender=Topic)
+def invalidate_topic(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate topic
+
+    Invalidates the section of a changed topic and the structures which contain it.
+
+    :param sender: The model of the topic
+    :type sender: type
+    :param instance: The changed topic
+    :type instance: Topic
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    course_ids = CourseStructureEntry.objects.filter(topic_id=instance.pk) \
+        .values_list('course_id', flat=True).distinct()
+    PageCache.invalidate([PageCache.topic_key(instance.pk)]
+                         + [PageCache.structure_key(course_id) for course_id in course_ids])
+
+
+@receiver(post_delete, sender=Topic)
+def invalidate_deleted_topic(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate deleted topic
+
+    Invalidates the section of a deleted topic. Its structure entries are deleted by
+    the cascade before and invalidate their structures themselves.
+
+    :param sender: The model of the topic
+    :type sender: type
+    :param instance: The deleted topic
+    :type instance: Topic
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    PageCache.invalidate([PageCache.topic_key(instance.pk)])
+
+
+@receiver(post_save, sender=Content)
+@receiver(post_delete, sender=Content)
+def invalidate_content(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate content
+
+    Invalidates the fragments of a changed content.
+
+    :param sender: The model of the content
+    :type sender: type
+    :param instance: The changed content
+    :type instance: Content
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    PageCache.invalidate_content(instance.pk, instance.topic_id)
+
+
+@receiver(post_save, sender=Rating)
+@receiver(post_delete, sender=Rating)
+def invalidate_rating(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate rating
+
+    Invalidates the fragments of the content of a changed rating.
+
+    :param sender: The model of the rating
+    :type sender: type
+    :param instance: The changed rating
+    :type instance: Rating
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    topic_id = Content.objects.filter(pk=instance.content_id) \
+        .values_list('topic_id', flat=True).first()
+    if topic_id is not None:
+        PageCache.invalidate_content(instance.content_id, topic_id)
+
+
+@receiver(post_save, sender=CourseStructureEntry)
+@receiver(post_delete, sender=CourseStructureEntry)
+def invalidate_structure(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate structure
+
+    Invalidates the sections of a course whose structure changed.
+
+    :param sender: The model of the structure entry
+    :type sender: type
+    :param instance: The changed structure entry
+    :type instance: CourseStructureEntry
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    PageCache.invalidate([PageCache.structure_key(instance.course_id)])
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def invalidate_favorite(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Invalidate favorite
+
+    Invalidates the coursebook of a user whose favorites changed.
+
+    :param sender: The model of the favorite
+    :type sender: type
+    :param instance: The changed favorite
+    :type instance: Favorite
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    PageCache.invalidate([PageCache.coursebook_key(instance.user_id, instance.course_id)])
@@ -0,0 +1,162 @@
+"""Purpose of this file
+
+This file contains the duplication of courses.
+"""
+
+from django.db import transaction
+
+from base.models import Content, CourseStructureEntry, Topic
+
+from content.attachment.models import ImageAttachment
+from content.models import CONTENT_TYPES
+
+from frontend.cache import PageCache
+
+from search.autocomplete import autocomplete_index
+from search.documents import Documents
+from search.models import SearchDocument
+
+
+class CourseDuplicator:
+    """Course duplicator
+
+    Duplicates the structure of a course and optionally its topics with their contents,
+    the models of the content types, the tags and the image attachments. Every model is
+    copied with one bulk insert in one transaction, so the number of queries does not
+    depend on the size of the course.
+
+    The files of the copies (PDFs, images and previews) are shared by reference. A file is
+    never changed in place: an upload or a compilation always stores a new file, so the
+    copy and the original diverge as soon as one of them is edited (copy-on-write).
+
+    Bulk inserts do not send signals, the versions of the course page are replaced and
+    the copies are added to the search index explicitly.
+    """
+
+    @staticmethod
+    def clone(instance, **kwargs):
+        """Clone
+
+        Returns an unsaved copy of the given instance without its primary key.
+
+        :param instance: The instance to copy
+        :type instance: Model
+        :param kwargs: The fields to override
+        :type kwargs: Any
+
+        :return: the copy
+        :rtype: Model
+        """
+        fields = {field.attname: getattr(instance, field.attname)
+                  for field in instance._meta.concrete_fields
+                  if not field.primary_key}
+        fields.update(kwargs)
+        return type(instance)(**fields)
+
+    @staticmethod
+    def bulk_create(model, objects):
+        """Bulk create
+
+        Inserts the objects with a single bulk insert and sets their primary keys.
+
+        :param model: The model of the objects
+        :type model: type[Model]
+        :param objects: The objects to insert
+        :type objects: list[Model]
+
+        :return: the inserted objects
+        :rtype: list[Model]
+        """
+        objects = model.objects.bulk_create(objects)
+        if objects and objects[0].pk is None:
+            # The backend does not return the keys (e.g. SQLite). The insert holds the
+            # write lock until the transaction ends, so the newest rows are ours.
+            pks = model.objects.order_by('-pk').values_list('pk', flat=True)[:len(objects)]
+            for obj, pk in zip(objects, reversed(list(pks))):
+                obj.pk = pk
+        return objects
+
+    @classmethod
+    def count_contents(cls, course):
+        """Count contents
+
+        Returns the number of contents which are copied with the topics of the course.
+
+        :param course: The course
+        :type course: Course
+
+        :return: the number of contents
+        :rtype: int
+        """
+        topic_ids = CourseStructureEntry.objects.filter(course=course).values('topic_id')
+        return Content.objects.filter(topic_id__in=topic_ids).count()
+
+    @classmethod
+    def copy_topics(cls, topic_ids):
+        """Copy topics
+
+        Copies the topics with their contents.
+
+        :param topic_ids: The ids of the topics
+        :type topic_ids: set[int]
+
+        :return: the ids of the copies by the ids of the topics
+        :rtype: dict[int, int]
+        """
+        topics = list(Topic.objects.filter(pk__in=topic_ids).order_by('pk'))
+        copies = cls.bulk_create(Topic, [cls.clone(topic) for topic in topics])
+        topic_map = {topic.pk: copy.pk for topic, copy in zip(topics, copies)}
+
+        contents = list(Content.objects.filter(topic_id__in=topic_map).order_by('pk'))
+        copies = cls.bulk_create(Content, [
+            cls.clone(content, topic_id=topic_map[content.topic_id],
+                      rating_sum=0, rating_count=0, rating_average=-1)
+            for content in contents])
+        content_map = {content.pk: copy.pk for content, copy in zip(contents, copies)}
+
+        # The models of the content types use the content as primary key
+        for model in CONTENT_TYPES.values():
+            model.objects.bulk_create(
+                cls.clone(obj, content_id=content_map[obj.content_id])
+                for obj in model.objects.filter(content_id__in=content_map))
+        ImageAttachment.objects.bulk_create(
+            cls.clone(attachment, content_id=content_map[attachment.content_id])
+            for attachment in ImageAttachment.objects.filter(content_id__in=content_map)
+            .order_by('pk'))
+        through = Content.tags.through
+        through.objects.bulk_create(
+            through(content_id=content_map[content_id], tag_id=tag_id)
+            for content_id, tag_id in through.objects.filter(content_id__in=content_map)
+            .values_list('content_id', 'tag_id'))
+
+        SearchDocument.index(Documents.TOPIC, topic_map.values())
+        SearchDocument.index(Documents.CONTENT, content_map.values())
+        autocomplete_index.invalidate()
+        return topic_map
+
+    @classmethod
+    def duplicate(cls, source, target, copy_contents=False):
+        """Duplicate
+
+        Copies the structure of the source course to the target course. If the contents
+        are copied, the structure refers to copies of the topics, otherwise both courses
+        share the topics and their contents.
+
+        :param source: The course to duplicate
+        :type source: Course
+        :param target: The course which receives the copy
+        :type target: Course
+        :param copy_contents: Whether the topics and contents are copied
+        :type copy_contents: bool
+        """
+        with transaction.atomic():
+            entries = list(CourseStructureEntry.objects.filter(course=source)
+                           .order_by('position', 'sub_position'))
+            topic_map = {}
+            if copy_contents:
+                topic_map = cls.copy_topics({entry.topic_id for entry in entries})
+            CourseStructureEntry.objects.bulk_create(
+                cls.clone(entry, course_id=target.pk,
+                          topic_id=topic_map.get(entry.topic_id, entry.topic_id))
+                for entry in entries)
+        PageCache.invalidate([PageCache.structure_key(target.pk)])
@@ -4,7 +4,7 @@ Marks this directory as Python package directories. This package contains
 frontend forms related operation.
 """
 
-from .course import AddCourseForm, EditCourseForm, FilterAndSortForm
+from .course import AddCourseForm, DuplicateCourseForm, EditCourseForm, FilterAndSortForm
 
 from .content import AddContentForm, EditContentForm, TranslateForm
 
@@ -45,6 +45,20 @@ class AddCourseForm(forms.ModelForm):
         self.fields["owners"].widget.attrs = {'class': 'chosen-select'}
 
 
+class DuplicateCourseForm(AddCourseForm):
+    """Duplicate course form
+
+    This model represents the form for duplicating a course.
+
+    :attr DuplicateCourseForm.copy_contents: Indicator if the topics and contents are copied
+    :type DuplicateCourseForm.copy_contents: BooleanField
+    """
+    copy_contents = forms.BooleanField(label=_("Copy contents"),
+                                       help_text=_("Copy the topics and their contents instead "
+                                                   "of sharing them with the original course"),
+                                       required=False)
+
+
 class EditCourseForm(HistoryForm):
     """Edit course form
 
@@ -0,0 +1,116 @@
+"""Purpose of this file
+
+This file contains the loader of the course page.
+"""
+
+from functools import lru_cache, partial
+
+from django.db.models import Count
+
+from base.models import Content, CourseStructureEntry, Favorite
+
+from frontend.cache import PageCache
+
+
+class CourseLoader:
+    """Course loader
+
+    Loads the structure of a course and the contents of its topics with everything the
+    content cards access: the topic, the author, the tags and the models of the image and
+    YouTube video cards. The ratings and the previews are stored in the content itself.
+    The number of queries does not depend on the number of topics or contents.
+
+    The contents are loaded on the first access, so they are not loaded at all if every
+    section of the course page is cached.
+    """
+
+    @staticmethod
+    def queryset():
+        """Query set
+
+        Returns the query set of the contents which joins the models displayed in the
+        content cards and prefetches the tags.
+
+        :return: the query set of the contents
+        :rtype: ContentQuerySet
+        """
+        # Only the image and YouTube video cards access their type specific model
+        return Content.objects.select_related('topic', 'author', 'imagecontent', 'ytvideocontent') \
+            .prefetch_related('tags')
+
+    @staticmethod
+    def structure(course, sorted_by, filtered_by):
+        """Structure
+
+        Returns the topics of the course with their subtopics, their sorted and filtered
+        contents and the version of their cached section. Only one level of subtopics is
+        handled.
+
+        :param course: The course to load
+        :type course: Course
+        :param sorted_by: The sorting value which the contents should be sorted
+        :type sorted_by: str
+        :param filtered_by: The filtered value which the contents should be filtered
+        :type filtered_by: str
+
+        :return: the topics of the course
+        :rtype: list[dict[str, Any]]
+        """
+        entries = list(CourseStructureEntry.objects.filter(course=course)
+                       .select_related('topic')
+                       .annotate(content_count=Count('topic__contents'))
+                       .order_by('position', 'sub_position'))
+        topic_ids = {entry.topic_id for entry in entries}
+
+        @lru_cache(maxsize=None)
+        def contents_by_topic():
+            # Loads the contents of all topics once, on the first call
+            contents = {}
+            for content in CourseLoader.queryset().filter(topic_id__in=topic_ids) \
+                    .filtered_by(filtered_by).sorted_by(sorted_by):
+                contents.setdefault(content.topic_id, []).append(content)
+            return contents
+
+        def topic_contents(topic_id):
+            return contents_by_topic().get(topic_id, [])
+
+        structure_key = PageCache.structure_key(course.pk)
+        versions = PageCache.versions([structure_key]
+                                      + [PageCache.topic_key(topic_id) for topic_id in topic_ids])
+
+        topics = []
+        for entry in entries:
+            topic = {'topic': entry.topic,
+                     'content_count': entry.content_count,
+                     # Called by the template only if the section is not cached
+                     'topic_contents': partial(topic_contents, entry.topic_id)}
+            version = versions[PageCache.topic_key(entry.topic_id)]
+            # Topic
+            if entry.sub_position == 0:
+                topic['subtopics'] = []
+                topic['version'] = versions[structure_key] + version
+                topics.append(topic)
+            # Subtopic, the section of the topic contains its subtopics
+            else:
+                topics[-1]['subtopics'].append(topic)
+                topics[-1]['version'] += version
+        return topics
+
+    @staticmethod
+    def coursebook(profile, course):
+        """Coursebook
+
+        Returns the contents the user marked as favorite in the course.
+
+        :param profile: The profile of the user
+        :type profile: Profile
+        :param course: The course
+        :type course: Course
+
+        :return: the favorite contents of the user
+        :rtype: list[Content]
+        """
+        content_ids = list(Favorite.objects.filter(user=profile, course=course)
+                           .order_by('pk').values_list('content_id', flat=True))
+        contents = CourseLoader.queryset().in_bulk(content_ids)
+        return [contents[content_id] for content_id in content_ids if content_id in contents]
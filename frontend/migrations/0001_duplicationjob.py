@@ -0,0 +1,38 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('base', '0019_structure_position'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progress')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('creation_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation Date')),
+                ('start_date', models.DateTimeField(blank=True, null=True, verbose_name='Start Date')),
+                ('end_date', models.DateTimeField(blank=True, null=True, verbose_name='End Date')),
+                ('copy_contents', models.BooleanField(default=True, verbose_name='Copy contents')),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplication_jobs', to='base.Course', verbose_name='Course')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='base.Course', verbose_name='Source')),
+            ],
+            options={
+                'verbose_name': 'Duplication Job',
+                'verbose_name_plural': 'Duplication Jobs',
+                'ordering': ['creation_date'],
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+"""Purpose of this file
+
+This file describes the background jobs of the frontend and registers the signal receivers
+of the frontend, which invalidate the cached fragments of the course page.
+"""
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from base.models import Course, Job
+
+import frontend.cache  # noqa: F401 pylint: disable=unused-import
+from frontend.duplicator import CourseDuplicator
+
+
+class DuplicationJob(Job):
+    """Duplication job
+
+    This model represents the duplication of a large course with its contents. The course
+    is created by the web process, the structure and the contents are copied in the
+    background by the worker process.
+
+    :attr DuplicationJob.source: The course to duplicate
+    :type DuplicationJob.source: ForeignKey - Course
+    :attr DuplicationJob.course: The course which receives the copy
+    :type DuplicationJob.course: ForeignKey - Course
+    :attr DuplicationJob.copy_contents: Indicator if the topics and contents are copied
+    :type DuplicationJob.copy_contents: BooleanField
+    """
+    source = models.ForeignKey(Course,
+                               verbose_name=_("Source"),
+                               on_delete=models.CASCADE,
+                               related_name='+')
+    course = models.ForeignKey(Course,
+                               verbose_name=_("Course"),
+                               on_delete=models.CASCADE,
+                               related_name='duplication_jobs')
+    copy_contents = models.BooleanField(verbose_name=_("Copy contents"),
+                                        default=True)
+
+    class Meta(Job.Meta):
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        """
+        verbose_name = _("Duplication Job")
+        verbose_name_plural = _("Duplication Jobs")
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.course_id} ({self.status})"
+
+    def run(self):
+        """Run
+
+        Copies the structure and the contents of the source course.
+        """
+        CourseDuplicator.duplicate(self.source, self.course, self.copy_contents)
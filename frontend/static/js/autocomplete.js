@@ -0,0 +1,52 @@
+/**
+ * Shows the suggestions of the search autocompletion below the search field of the navbar.
+ * The suggestions are requested on every input, a pending request is aborted by the next input.
+ * The search field needs the url of the suggestions in its attribute data-url and the id of the
+ * dropdown menu of the suggestions in its attribute data-menu.
+ *
+ * @param input the search field
+ */
+function searchAutocomplete(input) {
+    const menu = $('#' + input.data('menu'));
+    let controller = null;
+
+    input.on('input', function () {
+        if (controller !== null) {
+            controller.abort();
+        }
+        const query = input.val();
+        if (!query.trim()) {
+            menu.removeClass('show').empty();
+            return;
+        }
+        controller = new AbortController();
+        fetch(input.data('url') + '?' + new URLSearchParams({q: query}), {signal: controller.signal})
+            .then(response => response.json())
+            .then(function (data) {
+                menu.empty();
+                data.suggestions.forEach(function (suggestion) {
+                    const item = $('<a class="dropdown-item"></a>').attr('href', suggestion.url);
+                    item.append($('<span class="badge badge-secondary mr-1"></span>').text(suggestion.label));
+                    item.append(document.createTextNode(suggestion.title));
+                    menu.append(item);
+                });
+                menu.toggleClass('show', data.suggestions.length > 0);
+            })
+            .catch(function () {
+                // Aborted by the next input
+            });
+    });
+
+    // Hide the suggestions after a click on a suggestion was handled
+    input.on('blur', function () {
+        setTimeout(function () {
+            menu.removeClass('show');
+        }, 200);
+    });
+}
+
+$(document).ready(function () {
+    $('[data-autocomplete]').each(function () {
+        searchAutocomplete($(this));
+    });
+});
@@ -8,12 +8,12 @@ import re
 from django import template
 from django.conf import settings
 
-from base.models import Favorite
-
 from collab_coursebook.settings import ALLOW_PUBLIC_COURSE_EDITING_BY_EVERYONE
 
 from content.models import CONTENT_TYPES
 
+from frontend.loader import CourseLoader
+
 register = template.Library()
 
 
@@ -64,7 +64,7 @@ def count_content(topic_queryset):
     """
     count = 0
     for topic in topic_queryset:
-        count += len(topic.get_contents("None", "None"))
+        count += topic.get_contents("None", "None").count()
     return str(count)
 
 
@@ -229,9 +229,7 @@ def get_coursebook(user, course):
     :return: the coursebook
     :rtype: list[Content]
     """
-    favorites = Favorite.objects.filter(user=user.profile, course=course)
-    coursebook = [favorite.content for favorite in favorites]
-    return coursebook
+    return CourseLoader.coursebook(user.profile, course)
 
 
 def js_escape(value):
@@ -9,7 +9,8 @@ from django.utils.translation import gettext_lazy as _
 
 from content.models import CONTENT_TYPES
 
-from export.views import generate_coursebook_response
+from export.views import queue_export, export_job, export_job_status, export_job_download, \
+    export_metrics
 
 from frontend import views
 
@@ -26,9 +27,15 @@ urlpatterns = [
     path('search/',
          views.search.SearchView.as_view(),
          name='search'),
+    path('search/autocomplete.json',
+         views.search.search_autocomplete,
+         name='search-autocomplete'),
     path('tutorial/',
          views.TutorialView.as_view(),
          name='tutorial'),
+    path('export/metrics/',
+         export_metrics,
+         name='export-metrics'),
     path('profile/<int:pk>/', include([
         path('',
              views.ProfileView.as_view(),
@@ -65,13 +72,24 @@ urlpatterns = [
                  views.CourseDeleteView.as_view(),
                  name='course-delete'),
             path('coursebook/',
-                 generate_coursebook_response,
+                 queue_export,
                  {'exp_all': False, 'file_name': _('Coursebook')},
                  name='coursebook-generate'),
             path('export/',
-                 generate_coursebook_response,
+                 queue_export,
                  {'exp_all': True},
                  name='export-course'),
+            path('export/<int:job_id>/', include([
+                path('',
+                     export_job,
+                     name='export-job'),
+                path('status/',
+                     export_job_status,
+                     name='export-job-status'),
+                path('download/',
+                     export_job_download,
+                     name='export-job-download'),
+            ])),
         ])),
         path('<int:course_id>/topic/<int:topic_id>/content/', include([
 
@@ -19,7 +19,7 @@ from base.utils import get_user
 from content.attachment.forms import ImageAttachmentFormSet
 from content.attachment.models import ImageAttachment, IMAGE_ATTACHMENT_TYPES
 from content.forms import CONTENT_TYPE_FORMS
-from content.models import CONTENT_TYPES
+from content.models import CONTENT_TYPES, PreviewJob
 
 from frontend.forms.comment import CommentForm
 from frontend.forms.content import AddContentForm, EditContentForm, TranslateForm
@@ -236,10 +236,8 @@ class AddContentView(SuccessMessageMixin, LoginRequiredMixin, CreateView):
                                          content,
                                          content_type_data)
 
-            # Generates preview image in 'uploads/contents/'
-            preview = CONTENT_TYPES.get(content_type).objects.get(pk=content.pk).generate_preview()
-            content.preview.name = preview
-            content.save()
+            # Renders the preview image in the background
+            PreviewJob.enqueue(content)
 
             # Redirects to content
             course_id = self.kwargs['course_id']
@@ -441,11 +439,8 @@ class EditContentView(LoginRequiredMixin, UpdateView):
                                              content,
                                              content_type_data)
 
-                # Generates preview image in 'uploads/contents/'
-                preview = CONTENT_TYPES.get(content_type) \
-                    .objects.get(pk=content.pk).generate_preview()
-                content.preview.name = preview
-                content.save()
+                # Renders the preview image in the background
+                PreviewJob.enqueue(content)
 
                 messages.add_message(self.request, messages.SUCCESS, _("Content updated"))
                 return HttpResponseRedirect(self.get_success_url())
@@ -549,6 +544,10 @@ class ContentView(DetailView):
         """
         context = super().get_context_data(**kwargs)
         context['search_result'] = self.request.GET.get('q')
+        # The page of a PDF found by the search
+        page = self.request.GET.get('page', '')
+        if page.isdigit():
+            context['pdf_page'] = int(page)
         content = self.get_object()
         context['user'] = self.request.user
         context['count'] = content.get_rate_count()
@@ -5,11 +5,14 @@ This file describes the frontend views related to course.
 
 import json
 
+from django.conf import settings
 from django.contrib.auth import get_user
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.contrib import messages
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.forms import model_to_dict
 from django.http import HttpResponseRedirect, JsonResponse, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy, reverse
@@ -17,11 +20,15 @@ from django.views.generic import DetailView
 from django.views.generic.edit import FormMixin, CreateView, DeleteView, UpdateView
 from django.utils.translation import gettext_lazy as _
 
-from base.models import Course, CourseStructureEntry, Topic
+from base.models import Course, Topic
 from base.utils import check_owner_permission
 
-from frontend.forms import AddCourseForm, EditCourseForm, FilterAndSortForm
+from frontend.cache import PageCache
+from frontend.duplicator import CourseDuplicator
+from frontend.forms import AddCourseForm, DuplicateCourseForm, EditCourseForm, FilterAndSortForm
 from frontend.forms.course import TopicChooseForm, CreateTopicForm
+from frontend.loader import CourseLoader
+from frontend.models import DuplicationJob
 
 from frontend.views.history import Reversion
 from frontend.views.json import JsonHandler
@@ -30,7 +37,8 @@ from frontend.views.json import JsonHandler
 class DuplicateCourseView(SuccessMessageMixin, LoginRequiredMixin, CreateView):
     """Duplicate course view
 
-    Duplicates a course.
+    Duplicates a course. The structure is copied immediately, the contents of a large
+    course are copied in the background (see DuplicationJob).
 
     :attr DuplicateCourseView.model: The model of the view
     :type DuplicateCourseView.model: Model
@@ -40,12 +48,33 @@ class DuplicateCourseView(SuccessMessageMixin, LoginRequiredMixin, CreateView):
     :type DuplicateCourseView.form_class: Form
     :attr DuplicateCourseView.success_url: Redirection of a successful url
     :type DuplicateCourseView.success_url: __proxy__
+    :attr DuplicateCourseView.source: The duplicated course
+    :type DuplicateCourseView.source: None or Course
+    :attr DuplicateCourseView.job: The job copying the contents in the background
+    :type DuplicateCourseView.job: None or DuplicationJob
     """
     model = Course
     template_name = 'frontend/course/duplicate.html'
-    form_class = AddCourseForm
+    form_class = DuplicateCourseForm
     success_url = reverse_lazy('frontend:dashboard')
 
+    def setup(self, request, *args, **kwargs):
+        """Setup
+
+        Initializes the attributes of the view, the duplicated course and the job are set
+        once the form is valid.
+
+        :param request: The given request
+        :type request: WSGIRequest
+        :param args: The arguments
+        :type args: Any
+        :param kwargs: The keyword arguments
+        :type kwargs: Any
+        """
+        super().setup(request, *args, **kwargs)
+        self.source = None
+        self.job = None
+
     def get_success_message(self, cleaned_data):
         """Success message
 
@@ -57,50 +86,50 @@ class DuplicateCourseView(SuccessMessageMixin, LoginRequiredMixin, CreateView):
         :return: the success message
         :rtype: __proxy__
         """
-        original_course = Course.objects.get(pk=self.get_object().id)
-        message = _("Course %(title1)s successfully created. "
-                    "All settings and contents of the course %(title)s were copied.") \
-                  % {'title1': cleaned_data['title'], 'title': original_course.title}
-        return message
+        if self.job is not None:
+            return _("Course %(title1)s successfully created. "
+                     "The contents of the course %(title)s are copied in the background.") \
+                   % {'title1': cleaned_data['title'], 'title': self.source.title}
+        return _("Course %(title1)s successfully created. "
+                 "All settings and contents of the course %(title)s were copied.") \
+               % {'title1': cleaned_data['title'], 'title': self.source.title}
 
     def get_initial(self):
         """Initial
 
-        Returns the current user to the initial of the owner field.
+        Returns the fields of the course to duplicate and the current user as owner.
 
         :return: the initial data
         :rtype: dict[str, Any]
         """
-        course_to_duplicate = Course.objects.get(pk=self.get_object().id)
-        data = course_to_duplicate.__dict__
-        # Set data not included in the dict
-        data['owners'] = get_user(self.request)
-        data['image'] = course_to_duplicate.image
-        # This data has the wrong key
-        data['category'] = course_to_duplicate.category
-        data['period'] = course_to_duplicate.period
+        data = model_to_dict(self.get_object(), fields=self.form_class.Meta.fields)
+        data['owners'] = [get_user(self.request).profile]
         return data
 
     def form_valid(self, form):
         """Form validation
 
-        Saves the filters and sorting from the form.
+        Creates the course and copies the structure and, if requested, the contents of
+        the duplicated course. If the course contains more contents than
+        COURSE_DUPLICATION_SYNC_LIMIT, the copy is left to the worker process.
 
-        :param form: The form that contains the filter and the sorting
-        :type form: FilterAndSortForm
+        :param form: The form that contains the data of the new course
+        :type form: DuplicateCourseForm
 
-        :return: itself rendered to a response
-        :rtype: HttpResponse
+        :return: the redirection to the success url
+        :rtype: HttpResponseRedirect
         """
-        duplicated_course = form.save()
-        original_course = Course.objects.get(pk=self.get_object().id)
-        course_structure_entries = CourseStructureEntry.objects.filter(course=original_course)
-        # Duplicates the course structure entries
-        for entry in course_structure_entries:
-            entry.pk = None
-            entry.course = duplicated_course
-            entry.save()
-        return super().form_valid(form)
+        self.source = self.get_object()
+        copy_contents = form.cleaned_data['copy_contents']
+        with transaction.atomic():
+            self.object = form.save()
+            if copy_contents and CourseDuplicator.count_contents(self.source) \
+                    > settings.COURSE_DUPLICATION_SYNC_LIMIT:
+                self.job = DuplicationJob.objects.create(source=self.source, course=self.object)
+            else:
+                CourseDuplicator.duplicate(self.source, self.object, copy_contents)
+        messages.success(self.request, self.get_success_message(form.cleaned_data))
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class AddCourseView(SuccessMessageMixin, LoginRequiredMixin, CreateView):
@@ -243,8 +272,7 @@ class EditCourseStructureView(DetailView, FormMixin):
         """
         context = super().get_context_data(**kwargs)
         # Json object representing the topics of this course structure
-        json_obj = JsonHandler.topics_structure_to_json(self.object)
-        context['structure'] = json.dumps(json_obj)
+        context['structure'] = JsonHandler.cached_topics_structure_json(self.object)
         context['topics'] = TopicChooseForm
         return context
 
@@ -371,11 +399,6 @@ class CourseView(DetailView, FormMixin):
                 if check:
                     JsonHandler.json_to_topics_structure(self.object, json_obj)
 
-            # Clean unused topics
-            ids = request.POST.getlist('ids[]')
-            if ids:
-                JsonHandler.clean_topics(ids)
-
             if not check:
                 return HttpResponseBadRequest()
             return HttpResponse()
@@ -410,30 +433,16 @@ class CourseView(DetailView, FormMixin):
         :rtype: dict[str, Any]
         """
         context = super().get_context_data(**kwargs)
-        structure_entries = CourseStructureEntry. \
-            objects.filter(course=context["course"]).order_by('index')
-
-        topics_recursive = []
-        current_topic = None
-        for entry in structure_entries:
-            index_split = entry.index.split('/')
-            # Topic
-            if len(index_split) == 1:
-                current_topic = {'topic': entry.topic, 'subtopics': [],
-                                 'topic_contents': entry.topic.get_contents(self.sorted_by,
-                                                                            self.filtered_by)}
-                topics_recursive.append(current_topic)
-            # Subtopic
-            # Only handle up to one subtopic level
-            else:
-                current_topic["subtopics"].append({'topic': entry.topic,
-                                                   'topic_contents':
-                                                       entry.topic.
-                                                  get_contents(self.sorted_by, self.filtered_by)})
-
-        context["structure"] = topics_recursive
+        context["structure"] = CourseLoader.structure(context["course"],
+                                                      self.sorted_by, self.filtered_by)
         context['isCurrentUserOwner'] = self.request.user.profile in context['course'].owners.all()
 
+        # Versions of the cached fragments
+        context['cache_timeout'] = settings.COURSE_PAGE_CACHE_TIMEOUT
+        coursebook_key = PageCache.coursebook_key(self.request.user.profile.pk,
+                                                  context['course'].pk)
+        context['coursebook_version'] = PageCache.versions([coursebook_key])[coursebook_key]
+
         if self.sorted_by is not None:
             context['sorting'] = self.sorted_by
         if self.filtered_by is not None:
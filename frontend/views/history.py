@@ -25,9 +25,9 @@ from reversion_compare.views import HistoryCompareDetailView
 from base.models import Course, Content, Topic
 
 from content.attachment.models import ImageAttachment
-from content.models import ImageContent, TextField, YTVideoContent, PDFContent, Latex, CONTENT_TYPES
+from content.models import ImageContent, TextField, YTVideoContent, PDFContent, Latex, PreviewJob
 
-from export.views import generate_pdf_from_latex
+from export.compiler import generate_pdf_from_latex
 
 
 class Reversion:
@@ -327,6 +327,10 @@ class BaseContentHistoryCompareView(BaseHistoryCompareView):
                         deserialized_obj.object.author_id = content.author_id
                         deserialized_obj.object.topic_id = content.topic_id
                         deserialized_obj.object.type = content.type
+                        # The ratings are not reverted, so keep their aggregates
+                        deserialized_obj.object.rating_sum = content.rating_sum
+                        deserialized_obj.object.rating_count = content.rating_count
+                        deserialized_obj.object.rating_average = content.rating_average
                     elif isinstance(deserialized_obj.object, Latex):
                         deserialized_obj.object.save()
                         topic = Topic.objects.get(pk=topic_id)
@@ -337,10 +341,7 @@ class BaseContentHistoryCompareView(BaseHistoryCompareView):
                         deserialized_obj.object.content_id = pk
                     deserialized_obj.save()
 
-            content = Content.objects.get(pk=pk)
-            content.preview = CONTENT_TYPES.get(content.type) \
-                .objects.get(pk=content.pk).generate_preview()
-            content.save()
+            PreviewJob.enqueue(Content.objects.get(pk=pk))
 
         return HttpResponseRedirect(reverse_lazy(
             'frontend:content',
@@ -3,10 +3,17 @@
 This file describes the json handling on resources needed for frontend views.
 """
 
+import json
+
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.db import transaction
 
 from base.models import CourseStructureEntry, Topic
 
+from frontend.cache import PageCache
+
 
 class JsonHandler:
     """Json handler
@@ -14,13 +21,34 @@ class JsonHandler:
     This class handles all json related operations related to frontend views.
     """
 
+    @staticmethod
+    def topic_id(json_topic):
+        """Topic id
+
+        Returns the id of a topic from the json data.
+
+        :param json_topic: The json data of the topic
+        :type json_topic: Any
+
+        :return: the id of the topic
+        :rtype: int
+        :raises ValidationError: if the json data is not a topic
+        """
+        if not isinstance(json_topic, dict) or not isinstance(json_topic.get('id'), int) \
+                or isinstance(json_topic['id'], bool):
+            raise ValidationError(f'Invalid topic {json_topic!r}')
+        return json_topic['id']
+
     @staticmethod
     def validate_topics(json_data):
         """Validate topics from json data
 
-        Checks if the topics from the json data exists in the database. If the topics
-        are not valid, that means topics does not exists in the course structure, a
-        validation error will be thrown.
+        Checks if the json data is a valid structure and if its topics exists in the
+        database. The structure must be a list of topics, each with optional sub topics
+        which can not contain further sub topics. The structure is checked before the
+        database is queried, the existence of all topics is checked with a single query.
+        If the topics are not valid, a validation error listing all invalid topics
+        will be thrown.
 
         :param json_data: The json data containing topics and sub topics
         :type json_data: list[dict[str, Any]]
@@ -28,23 +56,37 @@ class JsonHandler:
         :return: None if all topics in the json data exists
         :rtype: None or ValidationError
         """
+        if not isinstance(json_data, list):
+            raise ValidationError('The structure must be a list of topics')
+        topic_ids = set()
         # Main topics
         for topic in json_data:
-            if not Topic.objects.filter(id=topic['id']).exists():
-                raise ValidationError(f'The topic with the id {topic["id"]} does not exist')
+            topic_ids.add(JsonHandler.topic_id(topic))
+            sub_topics = topic.get('children', [])
+            if not isinstance(sub_topics, list):
+                raise ValidationError(f'Invalid sub topics of the topic {topic["id"]}')
             # Sub topics
-            if 'children' in topic:
-                for sub_topic in topic['children']:
-                    if not Topic.objects.filter(id=sub_topic['id']).exists():
-                        raise ValidationError(
-                            f'The sub topic with the id {sub_topic["id"]} does not exist')
+            for sub_topic in sub_topics:
+                topic_ids.add(JsonHandler.topic_id(sub_topic))
+                # Only one level of sub topics is supported
+                if sub_topic.get('children'):
+                    raise ValidationError(
+                        f'The sub topic with the id {sub_topic["id"]} can not contain sub topics')
+
+        missing = topic_ids.difference(Topic.objects.filter(id__in=topic_ids)
+                                       .values_list('id', flat=True))
+        if missing:
+            raise ValidationError([f'The topic with the id {topic_id} does not exist'
+                                   for topic_id in sorted(missing)])
 
     @staticmethod
     def json_to_topics_structure(course, json_data):
         """Json to topic structure
 
         Creates a course structure from the json data and override the current stored
-        entries in the database.
+        entries in the database. The new structure is compared with the stored entries,
+        only the changed entries are written with a constant number of queries in a single
+        transaction.
 
         Example json data:
 
@@ -58,55 +100,52 @@ class JsonHandler:
         :return: true if the structure was changed after its call
         :rtype: bool
         """
-        course_id = course.id
-        index = 0
-        # Main topics
-        for topic in json_data:
-            index += 1
-            current_id = topic['id']
-            current_index = f'{index}'
-            current_topic = CourseStructureEntry.objects.filter(
-                index=current_index,
-                course_id=course_id)
-            # Updates the entry in the data base if it exists, else we create a new entry
-            if current_topic.exists():
-                current_topic.update(topic_id=current_id)
-            else:
-                CourseStructureEntry.objects.create(
-                    index=current_index,
-                    course_id=course_id,
-                    topic_id=current_id)
+        # Positions of the new structure: (position, sub position) -> topic id
+        structure = {}
+        for index, topic in enumerate(json_data, start=1):
+            structure[(index, 0)] = topic['id']
             # Sub topics
-            sub_index = 0
-            if 'children' in topic:
-                for sub_topic in topic['children']:
-                    sub_index += 1
-                    current_id = sub_topic['id']
-                    current_index = f'{index}/{sub_index}'
-                    current_topic = CourseStructureEntry.objects.filter(
-                        index=current_index,
-                        course_id=course_id)
-                    # Updates the entry in the data base if it exists, else we create a new entry
-                    if current_topic.exists():
-                        current_topic.update(topic_id=current_id)
-                    else:
-                        CourseStructureEntry.objects.create(
-                            index=current_index,
-                            course_id=course_id,
-                            topic_id=current_id)
-            # Clean sub topic fragments
-            JsonHandler.clean_structure_sub_topic(course=course,
-                                                  index=index,
-                                                  sub_index=sub_index + 1)
-        # Clean topic fragments
-        JsonHandler.clean_structure_topic(course=course, index=index + 1)
-        return True
+            for sub_index, sub_topic in enumerate(topic.get('children', []), start=1):
+                structure[(index, sub_index)] = sub_topic['id']
+
+        with transaction.atomic():
+            entries = {(entry.position, entry.sub_position): entry
+                       for entry in CourseStructureEntry.objects.select_for_update()
+                       .filter(course=course).order_by('pk')}
+            # Updates the entries in the data base if they exist, else we create new entries
+            created = []
+            updated = []
+            for (position, sub_position), topic_id in structure.items():
+                entry = entries.get((position, sub_position))
+                if entry is None:
+                    created.append(CourseStructureEntry(course=course,
+                                                        position=position,
+                                                        sub_position=sub_position,
+                                                        topic_id=topic_id))
+                elif entry.topic_id != topic_id:
+                    entry.topic_id = topic_id
+                    updated.append(entry)
+            # Clean topic and sub topic fragments
+            removed = [entry.pk for key, entry in entries.items() if key not in structure]
+
+            CourseStructureEntry.objects.bulk_create(created)
+            CourseStructureEntry.objects.bulk_update(updated, ['topic'])
+            if removed:
+                CourseStructureEntry.objects.filter(pk__in=removed).delete()
+
+        changed = bool(created or updated or removed)
+        if changed:
+            # Bulk operations do not send the signals which invalidate the course page
+            PageCache.invalidate([PageCache.structure_key(course.pk)])
+        return changed
 
     @staticmethod
     def topics_structure_to_json(course):
         """Topic structure to json
 
         Creates a json object representing the structure of the course from the given course.
+        The entries of the structure are loaded with their topics in a single ordered query
+        and assembled in one pass, so a topic can also occur multiple times in the course.
 
         :param course: The course object of the structure
         :type course: Course
@@ -114,37 +153,42 @@ class JsonHandler:
         :return: a json object of the topic structure
         :rtype: List[Optional[Dict[str, Union[int, list]]]]
         """
+        entries = CourseStructureEntry.objects.filter(course=course) \
+            .select_related('topic__category') \
+            .order_by('position', 'sub_position')
         # Generates json object representing the structure of the model
         json_obj = []
-        # Saves last main topic to append its children later
-        last_main_topic = None
-        for topic in course.get_sorted_topic_list():
-            # Course structure
-            structure = CourseStructureEntry.objects.get(topic=topic, course=course)
-            # Possible sub topic
-            structure_index = structure.index.split('/')
-
-            topic_json = {'value': topic.__str__(), 'id': topic.id}
-
-            if len(structure_index) == 1:
-                # Appends the first main topic
-                if last_main_topic is not None:
-                    json_obj.append(last_main_topic)
-                # Checks if a main topic has sub topics
-                if CourseStructureEntry.objects.filter(
-                        course=course,
-                        index__startswith=str(structure_index[0])).count() > 1:
-                    topic_json['children'] = []
-                last_main_topic = topic_json
+        for entry in entries:
+            topic_json = {'value': entry.topic.__str__(), 'id': entry.topic_id}
+            # Sub topics are appended to the children of the last main topic
+            if entry.sub_position > 0 and json_obj:
+                json_obj[-1].setdefault('children', []).append(topic_json)
             else:
-                last_main_topic['children'].append(topic_json)
-
-        # Appends the first topic: 'if last_main_topic is not None' does not get
-        # called if there is only one main topic
-        if last_main_topic is not None:
-            json_obj.append(last_main_topic)
+                json_obj.append(topic_json)
         return json_obj
 
+    @staticmethod
+    def cached_topics_structure_json(course):
+        """Cached topic structure json
+
+        Returns the serialized json object of the structure of the course. The json is
+        cached until the structure of the course or one of its topics changes.
+
+        :param course: The course object of the structure
+        :type course: Course
+
+        :return: the serialized json object of the topic structure
+        :rtype: str
+        """
+        structure_key = PageCache.structure_key(course.pk)
+        version = PageCache.versions([structure_key])[structure_key]
+        key = f'course-structure-json:{course.pk}:{version}'
+        data = cache.get(key)
+        if data is None:
+            data = json.dumps(JsonHandler.topics_structure_to_json(course))
+            cache.set(key, data, settings.COURSE_PAGE_CACHE_TIMEOUT)
+        return data
+
     @staticmethod
     def clean_structure_topic(course, index):
         """Clean structure topic
@@ -158,15 +202,8 @@ class JsonHandler:
         :param index: The index where we start to clean
         :type index: int
         """
-        course_id = course.id
-        topic = CourseStructureEntry.objects.filter(index=f'{index}',
-                                                    course_id=course_id)
-        while topic.exists():
-            topic.delete()
-            JsonHandler.clean_structure_sub_topic(course=course, index=index, sub_index=1)
-            index += 1
-            topic = CourseStructureEntry.objects.filter(index=f'{index}',
-                                                        course_id=course_id)
+        CourseStructureEntry.objects.filter(course_id=course.id,
+                                            position__gte=index).delete()
 
     @staticmethod
     def clean_structure_sub_topic(course, index, sub_index):
@@ -183,21 +220,6 @@ class JsonHandler:
         :param sub_index: The sub index where we start
         :type sub_index: int
         """
-        course_id = course.id
-        topic = CourseStructureEntry.objects.filter(index=f'{index}/{sub_index}',
-                                                    course_id=course_id)
-        while topic.exists():
-            topic.delete()
-            sub_index += 1
-            topic = CourseStructureEntry.objects.filter(index=f'{index}/{sub_index}',
-                                                        course_id=course_id)
-
-    @staticmethod
-    def clean_topics(ids):
-        """Clean topics
-
-        Cleans the topics if they were not used in the course structure.
-        """
-        for topic_id in ids:
-            if not CourseStructureEntry.objects.filter(topic_id=topic_id).exists():
-                Topic.objects.filter(pk=topic_id).delete()
+        CourseStructureEntry.objects.filter(course_id=course.id,
+                                            position=index,
+                                            sub_position__gte=sub_index).delete()
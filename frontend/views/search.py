@@ -3,42 +3,111 @@
 This file describes the frontend views related to search.
 """
 
+from urllib.parse import urlencode
+
+from django.http import Http404, JsonResponse
 from django.views.generic import ListView
+from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.urls import reverse
+from django.utils.translation import gettext_lazy as _
+
+from base.models import Content, CourseStructureEntry
 
-from base.models import Course, CourseStructureEntry
+from search.autocomplete import autocomplete_index
+from search.backends import get_backend
+from search.documents import Documents
 
 
 class SearchView(ListView, LoginRequiredMixin):  # pylint: disable=too-many-ancestors
     """Search view
 
-    This model represents the search for course and topic titles.
+    This model represents the full text search for courses, topics and contents. The
+    results are ranked by the search backend and paginated with cursors, so every page
+    costs the same constant number of queries: the results of the page, their estimated
+    number, their contents and the courses of their topics.
 
-    :attr SearchView.model: The model of the view
-    :type SearchView.model: Model
     :attr SearchView.template_name: The path to the html template
     :type SearchView.template_name: str
     :attr SearchView.context_object_name: The context object name
     :type SearchView.context_object_name: str
+    :attr SearchView.paginate_by: The number of results per page
+    :type SearchView.paginate_by: int
     """
-    model = Course
     template_name = 'frontend/search.html'
-    context_object_name = 'search_data'
+    context_object_name = 'search_results'
+    paginate_by = 20
 
     def get_queryset(self):
         """Query set
 
-        Returns the query set of the search.
+        Returns the lazy results of the search, only the displayed page is fetched.
+
+        :return: The results of the search
+        :rtype: SearchResults
+        """
+        return get_backend().search(self.request.GET.get('q', ''))
+
+    def paginate_queryset(self, queryset, page_size):
+        """Paginate query set
 
-        :return: The query set of the search
-        :rtype: dict[str, QuerySet[CourseStructureEntry]]
+        Fetches the page of the cursor in the parameter cursor.
+
+        :param queryset: The results of the search
+        :type queryset: SearchResults
+        :param page_size: The number of results per page
+        :type page_size: int
+
+        :return: the paginator, the page, its results and whether there are other pages
+        :rtype: tuple[None, SearchPage, list[SearchResult], bool]
+
+        :raises Http404: if the cursor is invalid
         """
-        query = self.request.GET.get('q')
-        query = query.strip().lower()
-        courses = Course.objects.filter(title__icontains=query)
-        course_structure_entries = \
-            CourseStructureEntry.objects.filter(topic__title__icontains=query)
-        return {'courses': courses, 'course_structure_entries': course_structure_entries}
+        try:
+            page = queryset.page(self.request.GET.get('cursor'), page_size)
+        except ValueError as error:
+            raise Http404(str(error)) from error
+        return None, page, page.object_list, page.has_other_pages()
+
+    @staticmethod
+    def link(results):
+        """Link
+
+        Sets the url and the course of the results. Topics and contents are linked to the
+        first course which contains their topic, pages of PDFs to the page of the PDF of
+        their content.
+
+        :param results: The results of the displayed page
+        :type results: list[SearchResult]
+        """
+        ids = {kind: [result.object_id for result in results if result.kind == kind]
+               for kind in (Documents.TOPIC, Documents.CONTENT, Documents.PAGE)}
+        content_topics = dict(Content.objects
+                              .filter(pk__in=ids[Documents.CONTENT] + ids[Documents.PAGE])
+                              .values_list('pk', 'topic_id'))
+        courses = {}
+        for entry in CourseStructureEntry.objects \
+                .filter(topic_id__in=ids[Documents.TOPIC] + list(content_topics.values())) \
+                .select_related('course').order_by('course_id'):
+            courses.setdefault(entry.topic_id, entry.course)
+
+        for result in results:
+            result.url = None
+            result.course = None
+            if result.kind == Documents.COURSE:
+                result.url = reverse('frontend:course', args=(result.object_id,))
+            elif result.kind == Documents.TOPIC:
+                result.course = courses.get(result.object_id)
+                if result.course is not None:
+                    result.url = reverse('frontend:course', args=(result.course.pk,))
+            elif result.object_id in content_topics:
+                topic_id = content_topics[result.object_id]
+                result.course = courses.get(topic_id)
+                if result.course is not None:
+                    result.url = reverse('frontend:content',
+                                         args=(result.course.pk, topic_id, result.object_id))
+                    if result.kind == Documents.PAGE:
+                        result.url += f'?page={result.page}'
 
     def get_context_data(self, *, object_list=None, **kwargs):
         """Context data
@@ -55,5 +124,34 @@ class SearchView(ListView, LoginRequiredMixin):  # pylint: disable=too-many-ance
         :rtype: dict[str, Any]
         """
         context = super().get_context_data(**kwargs)
-        context['search_query'] = self.request.GET.get('q')
+        self.link(context['search_results'])
+        context['search_query'] = self.request.GET.get('q', '')
+        context['search_count'], context['search_count_exact'] = self.object_list.estimate()
         return context
+
+
+@login_required
+def search_autocomplete(request):
+    """Search autocomplete
+
+    Returns the suggestions for the query in the parameter q as json object. The
+    suggestions are answered by the in-memory prefix index without a database query, so
+    the navbar can ask for them while typing. Courses are linked to their page, topics and
+    tags to the search for their title.
+
+    :param request: The given request
+    :type request: HttpRequest
+
+    :return: the json object of the suggestions
+    :rtype: JsonResponse
+    """
+    labels = {'course': _('Course'), 'topic': _('Topic'), 'tag': _('Tag')}
+    suggestions = []
+    for kind, object_id, title in autocomplete_index.search(request.GET.get('q', ''), 10):
+        if kind == 'course':
+            url = reverse('frontend:course', args=(object_id,))
+        else:
+            url = reverse('frontend:search') + '?' + urlencode({'q': title})
+        suggestions.append({'kind': kind, 'label': str(labels[kind]), 'title': title,
+                            'url': url})
+    return JsonResponse({'suggestions': suggestions})
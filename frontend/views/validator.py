@@ -5,7 +5,7 @@ This file describes the validators needed for the views.
 
 from django.core.files.base import ContentFile
 
-from export.views import generate_pdf_from_latex
+from export.compiler import generate_pdf_from_latex
 
 
 class Validator:
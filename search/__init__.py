@@ -0,0 +1,5 @@
+"""Purpose of this file
+
+Marks this directory as Python package directories. This package contains
+search related operation.
+"""
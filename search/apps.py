@@ -0,0 +1,17 @@
+"""Purpose of this file
+
+This file configures the application.
+"""
+
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    """ Search configuration
+
+    Configures the pluggable application for the search.
+
+    :attr SearchConfig.name: Defines which application the configuration applies to
+    :type SearchConfig.name: str
+    """
+    name = 'search'
@@ -0,0 +1,304 @@
+"""Purpose of this file
+
+This file contains the in-memory prefix index of the autocompletion of the search.
+"""
+
+import threading
+import time
+
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.core.cache import cache
+
+from base.models import Course, Tag, Topic
+
+
+class AutocompleteIndex:
+    """Autocomplete index
+
+    This class represents a prefix index over the titles of the courses, topics and tags,
+    which answers the autocompletion without a database query. The index is a sorted list
+    of keys: every title is stored once for every word it contains, starting with this
+    word, so a query matches the beginning of any word of a title. The keys starting with
+    a query are found with a binary search.
+
+    The index of a process is shared by its threads and changed incrementally by the
+    signal receivers (see search/models.py). The changes are numbered by a version in the
+    cache and stored in the cache as well, so the other processes apply them at their next
+    query. If a change is missing, e.g. after an eviction or if more than sync_limit
+    changes happened since the last query, the index is rebuilt. The index is also rebuilt
+    after SEARCH_AUTOCOMPLETE_MAX_AGE seconds, in case of concurrent changes of several
+    processes or changes which were rolled back.
+
+    :attr AutocompleteIndex.models: The indexed models by their kinds
+    :type AutocompleteIndex.models: dict[str, type[Model]]
+    :attr AutocompleteIndex.version_key: The key of the version in the cache
+    :type AutocompleteIndex.version_key: str
+    :attr AutocompleteIndex.sync_limit: The maximum number of changes of other processes
+    which are applied instead of rebuilding the index
+    :type AutocompleteIndex.sync_limit: int
+    """
+    models = {
+        'course': Course,
+        'topic': Topic,
+        'tag': Tag,
+    }
+    version_key = 'search-autocomplete-version'
+    sync_limit = 100
+
+    def __init__(self):
+        """Initializer
+
+        Initializes an empty index which is built at the first query.
+        """
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._keys = None
+        self._entries = {}
+        self._version = None
+        self._build_time = 0.0
+
+    @staticmethod
+    def normalize(text):
+        """Normalize
+
+        Returns the words of the text in lower case, separated by single spaces.
+
+        :param text: The text
+        :type text: str
+
+        :return: the normalized text
+        :rtype: str
+        """
+        return ' '.join(text.lower().split())
+
+    @classmethod
+    def keys(cls, title):
+        """Keys
+
+        Returns the keys of a title, one for every word of the title.
+
+        :param title: The title
+        :type title: str
+
+        :return: the keys
+        :rtype: list[str]
+        """
+        words = cls.normalize(title).split(' ')
+        return list({' '.join(words[index:]) for index in range(len(words)) if words[index]})
+
+    def rebuild(self):
+        """Rebuild
+
+        Rebuilds the index from the database.
+        """
+        version = cache.get(self.version_key)
+        keys, entries = [], {}
+        for kind, model in self.models.items():
+            for object_id, title in model.objects.values_list('pk', 'title'):
+                entries[kind, object_id] = title
+                keys += [(key, kind, object_id) for key in self.keys(title)]
+        keys.sort()
+        with self._lock:
+            self._keys, self._entries = keys, entries
+            self._version = version
+            self._build_time = time.monotonic()
+
+    @classmethod
+    def change_key(cls, version):
+        """Change key
+
+        Returns the key of the change of the given version in the cache.
+
+        :param version: The version of the change
+        :type version: int
+
+        :return: the key of the change
+        :rtype: str
+        """
+        return f'{cls.version_key}:{version}'
+
+    def _bump_version(self):
+        """Bump version
+
+        Increments the version in the cache.
+
+        :return: the new version
+        :rtype: int
+        """
+        try:
+            return cache.incr(self.version_key)
+        except ValueError:
+            # The version is missing, e.g. after an eviction
+            cache.set(self.version_key, 0, None)
+            return 0
+
+    def _set(self, kind, object_id, title):
+        """Set
+
+        Replaces the keys of an object.
+
+        :param kind: The kind of the object
+        :type kind: str
+        :param object_id: The id of the object
+        :type object_id: int
+        :param title: The title of the object, None to remove the object
+        :type title: None or str
+        """
+        old_title = self._entries.pop((kind, object_id), None)
+        if old_title is not None:
+            for key in self.keys(old_title):
+                index = bisect_left(self._keys, (key, kind, object_id))
+                if index < len(self._keys) and self._keys[index] == (key, kind, object_id):
+                    del self._keys[index]
+        if title is not None:
+            self._entries[kind, object_id] = title
+            for key in self.keys(title):
+                insort(self._keys, (key, kind, object_id))
+
+    def _change(self, kind, object_id, title):
+        """Change
+
+        Applies a change of this process and publishes it for the other processes.
+
+        :param kind: The kind of the object
+        :type kind: str
+        :param object_id: The id of the object
+        :type object_id: int
+        :param title: The title of the object, None to remove the object
+        :type title: None or str
+        """
+        with self._lock:
+            version = self._bump_version()
+            cache.set(self.change_key(version), (kind, object_id, title),
+                      settings.SEARCH_AUTOCOMPLETE_MAX_AGE)
+            if self._keys is not None and self._version is not None \
+                    and version == self._version + 1:
+                self._set(kind, object_id, title)
+                self._version = version
+
+    def update(self, kind, object_id, title):
+        """Update
+
+        Adds or replaces the title of an object.
+
+        :param kind: The kind of the object
+        :type kind: str
+        :param object_id: The id of the object
+        :type object_id: int
+        :param title: The title of the object
+        :type title: str
+        """
+        self._change(kind, object_id, title)
+
+    def remove(self, kind, object_id):
+        """Remove
+
+        Removes the title of an object.
+
+        :param kind: The kind of the object
+        :type kind: str
+        :param object_id: The id of the object
+        :type object_id: int
+        """
+        self._change(kind, object_id, None)
+
+    def invalidate(self):
+        """Invalidate
+
+        Rebuilds the indexes of all processes at their next query, e.g. after objects
+        were created without signals.
+        """
+        with self._lock:
+            self._bump_version()
+
+    def _expired(self):
+        """Expired
+
+        Returns true if the index was not built yet or is older than
+        SEARCH_AUTOCOMPLETE_MAX_AGE seconds.
+
+        :return: true if the index must be rebuilt
+        :rtype: bool
+        """
+        return self._keys is None \
+            or time.monotonic() - self._build_time >= settings.SEARCH_AUTOCOMPLETE_MAX_AGE
+
+    def _apply_changes(self, version):
+        """Apply changes
+
+        Applies the changes of the other processes up to the given version.
+
+        :param version: The current version in the cache
+        :type version: None or int
+
+        :return: true if the index is current afterwards
+        :rtype: bool
+        """
+        if version == self._version:
+            return True
+        if self._version is None or version is None \
+                or not 0 < version - self._version <= self.sync_limit:
+            return False
+        keys = [self.change_key(change) for change in range(self._version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return False
+        for key in keys:
+            self._set(*changes[key])
+        self._version = version
+        return True
+
+    def sync(self):
+        """Sync
+
+        Applies the changes of the other processes or rebuilds the index if they are
+        unknown or the index is too old.
+        """
+        with self._lock:
+            if not self._expired() and self._apply_changes(cache.get(self.version_key)):
+                return
+        with self._build_lock:
+            # Another thread may have rebuilt the index in the meantime
+            with self._lock:
+                if not self._expired() and self._apply_changes(cache.get(self.version_key)):
+                    return
+            self.rebuild()
+
+    def search(self, query, limit):
+        """Search
+
+        Returns the objects with a word in their title starting with the query, ordered
+        by the matched part of their titles. Objects of the same kind with the same title,
+        e.g. the topics of a duplicated course, are returned once.
+
+        :param query: The query
+        :type query: str
+        :param limit: The maximum number of results
+        :type limit: int
+
+        :return: the kinds, ids and titles of the objects
+        :rtype: list[tuple[str, int, str]]
+        """
+        prefix = self.normalize(query)
+        if not prefix:
+            return []
+        self.sync()
+        results, found = [], set()
+        with self._lock:
+            index = bisect_left(self._keys, (prefix,))
+            while len(results) < limit and index < len(self._keys):
+                key, kind, object_id = self._keys[index]
+                if not key.startswith(prefix):
+                    break
+                title = self._entries[kind, object_id]
+                if (kind, title.lower()) not in found:
+                    found.add((kind, title.lower()))
+                    results.append((kind, object_id, title))
+                index += 1
+        return results
+
+
+# The index of this process
+autocomplete_index = AutocompleteIndex()
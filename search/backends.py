@@ -0,0 +1,821 @@
+"""Purpose of this file
+
+This file contains the backends of the search index.
+"""
+
+import base64
+import json
+import re
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.module_loading import import_string
+from django.utils.safestring import mark_safe
+
+from search.models import SearchDocument
+
+
+class SearchResult:
+    """Search result
+
+    This class represents a document which matches a search query.
+
+    :attr SearchResult.kind: The kind of the found object
+    :type SearchResult.kind: str
+    :attr SearchResult.object_id: The id of the found object
+    :type SearchResult.object_id: int
+    :attr SearchResult.title: The title of the found object
+    :type SearchResult.title: str
+    :attr SearchResult.snippet: The escaped text around the matches, marked with <mark>
+    :type SearchResult.snippet: SafeString
+    :attr SearchResult.page: The number of the found page of a PDF, 0 for other objects
+    :type SearchResult.page: int
+    :attr SearchResult.key: The sort key of the result in the order of the backend
+    :type SearchResult.key: None or tuple
+    """
+
+    def __init__(self, kind, object_id, title, snippet, page=0, key=None):
+        """Initializer
+
+        Initializes the result.
+
+        :param kind: The kind of the found object
+        :type kind: str
+        :param object_id: The id of the found object
+        :type object_id: int
+        :param title: The title of the found object
+        :type title: str
+        :param snippet: The escaped text around the matches
+        :type snippet: SafeString
+        :param page: The number of the found page of a PDF
+        :type page: int
+        :param key: The sort key of the result
+        :type key: None or tuple
+        """
+        self.kind = kind
+        self.object_id = object_id
+        self.title = title
+        self.snippet = snippet
+        self.page = page
+        self.key = key
+
+    @property
+    def label(self):
+        """Label
+
+        Returns the translated name of the kind of the found object.
+
+        :return: the name of the kind
+        :rtype: __proxy__
+        """
+        return dict(SearchDocument.KIND_CHOICES)[self.kind]
+
+    def __repr__(self):
+        """Representation
+
+        Returns the representation of this object.
+
+        :return: the representation of this object
+        :rtype: str
+        """
+        if self.page:
+            return f"SearchResult({self.kind!r}, {self.object_id!r}, page={self.page!r})"
+        return f"SearchResult({self.kind!r}, {self.object_id!r})"
+
+
+class SearchPage:
+    """Search page
+
+    This class represents a page of search results which was fetched with a cursor. It
+    provides the parts of the interface of a page of a Paginator which are used by the
+    templates.
+
+    :attr SearchPage.object_list: The results of the page
+    :type SearchPage.object_list: list[SearchResult]
+    :attr SearchPage.next_cursor: The cursor of the next page, None on the last page
+    :type SearchPage.next_cursor: None or str
+    :attr SearchPage.previous_cursor: The cursor of the previous page, None on the first page
+    :type SearchPage.previous_cursor: None or str
+    """
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        """Initializer
+
+        Initializes the page.
+
+        :param object_list: The results of the page
+        :type object_list: list[SearchResult]
+        :param next_cursor: The cursor of the next page
+        :type next_cursor: None or str
+        :param previous_cursor: The cursor of the previous page
+        :type previous_cursor: None or str
+        """
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def has_next(self):
+        """Has next
+
+        Returns true if there is a next page.
+
+        :return: true if there is a next page
+        :rtype: bool
+        """
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        """Has previous
+
+        Returns true if there is a previous page.
+
+        :return: true if there is a previous page
+        :rtype: bool
+        """
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        """Has other pages
+
+        Returns true if there is a next or a previous page.
+
+        :return: true if there are other pages
+        :rtype: bool
+        """
+        return self.has_next() or self.has_previous()
+
+    def __iter__(self):
+        """Iterator
+
+        Returns an iterator over the results of the page.
+
+        :return: the iterator
+        :rtype: Iterator[SearchResult]
+        """
+        return iter(self.object_list)
+
+    def __len__(self):
+        """Length
+
+        Returns the number of results of the page.
+
+        :return: the number of results
+        :rtype: int
+        """
+        return len(self.object_list)
+
+
+class SearchResults:
+    """Search results
+
+    This class represents the lazy results of a search query. Like a query set, it can be
+    counted and sliced; a slice fetches only the requested results from the backend, so
+    the results can be paginated with a Paginator. Deep pages should be fetched with a
+    cursor instead (see page), which continues after the sort key of the last result
+    instead of skipping the previous results.
+
+    :attr SearchResults.backend: The backend which executes the query
+    :type SearchResults.backend: SearchBackend
+    :attr SearchResults.terms: The terms of the query
+    :type SearchResults.terms: list[str]
+    :attr SearchResults.kinds: The kinds of the searched objects, None for all kinds
+    :type SearchResults.kinds: None or list[str]
+    :attr SearchResults.AFTER: The direction of a cursor to the following results
+    :type SearchResults.AFTER: str
+    :attr SearchResults.BEFORE: The direction of a cursor to the preceding results
+    :type SearchResults.BEFORE: str
+    """
+    AFTER = 'a'
+    BEFORE = 'b'
+
+    def __init__(self, backend, terms, kinds=None):
+        """Initializer
+
+        Initializes the results.
+
+        :param backend: The backend which executes the query
+        :type backend: SearchBackend
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        """
+        self.backend = backend
+        self.terms = terms
+        self.kinds = kinds
+        self._count = None
+
+    def count(self):
+        """Count
+
+        Returns the number of results.
+
+        :return: the number of results
+        :rtype: int
+        """
+        if self._count is None:
+            self._count = self.backend.count(self.terms, self.kinds) if self.terms else 0
+        return self._count
+
+    def estimate(self):
+        """Estimate
+
+        Returns the number of results, but counts at most SEARCH_COUNT_LIMIT results. The
+        number of all results of a broad query is expensive and not useful to the user.
+
+        :return: the number of results and true if it is exact
+        :rtype: tuple[int, bool]
+        """
+        limit = settings.SEARCH_COUNT_LIMIT
+        if self._count is not None:
+            return min(self._count, limit), self._count <= limit
+        count = self.backend.count(self.terms, self.kinds, limit + 1) if self.terms else 0
+        if count <= limit:
+            self._count = count
+        return min(count, limit), count <= limit
+
+    def __len__(self):
+        """Length
+
+        Returns the number of results.
+
+        :return: the number of results
+        :rtype: int
+        """
+        return self.count()
+
+    def __getitem__(self, key):
+        """Get item
+
+        Fetches the results of the given slice in the order of their rank.
+
+        :param key: The slice
+        :type key: slice
+
+        :return: the results
+        :rtype: list[SearchResult]
+        """
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError('Search results only support slices without step')
+        offset = key.start or 0
+        if key.stop is None:
+            limit = self.count() - offset
+        else:
+            limit = key.stop - offset
+        if not self.terms or limit <= 0:
+            return []
+        return self.backend.fetch(self.terms, self.kinds, limit, offset=offset)
+
+    @classmethod
+    def encode_cursor(cls, direction, key):
+        """Encode cursor
+
+        Encodes the direction and the sort key of a cursor for an url.
+
+        :param direction: The direction of the cursor
+        :type direction: str
+        :param key: The sort key of the first or last result of a page
+        :type key: tuple
+
+        :return: the cursor
+        :rtype: str
+        """
+        return base64.urlsafe_b64encode(json.dumps([direction, *key]).encode()).decode()
+
+    @classmethod
+    def decode_cursor(cls, cursor):
+        """Decode cursor
+
+        Decodes the direction and the sort key of a cursor.
+
+        :param cursor: The cursor
+        :type cursor: str
+
+        :return: the direction and the sort key
+        :rtype: tuple[str, tuple]
+
+        :raises ValueError: if the cursor is invalid
+        """
+        try:
+            direction, *key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (TypeError, ValueError) as error:
+            raise ValueError('Invalid cursor') from error
+        if direction not in (cls.AFTER, cls.BEFORE) or len(key) != 2:
+            raise ValueError('Invalid cursor')
+        return direction, tuple(key)
+
+    def page(self, cursor, size):
+        """Page
+
+        Fetches the page of results before or after the cursor, the first page if there is
+        no cursor. One result more than the size of the page is fetched to know whether
+        there are more results in the direction of the cursor.
+
+        :param cursor: The cursor of the page
+        :type cursor: None or str
+        :param size: The number of results of a page
+        :type size: int
+
+        :return: the page
+        :rtype: SearchPage
+
+        :raises ValueError: if the cursor is invalid
+        """
+        if not self.terms:
+            return SearchPage([], None, None)
+        direction, key = self.decode_cursor(cursor) if cursor else (self.AFTER, None)
+        if direction == self.AFTER:
+            results = self.backend.fetch(self.terms, self.kinds, size + 1, after=key)
+            has_next, has_previous = len(results) > size, key is not None
+            results = results[:size]
+        else:
+            results = self.backend.fetch(self.terms, self.kinds, size + 1, before=key)
+            has_next, has_previous = True, len(results) > size
+            results = results[-size:]
+        return SearchPage(
+            results,
+            self.encode_cursor(self.AFTER, results[-1].key) if has_next and results else None,
+            self.encode_cursor(self.BEFORE, results[0].key) if has_previous and results else None)
+
+
+class SearchBackend:
+    """Search backend
+
+    This class forms the interface of the search backends. A backend searches the
+    documents of the model SearchDocument.
+
+    :attr SearchBackend.mark: The characters which enclose the matches in the snippets of
+    the database
+    :type SearchBackend.mark: tuple[str, str]
+    """
+    mark = ('\x02', '\x03')
+
+    @staticmethod
+    def terms(query):
+        """Terms
+
+        Splits the query into its lower case terms. Every term matches words which start
+        with it (prefix query).
+
+        :param query: The query
+        :type query: str
+
+        :return: the terms
+        :rtype: list[str]
+        """
+        return re.findall(r'\w+', query.lower())
+
+    def snippet(self, text):
+        """Snippet
+
+        Escapes a snippet of the database and marks the matches with <mark>.
+
+        :param text: The snippet of the database
+        :type text: str
+
+        :return: the escaped snippet
+        :rtype: SafeString
+        """
+        return mark_safe(escape(text).replace(self.mark[0], '<mark>')
+                         .replace(self.mark[1], '</mark>'))
+
+    def search(self, query, kinds=None):
+        """Search
+
+        Searches the documents which contain all terms of the query.
+
+        :param query: The query
+        :type query: str
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+
+        :return: the results ordered by their rank
+        :rtype: SearchResults
+        """
+        return SearchResults(self, self.terms(query), kinds)
+
+    def count(self, terms, kinds, limit=None):
+        """Count
+
+        Returns the number of the documents which match the terms.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of counted documents, None to count all
+        :type limit: None or int
+
+        :return: the number of documents
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    def fetch(self, terms, kinds, limit, offset=0, after=None, before=None):
+        """Fetch
+
+        Returns the documents which match the terms ordered by their rank. The results
+        are either skipped with an offset or start after or end before a sort key.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of results
+        :type limit: int
+        :param offset: The number of results to skip
+        :type offset: int
+        :param after: The sort key after which the results start
+        :type after: None or tuple
+        :param before: The sort key before which the results end
+        :type before: None or tuple
+
+        :return: the results with their sort keys
+        :rtype: list[SearchResult]
+        """
+        raise NotImplementedError
+
+    def optimize(self):
+        """Optimize
+
+        Optimizes the index after a large number of changes.
+        """
+
+
+class FTS5Backend(SearchBackend):
+    """FTS5 backend
+
+    Searches the documents with the SQLite FTS5 table search_searchdocument_fts. The table
+    is an inverted index of the titles and bodies of the documents and is kept up to date
+    by triggers (see the migrations). The results are ranked by BM25, matches in the title
+    weigh more than matches in the body.
+
+    :attr FTS5Backend.table: The name of the FTS5 table
+    :type FTS5Backend.table: str
+    :attr FTS5Backend.weights: The weights of the title and the body
+    :type FTS5Backend.weights: tuple[float, float]
+    """
+    table = 'search_searchdocument_fts'
+    weights = (10.0, 1.0)
+
+    @staticmethod
+    def match(terms):
+        """Match
+
+        Returns the FTS5 query of the terms: every term is a quoted prefix query.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+
+        :return: the FTS5 query
+        :rtype: str
+        """
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def where(self, terms, kinds):
+        """Where
+
+        Returns the condition of the query and its parameters.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+
+        :return: the condition and the parameters
+        :rtype: tuple[str, list[str]]
+        """
+        sql = f'{self.table} MATCH %s'
+        params = [self.match(terms)]
+        if kinds is not None:
+            sql += f' AND document.kind IN ({", ".join(["%s"] * len(kinds))})'
+            params += list(kinds)
+        return sql, params
+
+    def count(self, terms, kinds, limit=None):
+        """Count
+
+        Returns the number of the documents which match the terms.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of counted documents, None to count all
+        :type limit: None or int
+
+        :return: the number of documents
+        :rtype: int
+        """
+        where, params = self.where(terms, kinds)
+        with connection.cursor() as cursor:
+            # A negative limit is no limit in SQLite
+            cursor.execute(f'SELECT COUNT(*) FROM (SELECT 1 FROM {self.table} '
+                           f'JOIN search_searchdocument document '
+                           f'ON document.id = {self.table}.rowid WHERE {where} LIMIT %s)',
+                           [*params, -1 if limit is None else limit])
+            return cursor.fetchone()[0]
+
+    def fetch(self, terms, kinds, limit, offset=0, after=None, before=None):
+        """Fetch
+
+        Returns the documents which match the terms ordered by their BM25 rank. The sort
+        key of a result is its rank and the id of its document.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of results
+        :type limit: int
+        :param offset: The number of results to skip
+        :type offset: int
+        :param after: The sort key after which the results start
+        :type after: None or tuple[float, int]
+        :param before: The sort key before which the results end
+        :type before: None or tuple[float, int]
+
+        :return: the results with their sort keys
+        :rtype: list[SearchResult]
+        """
+        rank = f'bm25({self.table}, %s, %s)'
+        where, params = self.where(terms, kinds)
+        order = 'ASC'
+        if after is not None:
+            where += f' AND ({rank}, document.id) > (%s, %s)'
+            params += [*self.weights, *after]
+        elif before is not None:
+            # The results before the key are fetched in reverse order
+            where += f' AND ({rank}, document.id) < (%s, %s)'
+            params += [*self.weights, *before]
+            order = 'DESC'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT document.kind, document.object_id, document.title, '
+                f'snippet({self.table}, 1, %s, %s, %s, 16), document.page, '
+                f'{rank} AS score, document.id '
+                f'FROM {self.table} JOIN search_searchdocument document '
+                f'ON document.id = {self.table}.rowid WHERE {where} '
+                f'ORDER BY score {order}, document.id {order} LIMIT %s OFFSET %s',
+                [*self.mark, '…', *self.weights, *params, limit, offset])
+            results = [SearchResult(kind, object_id, title, self.snippet(snippet), page,
+                                    (score, pk))
+                       for kind, object_id, title, snippet, page, score, pk
+                       in cursor.fetchall()]
+        if before is not None:
+            results.reverse()
+        return results
+
+    def optimize(self):
+        """Optimize
+
+        Merges the segments of the FTS5 table.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('optimize')")
+
+
+class PostgresBackend(SearchBackend):
+    """PostgreSQL backend
+
+    Searches the documents with the PostgreSQL full-text search. The column search_vector
+    of the documents holds the text search vector of the title (weight A) and the body
+    (weight B), it is kept up to date by a trigger and indexed by a GIN index (see the
+    migrations). The vectors use the configuration simple, so the terms can be matched as
+    prefixes. The results are ranked by ts_rank, matches in the title weigh more than
+    matches in the body.
+
+    :attr PostgresBackend.config: The text search configuration of the search vectors
+    :type PostgresBackend.config: str
+    :attr PostgresBackend.weights: The weights of the labels D, C, B (body) and A (title)
+    :type PostgresBackend.weights: str
+    """
+    config = 'simple'
+    weights = '{0, 0, 0.1, 1}'
+
+    @staticmethod
+    def match(terms):
+        """Match
+
+        Returns the text search query of the terms: every term is a prefix query.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+
+        :return: the text search query
+        :rtype: str
+        """
+        return ' & '.join(f"'{term}':*" for term in terms)
+
+    def where(self, terms, kinds):
+        """Where
+
+        Returns the condition of the query and its parameters.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+
+        :return: the condition and the parameters
+        :rtype: tuple[str, list[str]]
+        """
+        sql = 'document.search_vector @@ to_tsquery(%s, %s)'
+        params = [self.config, self.match(terms)]
+        if kinds is not None:
+            sql += f' AND document.kind IN ({", ".join(["%s"] * len(kinds))})'
+            params += list(kinds)
+        return sql, params
+
+    def count(self, terms, kinds, limit=None):
+        """Count
+
+        Returns the number of the documents which match the terms.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of counted documents, None to count all
+        :type limit: None or int
+
+        :return: the number of documents
+        :rtype: int
+        """
+        where, params = self.where(terms, kinds)
+        with connection.cursor() as cursor:
+            # A limit of NULL is no limit in PostgreSQL
+            cursor.execute(f'SELECT COUNT(*) FROM (SELECT 1 FROM search_searchdocument document '
+                           f'WHERE {where} LIMIT %s) matches', [*params, limit])
+            return cursor.fetchone()[0]
+
+    def fetch(self, terms, kinds, limit, offset=0, after=None, before=None):
+        """Fetch
+
+        Returns the documents which match the terms ordered by their rank. The sort key
+        of a result is its negated rank and the id of its document, so the keys ascend
+        like the ones of the FTS5 backend. The rank is compared in double precision, so
+        the keys survive the round trip through a cursor unchanged. The snippets are only
+        computed for the fetched documents.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of results
+        :type limit: int
+        :param offset: The number of results to skip
+        :type offset: int
+        :param after: The sort key after which the results start
+        :type after: None or tuple[float, int]
+        :param before: The sort key before which the results end
+        :type before: None or tuple[float, int]
+
+        :return: the results with their sort keys
+        :rtype: list[SearchResult]
+        """
+        rank = '-ts_rank(%s, document.search_vector, to_tsquery(%s, %s))::double precision'
+        rank_params = [self.weights, self.config, self.match(terms)]
+        where, params = self.where(terms, kinds)
+        order = 'ASC'
+        if after is not None:
+            where += f' AND ({rank}, document.id) > (%s, %s)'
+            params += [*rank_params, *after]
+        elif before is not None:
+            # The results before the key are fetched in reverse order
+            where += f' AND ({rank}, document.id) < (%s, %s)'
+            params += [*rank_params, *before]
+            order = 'DESC'
+        options = f'StartSel={self.mark[0]}, StopSel={self.mark[1]}, MaxWords=16, MinWords=8'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT kind, object_id, title, ts_headline(%s, body, to_tsquery(%s, %s), %s), '
+                f'page, score, id FROM ('
+                f'SELECT document.kind, document.object_id, document.title, document.body, '
+                f'document.page, {rank} AS score, document.id '
+                f'FROM search_searchdocument document WHERE {where} '
+                f'ORDER BY score {order}, document.id {order} LIMIT %s OFFSET %s) matches '
+                f'ORDER BY score {order}, id {order}',
+                [self.config, self.config, self.match(terms), options,
+                 *rank_params, *params, limit, offset])
+            results = [SearchResult(kind, object_id, title, self.snippet(snippet), page,
+                                    (score, pk))
+                       for kind, object_id, title, snippet, page, score, pk
+                       in cursor.fetchall()]
+        if before is not None:
+            results.reverse()
+        return results
+
+    def optimize(self):
+        """Optimize
+
+        Updates the statistics of the documents for the query planner.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE search_searchdocument')
+
+
+class DatabaseBackend(SearchBackend):
+    """Database backend
+
+    Searches the documents with LIKE queries. This backend works with every database but
+    scans all documents and does not rank the results, it is meant for databases without
+    a full-text search, e.g. MySQL.
+
+    :attr DatabaseBackend.snippet_length: The length of the snippets
+    :type DatabaseBackend.snippet_length: int
+    """
+    snippet_length = 200
+
+    @staticmethod
+    def queryset(terms, kinds):
+        """Query set
+
+        Returns the documents which contain all terms.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+
+        :return: the documents
+        :rtype: QuerySet[SearchDocument]
+        """
+        documents = SearchDocument.objects.all()
+        for term in terms:
+            documents = documents.filter(Q(title__icontains=term) | Q(body__icontains=term))
+        if kinds is not None:
+            documents = documents.filter(kind__in=kinds)
+        return documents
+
+    def count(self, terms, kinds, limit=None):
+        """Count
+
+        Returns the number of the documents which contain all terms.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of counted documents, None to count all
+        :type limit: None or int
+
+        :return: the number of documents
+        :rtype: int
+        """
+        return self.queryset(terms, kinds)[:limit].count()
+
+    def fetch(self, terms, kinds, limit, offset=0, after=None, before=None):
+        """Fetch
+
+        Returns the documents which contain all terms ordered by their title. The sort key
+        of a result is its title and the id of its document.
+
+        :param terms: The terms of the query
+        :type terms: list[str]
+        :param kinds: The kinds of the searched objects, None for all kinds
+        :type kinds: None or list[str]
+        :param limit: The maximum number of results
+        :type limit: int
+        :param offset: The number of results to skip
+        :type offset: int
+        :param after: The sort key after which the results start
+        :type after: None or tuple[str, int]
+        :param before: The sort key before which the results end
+        :type before: None or tuple[str, int]
+
+        :return: the results with their sort keys
+        :rtype: list[SearchResult]
+        """
+        documents = self.queryset(terms, kinds).order_by('title', 'pk')
+        if after is not None:
+            documents = documents.filter(Q(title__gt=after[0])
+                                         | Q(title=after[0], pk__gt=after[1]))
+        elif before is not None:
+            # The results before the key are fetched in reverse order
+            documents = documents.filter(Q(title__lt=before[0])
+                                         | Q(title=before[0], pk__lt=before[1])) \
+                .order_by('-title', '-pk')
+        results = [SearchResult(document.kind, document.object_id, document.title,
+                                escape(document.body[:self.snippet_length]), document.page,
+                                (document.title, document.pk))
+                   for document in documents[offset:offset + limit]]
+        if before is not None:
+            results.reverse()
+        return results
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """Get backend
+
+    Returns the search backend configured in the setting SEARCH_BACKEND.
+
+    :return: the search backend
+    :rtype: SearchBackend
+    """
+    return import_string(settings.SEARCH_BACKEND)()
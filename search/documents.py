@@ -0,0 +1,138 @@
+"""Purpose of this file
+
+This file contains the extraction of the searchable text of the courses, topics and contents.
+"""
+
+from base.models import Comment, Content, Course, Topic
+
+from content.models import CONTENT_TYPES
+
+
+class Documents:
+    """Documents
+
+    Builds the documents of the search index. A document consists of a title and a body,
+    matches in the title are ranked higher. The documents of a batch of objects are built
+    with a constant number of queries.
+
+    :attr Documents.COURSE: The kind of the documents of courses
+    :type Documents.COURSE: str
+    :attr Documents.TOPIC: The kind of the documents of topics
+    :type Documents.TOPIC: str
+    :attr Documents.CONTENT: The kind of the documents of contents
+    :type Documents.CONTENT: str
+    :attr Documents.PAGE: The kind of the documents of the pages of PDF contents, they
+    are built by the PDF text extractor (see search/extraction.py)
+    :type Documents.PAGE: str
+    :attr Documents.CONTENT_FIELDS: The searchable fields of the content types by their
+    related names
+    :type Documents.CONTENT_FIELDS: dict[str, list[str]]
+    """
+    COURSE = 'course'
+    TOPIC = 'topic'
+    CONTENT = 'content'
+    PAGE = 'page'
+
+    CONTENT_FIELDS = {
+        model._meta.model_name: [field for field in ('textfield', 'source', 'license')
+                                 if hasattr(model, field)]
+        for model in CONTENT_TYPES.values()
+    }
+
+    @staticmethod
+    def join(*texts):
+        """Join
+
+        Joins the non empty texts to the body of a document.
+
+        :param texts: The texts
+        :type texts: str
+
+        :return: the body
+        :rtype: str
+        """
+        return '\n'.join(text for text in texts if text)
+
+    @classmethod
+    def courses(cls, ids):
+        """Courses
+
+        Builds the documents of the courses with the given ids.
+
+        :param ids: The ids of the courses
+        :type ids: Iterable[int]
+
+        :return: the titles and bodies by the ids of the courses
+        :rtype: dict[int, tuple[str, str]]
+        """
+        return {pk: (title, description) for pk, title, description
+                in Course.objects.filter(pk__in=ids).values_list('pk', 'title', 'description')}
+
+    @classmethod
+    def topics(cls, ids):
+        """Topics
+
+        Builds the documents of the topics with the given ids.
+
+        :param ids: The ids of the topics
+        :type ids: Iterable[int]
+
+        :return: the titles and bodies by the ids of the topics
+        :rtype: dict[int, tuple[str, str]]
+        """
+        return {pk: (title, '') for pk, title
+                in Topic.objects.filter(pk__in=ids).values_list('pk', 'title')}
+
+    @classmethod
+    def contents(cls, ids):
+        """Contents
+
+        Builds the documents of the contents with the given ids. The title is the title of
+        the topic, the body contains the description, the text of the content type, the tags
+        and the comments.
+
+        :param ids: The ids of the contents
+        :type ids: Iterable[int]
+
+        :return: the titles and bodies by the ids of the contents
+        :rtype: dict[int, tuple[str, str]]
+        """
+        contents = Content.objects.filter(pk__in=ids) \
+            .select_related('topic', *cls.CONTENT_FIELDS)
+        tags, comments = {}, {}
+        for content_id, title in Content.tags.through.objects.filter(content_id__in=ids) \
+                .values_list('content_id', 'tag__title'):
+            tags.setdefault(content_id, []).append(title)
+        for content_id, text in Comment.objects.filter(content_id__in=ids) \
+                .order_by('pk').values_list('content_id', 'text'):
+            comments.setdefault(content_id, []).append(text)
+
+        documents = {}
+        for content in contents:
+            texts = [content.description]
+            for related_name, fields in cls.CONTENT_FIELDS.items():
+                # Only the model of the content type exists
+                obj = getattr(content, related_name, None)
+                if obj is not None:
+                    texts += [getattr(obj, field) for field in fields]
+            texts += tags.get(content.pk, []) + comments.get(content.pk, [])
+            documents[content.pk] = (content.topic.title, cls.join(*texts))
+        return documents
+
+    @classmethod
+    def build(cls, kind, ids):
+        """Build
+
+        Builds the documents of the objects of the given kind.
+
+        :param kind: The kind of the objects
+        :type kind: str
+        :param ids: The ids of the objects
+        :type ids: Iterable[int]
+
+        :return: the titles and bodies by the ids of the objects
+        :rtype: dict[int, tuple[str, str]]
+        """
+        return {cls.COURSE: cls.courses,
+                cls.TOPIC: cls.topics,
+                cls.CONTENT: cls.contents}[kind](ids)
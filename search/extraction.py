@@ -0,0 +1,131 @@
+"""Purpose of this file
+
+This file contains the extraction of the text of PDF contents for the search index.
+"""
+
+import codecs
+
+from subprocess import PIPE, DEVNULL, Popen
+
+from django.conf import settings
+
+from base.models import Content
+
+from content.models import CONTENT_TYPES, BasePDFModel
+
+from search.documents import Documents
+from search.models import ExtractedPDF, SearchDocument
+
+
+class PDFTextExtractor:
+    """PDF text extractor
+
+    Extracts the text of the PDF of a content (PDF contents and compiled LaTeX contents)
+    page by page and indexes every page as a document of the kind page, so a match can be
+    located on its page. The text is read from the output of pdftotext (poppler-utils, also
+    required by pdf2image) as a stream, so only one page is held in memory at a time. The
+    text of a page is truncated to SEARCH_PDF_PAGE_LENGTH characters.
+
+    The hash of the extracted PDF is stored, a PDF is only extracted again if its hash
+    changed.
+
+    :attr PDFTextExtractor.command: The command which converts a PDF to text
+    :type PDFTextExtractor.command: list[str]
+    :attr PDFTextExtractor.chunk_size: The number of bytes read from the output at once
+    :type PDFTextExtractor.chunk_size: int
+    :attr PDFTextExtractor.batch_size: The number of pages inserted at once
+    :type PDFTextExtractor.batch_size: int
+    """
+    command = ['pdftotext', '-enc', 'UTF-8', '-q']
+    chunk_size = 64 * 1024
+    batch_size = 50
+
+    @classmethod
+    def pages(cls, path):
+        """Pages
+
+        Yields the text of the pages of the PDF. Pages are separated by form feeds in the
+        output of pdftotext.
+
+        :param path: The path of the PDF
+        :type path: str
+
+        :return: the text of the pages
+        :rtype: Iterator[str]
+        """
+        max_length = settings.SEARCH_PDF_PAGE_LENGTH
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        with Popen(cls.command + [path, '-'], stdout=PIPE, stderr=DEVNULL) as process:
+            try:
+                page = ''
+                for chunk in iter(lambda: process.stdout.read(cls.chunk_size), b''):
+                    *complete, page = (page + decoder.decode(chunk)).split('\f')
+                    for text in complete:
+                        yield text[:max_length]
+                    page = page[:max_length]
+                page += decoder.decode(b'', final=True)
+                # pdftotext terminates the last page with a form feed as well
+                if page.strip():
+                    yield page[:max_length]
+                if process.wait() != 0:
+                    raise RuntimeError(f'pdftotext failed with exit code {process.returncode}')
+            finally:
+                # The caller may stop reading early
+                if process.poll() is None:
+                    process.kill()
+
+    @staticmethod
+    def pdf_model(content):
+        """PDF model
+
+        Returns the model of the content type of the content if it contains a PDF.
+
+        :param content: The content
+        :type content: Content
+
+        :return: the model of the content type or None
+        :rtype: None or BasePDFModel
+        """
+        model = CONTENT_TYPES.get(content.type)
+        if model is None or not issubclass(model, BasePDFModel):
+            return None
+        return model.objects.filter(pk=content.pk).first()
+
+    @classmethod
+    def extract(cls, content_id):
+        """Extract
+
+        Extracts and indexes the pages of the PDF of the content if the PDF changed since
+        the last extraction.
+
+        :param content_id: The id of the content
+        :type content_id: int
+
+        :return: the number of pages or None if the PDF did not change
+        :rtype: None or int
+        """
+        content = Content.objects.select_related('topic').filter(pk=content_id).first()
+        obj = cls.pdf_model(content) if content is not None else None
+        file_hash = obj.file_hash() if obj is not None else None
+        extracted = ExtractedPDF.objects.filter(content_id=content_id).first()
+        if extracted is not None and extracted.file_hash == file_hash:
+            return None
+
+        SearchDocument.remove_pages(content_id)
+        if file_hash is None:
+            ExtractedPDF.objects.filter(content_id=content_id).delete()
+            return 0
+        count = 0
+        batch = []
+        for count, text in enumerate(cls.pages(obj.pdf.path), start=1):
+            if text.strip():
+                batch.append(SearchDocument(kind=Documents.PAGE, object_id=content_id,
+                                            page=count, title=content.topic.title, body=text))
+            if len(batch) == cls.batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        ExtractedPDF.objects.update_or_create(content_id=content_id,
+                                              defaults={'file_hash': file_hash,
+                                                        'page_count': count})
+        return count
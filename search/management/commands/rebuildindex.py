@@ -0,0 +1,80 @@
+"""Purpose of this file
+
+This file contains the management command which rebuilds the search index.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from base.models import Content, Course, Topic
+
+from content.models import Latex, PDFContent
+
+from search.backends import get_backend
+from search.documents import Documents
+from search.models import ExtractionJob, SearchDocument
+
+
+class Command(BaseCommand):
+    """Rebuild index
+
+    Rebuilds the documents of all courses, topics and contents in batches, e.g. after the
+    installation of the search or the change of the extracted text. The extraction of the
+    PDFs which were not extracted yet is queued for the worker process. Afterwards the
+    documents are kept up to date by the signal receivers.
+
+    :attr Command.help: The help text of the command
+    :type Command.help: str
+    :attr Command.models: The indexed models by their kinds
+    :type Command.models: dict[str, type[Model]]
+    """
+    help = 'Rebuilds the search index of the courses, topics and contents'
+
+    models = {
+        Documents.COURSE: Course,
+        Documents.TOPIC: Topic,
+        Documents.CONTENT: Content,
+    }
+
+    def add_arguments(self, parser):
+        """Arguments
+
+        Adds the arguments of the command.
+
+        :param parser: The argument parser
+        :type parser: CommandParser
+        """
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of objects to index per batch')
+
+    def handle(self, *args, **options):
+        """Handle
+
+        Rebuilds the documents and reports their number.
+
+        :param args: The arguments
+        :type args: Any
+        :param options: The options of the command
+        :type options: dict[str, Any]
+        """
+        batch_size = options['batch_size']
+        for kind, model in self.models.items():
+            SearchDocument.objects.filter(kind=kind) \
+                .exclude(object_id__in=model.objects.values('pk')).delete()
+            ids = list(model.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(ids), batch_size):
+                with transaction.atomic():
+                    SearchDocument.index(kind, ids[start:start + batch_size])
+            self.stdout.write(f'{len(ids)} {model._meta.verbose_name_plural} indexed')
+
+        SearchDocument.objects.filter(kind=Documents.PAGE) \
+            .exclude(object_id__in=Content.objects.values('pk')).delete()
+        queued = 0
+        for model in (PDFContent, Latex):
+            for content_id in model.objects.exclude(pdf='') \
+                    .filter(content__extracted_pdf__isnull=True) \
+                    .values_list('content_id', flat=True):
+                ExtractionJob.enqueue(content_id)
+                queued += 1
+        self.stdout.write(f'{queued} PDF extractions queued')
+        get_backend().optimize()
@@ -0,0 +1,32 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('course', 'Course'), ('topic', 'Topic'), ('content', 'Content')], max_length=10, verbose_name='Kind')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Object ID')),
+                ('title', models.TextField(verbose_name='Title')),
+                ('body', models.TextField(blank=True, verbose_name='Body')),
+            ],
+            options={
+                'verbose_name': 'Search Document',
+                'verbose_name_plural': 'Search Documents',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='search_document_unique'),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:32
+
+from django.db import migrations
+
+TABLE = 'search_searchdocument_fts'
+
+CREATE = [
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5(title, body, content='search_searchdocument', "
+    f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    f"CREATE TRIGGER {TABLE}_insert AFTER INSERT ON search_searchdocument BEGIN "
+    f"INSERT INTO {TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    f"CREATE TRIGGER {TABLE}_delete AFTER DELETE ON search_searchdocument BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, title, body) "
+    f"VALUES ('delete', old.id, old.title, old.body); END",
+    f"CREATE TRIGGER {TABLE}_update AFTER UPDATE ON search_searchdocument BEGIN "
+    f"INSERT INTO {TABLE}({TABLE}, rowid, title, body) "
+    f"VALUES ('delete', old.id, old.title, old.body); "
+    f"INSERT INTO {TABLE}(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')",
+]
+
+DROP = [
+    f"DROP TRIGGER {TABLE}_insert",
+    f"DROP TRIGGER {TABLE}_delete",
+    f"DROP TRIGGER {TABLE}_update",
+    f"DROP TABLE {TABLE}",
+]
+
+
+def create_fts(apps, schema_editor):
+    # The other databases use a search backend without FTS5 table
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
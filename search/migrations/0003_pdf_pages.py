@@ -0,0 +1,77 @@
+# Generated by Django 3.0.7 on 2026-10-18 17:37
+
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# SQLite rebuilds the table of the documents, which drops the triggers of the FTS5 table
+fts5 = import_module('search.migrations.0002_fts5')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0019_structure_position'),
+        ('search', '0002_fts5'),
+    ]
+
+    operations = [
+        migrations.RunPython(fts5.drop_fts, fts5.create_fts),
+        migrations.CreateModel(
+            name='ExtractedPDF',
+            fields=[
+                ('content', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='extracted_pdf', serialize=False, to='base.Content', verbose_name='Content')),
+                ('file_hash', models.CharField(max_length=64, verbose_name='File hash')),
+                ('page_count', models.PositiveIntegerField(default=0, verbose_name='Page count')),
+                ('extraction_date', models.DateTimeField(auto_now=True, verbose_name='Extraction date')),
+            ],
+            options={
+                'verbose_name': 'Extracted PDF',
+                'verbose_name_plural': 'Extracted PDFs',
+            },
+        ),
+        migrations.CreateModel(
+            name='ExtractionJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], db_index=True, default='pending', max_length=10, verbose_name='Status')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='Progress')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('creation_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation Date')),
+                ('start_date', models.DateTimeField(blank=True, null=True, verbose_name='Start Date')),
+                ('end_date', models.DateTimeField(blank=True, null=True, verbose_name='End Date')),
+            ],
+            options={
+                'verbose_name': 'Extraction Job',
+                'verbose_name_plural': 'Extraction Jobs',
+                'ordering': ['creation_date'],
+                'abstract': False,
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='searchdocument',
+            name='search_document_unique',
+        ),
+        migrations.AddField(
+            model_name='searchdocument',
+            name='page',
+            field=models.PositiveIntegerField(default=0, verbose_name='Page'),
+        ),
+        migrations.AlterField(
+            model_name='searchdocument',
+            name='kind',
+            field=models.CharField(choices=[('course', 'Course'), ('topic', 'Topic'), ('content', 'Content'), ('page', 'PDF page')], max_length=10, verbose_name='Kind'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchdocument',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id', 'page'), name='search_document_unique'),
+        ),
+        migrations.AddField(
+            model_name='extractionjob',
+            name='content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='extraction_jobs', to='base.Content', verbose_name='Content'),
+        ),
+        migrations.RunPython(fts5.create_fts, fts5.drop_fts),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 3.0.7 on 2026-10-18 21:04
+
+from django.db import migrations
+
+TABLE = 'search_searchdocument'
+
+VECTOR = "setweight(to_tsvector('simple', coalesce({0}.title, '')), 'A') || " \
+         "setweight(to_tsvector('simple', coalesce({0}.body, '')), 'B')"
+
+CREATE = [
+    f"ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector",
+    f"CREATE FUNCTION {TABLE}_vector() RETURNS trigger AS $$ BEGIN "
+    f"NEW.search_vector := {VECTOR.format('NEW')}; RETURN NEW; END $$ LANGUAGE plpgsql",
+    f"CREATE TRIGGER {TABLE}_vector BEFORE INSERT OR UPDATE OF title, body ON {TABLE} "
+    f"FOR EACH ROW EXECUTE PROCEDURE {TABLE}_vector()",
+    f"UPDATE {TABLE} SET search_vector = {VECTOR.format(TABLE)}",
+    f"CREATE INDEX {TABLE}_vector_idx ON {TABLE} USING GIN (search_vector)",
+]
+
+DROP = [
+    f"DROP INDEX {TABLE}_vector_idx",
+    f"DROP TRIGGER {TABLE}_vector ON {TABLE}",
+    f"DROP FUNCTION {TABLE}_vector()",
+    f"ALTER TABLE {TABLE} DROP COLUMN search_vector",
+]
+
+
+def create_vector(apps, schema_editor):
+    # The search vector is only used by the PostgreSQL backend
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in CREATE:
+            schema_editor.execute(statement)
+
+
+def drop_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0003_pdf_pages'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_vector, drop_vector),
+    ]
@@ -0,0 +1,420 @@
+"""Purpose of this file
+
+This file describes or defines the documents of the search index, the extraction of the
+text of PDF contents and the signal receivers which keep them up to date.
+"""
+
+from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+
+from base.models import Comment, Content, Course, Job, Tag, Topic
+
+from content.models import CONTENT_TYPES, Latex, PDFContent
+
+from search.autocomplete import autocomplete_index
+from search.documents import Documents
+
+
+class SearchDocument(models.Model):
+    """Search document
+
+    This model represents the searchable text of a course, a topic, a content or a page
+    of the PDF of a content. The documents are indexed by the search backend (see
+    search/backends.py), e.g. the SQLite FTS5 table or the PostgreSQL search vector which
+    are kept up to date by triggers on this table.
+
+    :attr SearchDocument.KIND_CHOICES: The choices of the kind
+    :type SearchDocument.KIND_CHOICES: list[tuple[str, __proxy__]]
+    :attr SearchDocument.kind: The kind of the indexed object
+    :type SearchDocument.kind: CharField
+    :attr SearchDocument.object_id: The id of the indexed object
+    :type SearchDocument.object_id: PositiveIntegerField
+    :attr SearchDocument.page: The number of the page of a PDF, 0 for other documents
+    :type SearchDocument.page: PositiveIntegerField
+    :attr SearchDocument.title: The title of the object
+    :type SearchDocument.title: TextField
+    :attr SearchDocument.body: The searchable text of the object
+    :type SearchDocument.body: TextField
+    """
+    KIND_CHOICES = [
+        (Documents.COURSE, _('Course')),
+        (Documents.TOPIC, _('Topic')),
+        (Documents.CONTENT, _('Content')),
+        (Documents.PAGE, _('PDF page')),
+    ]
+
+    kind = models.CharField(verbose_name=_("Kind"),
+                            max_length=10,
+                            choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField(verbose_name=_("Object ID"))
+    page = models.PositiveIntegerField(verbose_name=_("Page"),
+                                       default=0)
+    title = models.TextField(verbose_name=_("Title"))
+    body = models.TextField(verbose_name=_("Body"),
+                            blank=True)
+
+    class Meta:
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        :attr Meta.constraints: The constraints of the table
+        :type Meta.constraints: list[Constraint]
+        """
+        verbose_name = _("Search Document")
+        verbose_name_plural = _("Search Documents")
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id', 'page'],
+                                    name='search_document_unique')
+        ]
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.kind} {self.object_id}: {self.title}"
+
+    @classmethod
+    def index(cls, kind, ids):
+        """Index
+
+        Creates, updates or removes the documents of the objects of the given kind. The
+        documents of objects which do not exist anymore are removed.
+
+        :param kind: The kind of the objects
+        :type kind: str
+        :param ids: The ids of the objects
+        :type ids: Iterable[int]
+        """
+        ids = set(ids)
+        if not ids:
+            return
+        built = Documents.build(kind, ids)
+        existing = {document.object_id: document
+                    for document in cls.objects.filter(kind=kind, object_id__in=ids)}
+        changed = []
+        for object_id, (title, body) in built.items():
+            document = existing.get(object_id)
+            if document is not None and (document.title, document.body) != (title, body):
+                document.title, document.body = title, body
+                changed.append(document)
+        cls.objects.bulk_update(changed, ['title', 'body'])
+        cls.objects.bulk_create(cls(kind=kind, object_id=object_id, title=title, body=body)
+                                for object_id, (title, body) in built.items()
+                                if object_id not in existing)
+        cls.remove(kind, ids.difference(built))
+
+    @classmethod
+    def remove(cls, kind, ids):
+        """Remove
+
+        Removes the documents of the objects of the given kind.
+
+        :param kind: The kind of the objects
+        :type kind: str
+        :param ids: The ids of the objects
+        :type ids: Iterable[int]
+        """
+        ids = set(ids)
+        if ids:
+            cls.objects.filter(kind=kind, object_id__in=ids).delete()
+
+    @classmethod
+    def remove_pages(cls, content_id):
+        """Remove pages
+
+        Removes the documents of the pages of the PDF of the content.
+
+        :param content_id: The id of the content
+        :type content_id: int
+        """
+        cls.remove(Documents.PAGE, [content_id])
+
+
+class ExtractedPDF(models.Model):
+    """Extracted PDF
+
+    This model represents the last extraction of the text of the PDF of a content. The
+    text is only extracted again if the hash of the PDF changed.
+
+    :attr ExtractedPDF.content: The content of the PDF
+    :type ExtractedPDF.content: OneToOneField - Content
+    :attr ExtractedPDF.file_hash: The SHA-256 hash of the extracted PDF
+    :type ExtractedPDF.file_hash: CharField
+    :attr ExtractedPDF.page_count: The number of pages of the extracted PDF
+    :type ExtractedPDF.page_count: PositiveIntegerField
+    :attr ExtractedPDF.extraction_date: The date of the extraction
+    :type ExtractedPDF.extraction_date: DateTimeField
+    """
+    content = models.OneToOneField(Content,
+                                   verbose_name=_("Content"),
+                                   on_delete=models.CASCADE,
+                                   primary_key=True,
+                                   related_name='extracted_pdf')
+    file_hash = models.CharField(verbose_name=_("File hash"),
+                                 max_length=64)
+    page_count = models.PositiveIntegerField(verbose_name=_("Page count"),
+                                             default=0)
+    extraction_date = models.DateTimeField(verbose_name=_("Extraction date"),
+                                           auto_now=True)
+
+    class Meta:
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        """
+        verbose_name = _("Extracted PDF")
+        verbose_name_plural = _("Extracted PDFs")
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.content_id}: {self.file_hash}"
+
+
+class ExtractionJob(Job):
+    """Extraction job
+
+    This model represents the extraction of the text of the PDF of a content. The text is
+    extracted by the worker process, so the upload of a PDF does not wait for it.
+
+    :attr ExtractionJob.content: The content of the PDF
+    :type ExtractionJob.content: ForeignKey - Content
+    """
+    content = models.ForeignKey(Content,
+                                verbose_name=_("Content"),
+                                on_delete=models.CASCADE,
+                                related_name='extraction_jobs')
+
+    class Meta(Job.Meta):
+        """Meta options
+
+        This class handles all possible meta options that you can give to this model.
+
+        :attr Meta.verbose_name: A human-readable name for the object in singular
+        :type Meta.verbose_name: __proxy__
+        :attr Meta.verbose_name_plural: A human-readable name for the object in plural
+        :type Meta.verbose_name_plural: __proxy__
+        """
+        verbose_name = _("Extraction Job")
+        verbose_name_plural = _("Extraction Jobs")
+
+    def __str__(self):
+        """String representation
+
+        Returns the string representation of this object.
+
+        :return: the string representation of this object
+        :rtype: str
+        """
+        return f"{self.content_id} ({self.status})"
+
+    @classmethod
+    def enqueue(cls, content_id):
+        """Enqueue
+
+        Queues the extraction of the PDF of the content unless an extraction is already
+        pending.
+
+        :param content_id: The id of the content
+        :type content_id: int
+        """
+        if not cls.objects.filter(content_id=content_id, status=cls.PENDING).exists():
+            cls.objects.create(content_id=content_id)
+
+    def run(self):
+        """Run
+
+        Extracts the text of the PDF if it changed.
+        """
+        # pylint: disable=import-outside-toplevel
+        from search.extraction import PDFTextExtractor
+        PDFTextExtractor.extract(self.content_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Content)
+def index_object(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Index object
+
+    Indexes a saved course, topic or content. The documents of the contents of a topic
+    contain its title.
+
+    :param sender: The model of the object
+    :type sender: type
+    :param instance: The saved object
+    :type instance: Course or Topic or Content
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    kind = sender._meta.model_name
+    SearchDocument.index(kind, [instance.pk])
+    if kind == Documents.TOPIC:
+        content_ids = list(instance.contents.values_list('pk', flat=True))
+        SearchDocument.index(Documents.CONTENT, content_ids)
+        SearchDocument.objects.filter(kind=Documents.PAGE, object_id__in=content_ids) \
+            .exclude(title=instance.title).update(title=instance.title)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Content)
+def remove_object(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Remove object
+
+    Removes the document of a deleted course, topic or content and the documents of the
+    pages of the PDF of a content.
+
+    :param sender: The model of the object
+    :type sender: type
+    :param instance: The deleted object
+    :type instance: Course or Topic or Content
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    SearchDocument.remove(sender._meta.model_name, [instance.pk])
+    if sender is Content:
+        SearchDocument.remove_pages(instance.pk)
+
+
+def index_content(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Index content
+
+    Indexes the content of a changed model of a content type or comment.
+
+    :param sender: The model of the changed object
+    :type sender: type
+    :param instance: The changed object
+    :type instance: Model
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    SearchDocument.index(Documents.CONTENT, [instance.content_id])
+
+
+for sender_model in [Comment, *CONTENT_TYPES.values()]:
+    post_save.connect(index_content, sender=sender_model)
+    post_delete.connect(index_content, sender=sender_model)
+
+
+@receiver(m2m_changed, sender=Content.tags.through)
+def index_tags(sender, instance, action, reverse,  # pylint: disable=unused-argument
+               pk_set, **kwargs):
+    """Index tags
+
+    Indexes the contents whose tags changed.
+
+    :param sender: The intermediate model of the tags
+    :type sender: type
+    :param instance: The changed content or tag
+    :type instance: Content or Tag
+    :param action: The kind of the change
+    :type action: str
+    :param reverse: Whether the contents of a tag were changed
+    :type reverse: bool
+    :param pk_set: The ids of the added or removed objects
+    :type pk_set: set[int]
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    if reverse and action == 'pre_clear':
+        # The contents of the tag are unknown after it was cleared
+        instance.cleared_content_ids = list(instance.contents.values_list('pk', flat=True))
+    elif reverse and action == 'post_clear':
+        SearchDocument.index(Documents.CONTENT, instance.cleared_content_ids)
+    elif reverse and action in ('post_add', 'post_remove'):
+        SearchDocument.index(Documents.CONTENT, pk_set)
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        SearchDocument.index(Documents.CONTENT, [instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def index_tag(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Index tag
+
+    Indexes the contents of a renamed tag.
+
+    :param sender: The model of the tag
+    :type sender: type
+    :param instance: The saved tag
+    :type instance: Tag
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    SearchDocument.index(Documents.CONTENT, instance.contents.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=PDFContent)
+@receiver(post_save, sender=Latex)
+def extract_pdf(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Extract PDF
+
+    Queues the extraction of the text of a saved PDF. The worker skips the extraction if
+    the PDF did not change.
+
+    :param sender: The model of the content type
+    :type sender: type
+    :param instance: The saved content type
+    :type instance: PDFContent or Latex
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    if instance.pdf:
+        ExtractionJob.enqueue(instance.content_id)
+
+
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=Topic)
+@receiver(post_save, sender=Tag)
+def autocomplete_object(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Autocomplete object
+
+    Adds the title of a saved course, topic or tag to the autocompletion.
+
+    :param sender: The model of the object
+    :type sender: type
+    :param instance: The saved object
+    :type instance: Course or Topic or Tag
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    autocomplete_index.update(sender._meta.model_name, instance.pk, instance.title)
+
+
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=Topic)
+@receiver(post_delete, sender=Tag)
+def remove_autocomplete_object(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    """Remove autocomplete object
+
+    Removes the title of a deleted course, topic or tag from the autocompletion.
+
+    :param sender: The model of the object
+    :type sender: type
+    :param instance: The deleted object
+    :type instance: Course or Topic or Tag
+    :param kwargs: The keyword arguments
+    :type kwargs: Any
+    """
+    autocomplete_index.remove(sender._meta.model_name, instance.pk)
@@ -0,0 +1,82 @@
+"""Purpose of this file
+
+This file contains the test cases for /base/management/commands/cleantopics.py.
+"""
+
+from io import StringIO
+
+from test.test_cases import BaseCourseViewTestCase
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from base.models import Content, Topic
+
+
+class CleanTopicsTestCase(BaseCourseViewTestCase):
+    """Clean topics test case
+
+    Defines the test cases for the management command cleantopics. Topic 1 contains the
+    content of the test database, the topics 2 to 4 are part of the course structure.
+    """
+
+    def clean(self, *args):
+        """Clean
+
+        Calls the command with the given arguments.
+
+        :param args: The arguments of the command
+        :type args: str
+
+        :return: the output of the command
+        :rtype: str
+        """
+        out = StringIO()
+        call_command('cleantopics', *args, stdout=out)
+        return out.getvalue()
+
+    def test_no_deletion(self):
+        """Clean topics test case - No deletion
+
+        Tests that topics which are used in a course structure or contain contents
+        are kept.
+        """
+        self.assertIn('0 orphaned topics deleted', self.clean())
+        self.assertEqual([1, 2, 3, 4], list(Topic.objects.values_list('pk', flat=True)))
+        self.assertTrue(Content.objects.filter(topic_id=1).exists())
+
+    def test_deletion_in_batches(self):
+        """Clean topics test case - Deletion in batches
+
+        Tests that the orphaned topics are deleted in batches and the counts are reported.
+        """
+        for index in range(5):
+            Topic.objects.create(title=f'Orphan{index}', category=self.cat)
+        self.assertIn('5 orphaned topics deleted in 3 batches', self.clean('--batch-size', '2'))
+        self.assertEqual([1, 2, 3, 4], list(Topic.objects.values_list('pk', flat=True)))
+
+    def test_constant_queries(self):
+        """Clean topics test case - queries
+
+        Tests that the number of queries of the topics and their cascade depends on the
+        number of batches only. The receivers of the deleted topics (e.g. the search index)
+        are not counted.
+        """
+        Topic.objects.bulk_create(Topic(title=f'Orphan{index}', category=self.cat)
+                                  for index in range(50))
+        with CaptureQueriesContext(connection) as queries:
+            self.clean()
+        # One batch: select the ids, collect the topics and the cascade, delete them,
+        # then the final select finds no orphans
+        self.assertEqual(5, len([query for query in queries
+                                 if 'search_searchdocument' not in query['sql']]))
+
+    def test_dry_run(self):
+        """Clean topics test case - Dry run
+
+        Tests that a dry run only reports the orphaned topics.
+        """
+        Topic.objects.create(title='Orphan', category=self.cat)
+        self.assertIn('1 orphaned topics found', self.clean('--dry-run'))
+        self.assertEqual(5, Topic.objects.count())
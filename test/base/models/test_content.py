@@ -0,0 +1,210 @@
+"""Purpose of this file
+
+This file contains the test cases for /base/models/content.py.
+"""
+
+from test import utils
+
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.core.paginator import Paginator
+from django.test import TestCase, override_settings
+
+import content.models as model
+
+from base.models import Content, Course, CourseStructureEntry, Rating, Topic
+
+
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
+class ContentRatingTestCase(TestCase):
+    """Content rating test case
+
+    Defines the test cases for the denormalized ratings of a content.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database with three users.
+        """
+        utils.setup_database()
+        self.content = Content.objects.first()
+        self.profiles = [User.objects.create(username=f'user{index}').profile
+                         for index in range(3)]
+
+    def test_rate_content(self):
+        """Rate content test case
+
+        Tests that the sum, the count and the average of the ratings are updated.
+        """
+        self.assertEqual(-1, self.content.get_rate())
+        self.content.rate_content(self.profiles[0], 5)
+        self.content.rate_content(self.profiles[1], 2)
+        self.assertEqual(3, self.content.get_rate())
+        self.assertEqual(2, self.content.get_rate_amount())
+
+        content = Content.objects.get(pk=self.content.pk)
+        self.assertEqual((7, 2, 3), (content.rating_sum, content.rating_count,
+                                     content.rating_average))
+
+    def test_rate_content_again(self):
+        """Rate content test case - again
+
+        Tests that rating a content again replaces the previous rating of the user.
+        """
+        self.content.rate_content(self.profiles[0], 1)
+        self.content.rate_content(self.profiles[0], 4)
+        self.assertEqual(4, self.content.get_rate())
+        self.assertEqual(1, self.content.get_rate_count())
+        self.assertEqual(4, Rating.objects.get(content=self.content).rating)
+
+    def test_delete_rating(self):
+        """Delete rating test case
+
+        Tests that the ratings of a deleted user are removed from the aggregates.
+        """
+        self.content.rate_content(self.profiles[0], 5)
+        self.content.rate_content(self.profiles[1], 1)
+        self.profiles[0].user.delete()
+        self.content.refresh_from_db()
+        self.assertEqual(1, self.content.get_rate())
+        self.assertEqual(1, self.content.get_rate_count())
+
+    def test_save_rating(self):
+        """Save rating test case
+
+        Tests that ratings saved without rate_content, e.g. in the admin panel, update the
+        aggregates.
+        """
+        self.content.rate_content(self.profiles[0], 5)
+        rating = Rating.objects.get(content=self.content)
+        rating.rating = 2
+        rating.save()
+        Rating.objects.create(user=self.profiles[1], content=self.content, rating=4)
+        self.content.refresh_from_db()
+        self.assertEqual((6, 2, 3), (self.content.rating_sum, self.content.rating_count,
+                                     self.content.rating_average))
+
+        Rating.objects.filter(content=self.content).delete()
+        self.content.refresh_from_db()
+        self.assertEqual((0, 0, -1), (self.content.rating_sum, self.content.rating_count,
+                                      self.content.rating_average))
+
+    def test_rate_without_queries(self):
+        """Rate read test case - queries
+
+        Tests that reading the rating does not query the database.
+        """
+        self.content.rate_content(self.profiles[0], 3)
+        content = Content.objects.get(pk=self.content.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(3, content.get_rate())
+            self.assertEqual(3, content.get_rate_num())
+            self.assertEqual(1, content.get_rate_amount())
+
+    def test_sort_by_rating(self):
+        """Sort by rating test case
+
+        Tests that the contents of a topic are sorted by their average rating in one query
+        and that unrated contents come last.
+        """
+        topic = Topic.objects.first()
+        contents = [self.content] + [utils.create_content(model.TextField.TYPE)
+                                     for _ in range(2)]
+        contents[1].rate_content(self.profiles[0], 5)
+        contents[2].rate_content(self.profiles[0], 2)
+
+        with self.assertNumQueries(1):
+            ordered = list(topic.get_contents('Rating', 'None'))
+        self.assertEqual([contents[1], contents[2], contents[0]], ordered)
+
+
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
+class TopicContentsTestCase(TestCase):
+    """Topic contents test case
+
+    Defines the test cases for the method get_contents of the model Topic.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database with a LaTeX content and two text fields.
+        """
+        utils.setup_database()
+        self.topic = Topic.objects.first()
+        self.texts = [utils.create_content(model.TextField.TYPE) for _ in range(2)]
+
+    def test_filter_by_type(self):
+        """Filter test case
+
+        Tests that the contents are filtered by the type column.
+        """
+        self.assertEqual(set(self.texts), set(self.topic.get_contents('None', 'Text')))
+        self.assertEqual(1, self.topic.get_contents('None', 'Latex').count())
+        self.assertFalse(self.topic.get_contents('None', 'PDF').exists())
+        self.assertEqual(3, self.topic.get_contents(None, None).count())
+
+    def test_sort_large_topic(self):
+        """Sort test case - large topic
+
+        Tests that sorting a large topic by rating costs one query and the result can
+        be paginated.
+        """
+        profile = User.objects.first().profile
+        Content.objects.bulk_create(
+            Content(author=profile, topic=self.topic, type=model.TextField.TYPE,
+                    language='de', rating_sum=index % 5 + 1, rating_count=1,
+                    rating_average=index % 5 + 1)
+            for index in range(500))
+
+        with self.assertNumQueries(1):
+            ratings = [content.rating_average
+                       for content in self.topic.get_contents('Rating', 'Text')]
+        self.assertEqual(502, len(ratings))
+        self.assertEqual(sorted(ratings[:500], reverse=True), ratings[:500])
+        self.assertEqual([-1, -1], ratings[500:])
+
+        page = Paginator(self.topic.get_contents('Rating', 'Text'), 100).page(2)
+        self.assertEqual([4] * 100, [content.rating_average for content in page])
+
+
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
+class CourseStructureEntryTestCase(TestCase):
+    """Course structure entry test case
+
+    Defines the test cases for the model CourseStructureEntry.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database.
+        """
+        utils.setup_database()
+        self.course = Course.objects.first()
+        self.topic = Topic.objects.first()
+
+    def test_index(self):
+        """Index test case
+
+        Tests that the index is stored as the position and the sub position.
+        """
+        main = CourseStructureEntry.objects.create(course=self.course, index='3',
+                                                   topic=self.topic)
+        sub = CourseStructureEntry.objects.create(course=self.course, index='3/12',
+                                                  topic=self.topic)
+        self.assertEqual((3, 0, '3'), (main.position, main.sub_position, main.index))
+        self.assertEqual((3, 12, '3/12'), (sub.position, sub.sub_position, sub.index))
+
+    def test_order(self):
+        """Order test case
+
+        Tests that the entries are ordered numerically by the database.
+        """
+        for index in ['10', '2/10', '2', '1', '2/2', '2/1']:
+            CourseStructureEntry.objects.create(course=self.course, index=index,
+                                                topic=self.topic)
+        entries = CourseStructureEntry.objects.filter(course=self.course) \
+            .order_by('position', 'sub_position')
+        self.assertEqual(['1', '2', '2/1', '2/2', '2/10', '10'],
+                         [entry.index for entry in entries])
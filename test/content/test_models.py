@@ -5,12 +5,19 @@ This file contains the test cases for /content/models.py.
 
 import os
 
+from datetime import timedelta
+from unittest import mock
+
 from test.test_cases import MediaTestCase
 import test.utils as utils
 
+from PIL import Image
+
+from django.core.files.base import ContentFile
 from django.test import override_settings
+from django.utils import timezone
 
-from base.models import Content
+from base.models import Content, Job
 
 import content.models as model
 
@@ -39,5 +46,90 @@ class LatexTestCase(MediaTestCase):  # pylint: disable=too-few-public-methods)
         content.preview.name = preview_path
         content.save()
 
-        self.assertEqual('uploads/previews/Topic_Category.jpg', content.preview.name)
+        self.assertEqual(f'uploads/previews/{latex.file_hash()}.jpg', content.preview.name)
         self.assertTrue(bool(content.preview))
+
+
+class PreviewJobTestCase(MediaTestCase):
+    """Preview job test case
+
+    Defines the test cases for the model PreviewJob. The rendering of the PDF is simulated.
+    """
+
+    def create_pdf(self, data):
+        """Create PDF
+
+        Creates a PDF content with the given file.
+
+        :param data: The content of the file
+        :type data: bytes
+
+        :return: the content
+        :rtype: Content
+        """
+        content = utils.create_content(model.PDFContent.TYPE)
+        model.PDFContent(content=content).pdf.save('test.pdf', ContentFile(data))
+        return content
+
+    @staticmethod
+    def run_jobs():
+        """Run jobs
+
+        Runs the pending preview jobs.
+        """
+        job = model.PreviewJob.claim()
+        while job is not None:
+            job.execute()
+            job = model.PreviewJob.claim()
+
+    def test_enqueue(self):
+        """Enqueue test case
+
+        Tests that a pending preview is queued once and only for contents with a PDF.
+        """
+        content = self.create_pdf(b'%PDF-1.4 first')
+        model.PreviewJob.enqueue(content)
+        model.PreviewJob.enqueue(content)
+        model.PreviewJob.enqueue(utils.create_content(model.TextField.TYPE))
+        self.assertEqual([content.pk], list(model.PreviewJob.objects.values_list('content',
+                                                                                 flat=True)))
+
+    @mock.patch('content.models.convert_from_path',
+                return_value=[Image.new('RGB', (600, 800))])
+    def test_shared_preview(self, convert):
+        """Shared preview test case
+
+        Tests that only the first page is rendered, once for identical files and not again
+        for an unchanged file.
+        """
+        first = self.create_pdf(b'%PDF-1.4 first')
+        second = self.create_pdf(b'%PDF-1.4 first')
+        for content in (first, second, first):
+            model.PreviewJob.enqueue(content)
+        self.run_jobs()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.preview.name, second.preview.name)
+        self.assertTrue(os.path.exists(first.preview.path))
+        convert.assert_called_once_with(first.pdfcontent.pdf.path, first_page=1, last_page=1,
+                                        size=(600, None))
+        self.assertFalse(model.PreviewJob.objects.exclude(status=Job.DONE).exists())
+
+        model.PreviewJob.enqueue(first)
+        self.run_jobs()
+        convert.assert_called_once()
+
+    @override_settings(JOB_EXPIRY=60)
+    def test_cleanup(self):
+        """Cleanup test case
+
+        Tests that finished preview jobs are deleted after the expiry.
+        """
+        model.PreviewJob.enqueue(self.create_pdf(b'%PDF-1.4 first'))
+        model.PreviewJob.objects.update(status=Job.DONE,
+                                        end_date=timezone.now() - timedelta(seconds=30))
+        self.assertEqual((0, 0), model.PreviewJob.cleanup())
+        model.PreviewJob.objects.update(end_date=timezone.now() - timedelta(seconds=90))
+        self.assertEqual((0, 1), model.PreviewJob.cleanup())
+        self.assertFalse(model.PreviewJob.objects.exists())
@@ -0,0 +1,188 @@
+"""Purpose of this file
+
+This file contains the test cases for /export/cache.py.
+"""
+
+import os
+import shutil
+import tempfile
+
+from unittest import mock
+
+from test import utils
+
+from django.test import TestCase, override_settings
+
+import content.models as model
+
+import export.helper_functions as helper
+
+from export.cache import CompileCache
+
+
+class CompileCacheTestCase(TestCase):
+    """Compile cache test case
+
+    Defines the test cases for the class CompileCache.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up an empty cache directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(EXPORT_CACHE_DIR=self.directory)
+        self.settings.enable()
+
+    def tearDown(self):
+        """Tear down
+
+        Removes the cache directory.
+        """
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_key_depends_on_tex(self):
+        """Key test case - LaTeX code
+
+        Tests that the key changes if the rendered LaTeX code changes.
+        """
+        self.assertEqual(CompileCache.key(b'tex'), CompileCache.key(b'tex'))
+        self.assertNotEqual(CompileCache.key(b'tex'), CompileCache.key(b'text'))
+
+    def test_key_depends_on_assets(self):
+        """Key test case - assets
+
+        Tests that the key changes if the content of a referenced file changes.
+        """
+        path = os.path.join(self.directory, 'image.png')
+        with open(path, 'wb') as file:
+            file.write(b'first')
+        first = CompileCache.key(b'tex', [path])
+        self.assertNotEqual(CompileCache.key(b'tex'), first)
+
+        with open(path, 'wb') as file:
+            file.write(b'second version')
+        self.assertNotEqual(CompileCache.key(b'tex', [path]), first)
+
+    def test_get_put(self):
+        """Get and put test case
+
+        Tests that a stored entry can be retrieved and that hits and misses are counted.
+        """
+        stats = CompileCache.stats()
+        self.assertIsNone(CompileCache.get('missing'))
+        CompileCache.put('key', b'pdf', b'log')
+        self.assertEqual((b'pdf', b'log'), CompileCache.get('key'))
+        self.assertEqual(stats['hits'] + 1, CompileCache.stats()['hits'])
+        self.assertEqual(stats['misses'] + 1, CompileCache.stats()['misses'])
+
+    def test_evict_least_recently_used(self):
+        """Evict test case - least recently used
+
+        Tests that the least recently used entries are evicted first.
+        """
+        for index, key in enumerate(['old', 'used', 'new']):
+            CompileCache.put(key, b'x' * 10)
+            os.utime(CompileCache.path(key), (index, index))
+        # Access marks the entry as recently used
+        CompileCache.get('used')
+
+        CompileCache.evict(max_size=20)
+        self.assertIsNone(CompileCache.get('old'))
+        self.assertIsNotNone(CompileCache.get('used'))
+        self.assertIsNotNone(CompileCache.get('new'))
+
+    def test_put_file(self):
+        """Put file test case
+
+        Tests that a file is moved into the cache and can be retrieved by its path.
+        """
+        path = CompileCache.temp_path()
+        with open(path, 'wb') as file:
+            file.write(b'%PDF')
+        CompileCache.put_file('file', path, b'log')
+        self.assertFalse(os.path.exists(path))
+        pdf_path, log = CompileCache.get_file('file')
+        self.assertEqual(CompileCache.path('file'), pdf_path)
+        self.assertEqual(b'log', log)
+        self.assertEqual((b'%PDF', b'log'), CompileCache.get('file'))
+
+    def test_evict_keep(self):
+        """Evict test case - keep
+
+        Tests that the entry to keep is not evicted even if it exceeds the maximum size.
+        """
+        CompileCache.put('old', b'x' * 10)
+        CompileCache.put('new', b'y' * 10)
+        CompileCache.evict(max_size=5, keep='old')
+        self.assertIsNotNone(CompileCache.get('old'))
+        self.assertIsNone(CompileCache.get('new'))
+
+    @override_settings(EXPORT_CACHE_MAX_SIZE=100)
+    def test_evict_deferred(self):
+        """Evict test case - deferred
+
+        Tests that the cache is only scanned again after the entries stored since the
+        last scan exceed the remaining space.
+        """
+        with mock.patch.object(CompileCache, 'scan', wraps=CompileCache.scan) as scan:
+            # The first put scans, the remaining space holds 9 more entries
+            for index in range(10):
+                CompileCache.put(f'entry-{index}', b'x' * 10)
+            self.assertEqual(1, scan.call_count)
+
+            # The cache is reduced to 90 bytes, so the last entry fits without a scan
+            for index in range(10, 12):
+                CompileCache.put(f'entry-{index}', b'x' * 10)
+            self.assertEqual(2, scan.call_count)
+        self.assertIsNone(CompileCache.get('entry-0'))
+        _, total = CompileCache.scan(self.directory)
+        self.assertLessEqual(total, 100)
+
+    def test_scan_subdirectories(self):
+        """Scan test case - subdirectories
+
+        Tests that the subdirectories count towards the size and linked files only once.
+        """
+        CompileCache.put('entry', b'x' * 10, b'log')
+        directory = os.path.join(self.directory, 'manifests')
+        os.makedirs(directory)
+        os.link(CompileCache.path('entry'), os.path.join(directory, 'entry.pdf'))
+        with open(os.path.join(directory, 'other.pdf'), 'wb') as file:
+            file.write(b'y' * 20)
+
+        entries, total = CompileCache.scan(self.directory)
+        self.assertEqual(33, total)
+        # Evicting the entry only frees its log, the PDF is still pinned
+        self.assertEqual([3], [size for _, key, size in entries if key == 'entry'])
+
+
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
+class RenderCacheTestCase(TestCase):
+    """Render cache test case
+
+    Defines the test cases for the usage of the cache in Latex.render.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database.
+        """
+        utils.setup_database()
+
+    def test_render_cached(self):
+        """Render test case - cached
+
+        Tests that rendering the same document twice invokes PDF LaTeX only once.
+        """
+        content = model.Content.objects.first()
+        context = {'user': 'user', 'topic': content.topic, 'contents': [content],
+                   'export_pdf': False}
+        first = helper.Latex.render(dict(context), "content/export/base.tex", [])
+        with mock.patch('export.pool.Popen') as popen:
+            second = helper.Latex.render(dict(context), "content/export/base.tex", [])
+            popen.assert_not_called()
+        self.assertEqual(first[0], second[0])
@@ -3,19 +3,24 @@
 This file contains the test cases for /export/helper_functions.py.
 """
 
-import os
+import re
+import timeit
+
+from unittest import mock
 
 from test import utils
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 import content.models as model
 
 import export.helper_functions as helper
+import export.pool as pool
 
-from export.templatetags.cc_export_tags import tex_escape
+from export.templatetags.cc_export_tags import ret_path
 
 
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
 class LaTeXTestCase(TestCase):
     """LaTeX test case
 
@@ -28,30 +33,16 @@ class LaTeXTestCase(TestCase):
         """
         utils.setup_database()
 
-    def test_error_successful(self):
-        """Error test case - successful
-
-        Tests that the function error returns the correct errors.
-        """
-        path = os.path.dirname(__file__) + '/resources/log'
-        log = open(path, mode='rb').read()
-        errors = helper.Latex.errors(log)
-        self.assertEqual(2, len(errors))
-        error1 = \
-            tex_escape(r'! Latex Error: \begin{itemize} on input line 67 ended by \end{document}.')
-        self.assertEqual(errors[1], error1)
-        self.assertEqual(errors[0], '! Undefined control sequence.')
-
     def test_prerender_errors_template(self):
         """Prerender test case - error template
 
-        Tests that the function prerender pre renders the content of the error template correctly.
+        Tests that the function prerender pre renders the static error template.
         """
-        pre_render = helper.Latex.pre_render(content=42,
+        pre_render = helper.Latex.pre_render(content=None,
                                              export_flag=False,
                                              template_type=helper.Latex.error_template,
                                              no_error=False)
-        self.assertIn('42 errors were found during compilation.',
+        self.assertIn('Errors were found during compilation.',
                       pre_render.decode(helper.Latex.encoding))
 
     def test_prerender_latex_export(self):
@@ -65,6 +56,101 @@ class LaTeXTestCase(TestCase):
         self.assertIn(latex_content.textfield, pre_render.decode(helper.Latex.encoding))
         self.assertIn(content.description, pre_render.decode(helper.Latex.encoding))
 
+    def test_parse_errors(self):
+        """Parse errors test case
+
+        Tests that the errors are extracted with their line and content.
+        """
+        tex = b'\\documentclass{article}\n\\begin{document}\n%%% Content 7\nText\n\\foo\n'
+        log = b'This is pdfTeX\n! Undefined control sequence.\nl.5 \\foo\n\n' \
+              b'! Emergency stop.\n<*> texput.tex\n'
+        errors = helper.Latex.parse_errors(log, tex)
+        self.assertEqual([helper.LatexError(5, 'Undefined control sequence.', 7),
+                          helper.LatexError(None, 'Emergency stop.', None)], errors)
+
+    def test_render_error_single_run(self):
+        """Render test case - error
+
+        Tests that a failing compilation only runs PDF LaTeX once and reuses the
+        compiled error document.
+        """
+        content = utils.create_content(model.Latex.TYPE)
+        latex = model.Latex.objects.create(textfield='\\undefinedcommandxyz', content=content)
+        context = {'user': 'user', 'topic': content.topic, 'contents': [content],
+                   'export_pdf': False}
+        pdf, _, _ = helper.Latex.render(dict(context), "content/export/base.tex", [])
+        self.assertIsNotNone(pdf)
+
+        # The error moves to another line, the error document stays the same
+        latex.textfield = 'Text\n\n\\undefinedcommandxyz'
+        latex.save()
+        with mock.patch('export.pool.Popen', wraps=pool.Popen) as popen:
+            pdf, _, _ = helper.Latex.render(dict(context), "content/export/base.tex", [])
+        self.assertIsNotNone(pdf)
+        self.assertEqual(1, popen.call_count)
+
+    def test_compile_timeout(self):
+        """Compile test case - timeout
+
+        Tests that a timeout is reported as error, but not cached unlike LaTeX errors.
+        """
+        tex = b'\\documentclass{article}\\begin{document}Timeout\\end{document}'
+
+        def error_tpl():
+            return helper.Latex.pre_render(None, False, helper.Latex.error_template, False) \
+                + b'\\end{document}'
+
+        output = (b'! Emergency stop: the compilation exceeded the time limit.\n', b'')
+        run = helper.Latex.run
+
+        def timeout(code, *args):
+            # Only the compilation of the code times out, not the one of the error template
+            if code == tex:
+                raise pool.CompileTimeout(output)
+            return run(code, *args)
+
+        with mock.patch('export.helper_functions.Latex.run', side_effect=timeout):
+            pdf, pdflatex_output, _, key, errors = helper.Latex.compile(tex, error_tpl=error_tpl)
+        self.assertIsNotNone(pdf)
+        self.assertEqual(output, pdflatex_output)
+        self.assertEqual(1, len(errors))
+        self.assertIsNone(helper.CompileCache.get(key))
+
+        # A LaTeX error of the same code is cached
+        def error(code, *args):
+            return run(code.replace(b'Timeout', b'\\undefinedcommandxyz'), *args)
+
+        with mock.patch('export.helper_functions.Latex.run', side_effect=error):
+            _, _, _, _, errors = helper.Latex.compile(tex, error_tpl=error_tpl)
+        self.assertEqual('Undefined control sequence.', errors[0].message)
+        self.assertIsNotNone(helper.CompileCache.get(key))
+
+    def test_prerender_attachments(self):
+        """Prerender test case - attachments
+
+        Tests that the image placeholders are replaced by the paths of the attachments.
+        """
+        content = utils.create_content(model.Latex.TYPE)
+        model.Latex.objects.create(content=content,
+                                   textfield='\\includegraphics[width=1cm]{Image-1}\n'
+                                             '\\includegraphics{Image-0}\n'
+                                             '\\includegraphics{Image-2}')
+        utils.generate_attachment(content, 2)
+        paths = [ret_path(attachment.image.url) for attachment in content.ImageAttachments.all()]
+        pre_render = helper.Latex.pre_render(content, False).decode(helper.Latex.encoding)
+        self.assertIn(f'\\includegraphics[width=1cm]{{{paths[1]}}}', pre_render)
+        self.assertIn(f'\\includegraphics{{{paths[0]}}}', pre_render)
+        self.assertIn('\\includegraphics{Image-2}', pre_render)
+
+    def test_resolve_placeholders(self):
+        """Resolve placeholders test case
+
+        Tests that escaped braces and placeholders are resolved in one pass.
+        """
+        rendered_tpl = '{~~/a.png} \\includegraphics{~~Image-0} \\includegraphics[h]{Image-1}'
+        self.assertEqual('{/a.png} \\includegraphics{/0.png} \\includegraphics[h]{Image-1}',
+                         helper.Latex.resolve_placeholders(rendered_tpl, ['/0.png']))
+
     def test_prerender_latex_no_export(self):
         """Prerender test case - LaTeX no export
 
@@ -76,3 +162,128 @@ class LaTeXTestCase(TestCase):
         pre_render = helper.Latex.pre_render(content, False)
         self.assertIn(latex_content.textfield, pre_render.decode(helper.Latex.encoding))
         self.assertNotIn(content.description, pre_render.decode(helper.Latex.encoding))
+
+
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
+class RenderFragmentsTestCase(TestCase):
+    """Render fragments test case
+
+    Defines the test cases for the function render_fragments of the class Latex.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database with two LaTeX contents.
+        """
+        utils.setup_database()
+        content = utils.create_content(model.Latex.TYPE)
+        model.Latex.objects.create(textfield='Second content', content=content)
+        contents = list(model.Content.objects.order_by('pk'))
+        self.context = {'user': 'user', 'course': 'course', 'export_pdf': True,
+                        'contents': contents}
+
+    def render(self):
+        """Render
+
+        Renders the fragments of the contents and counts the PDF LaTeX calls.
+
+        :return: the result of render_fragments and the number of PDF LaTeX calls
+        :rtype: tuple[tuple[bytes, tuple[bytes, bytes], bytes], int]
+        """
+        with mock.patch('export.pool.Popen', wraps=pool.Popen) as popen:
+            result = helper.Latex.render_fragments(dict(self.context), "content/export/base.tex")
+        return result, popen.call_count
+
+    def test_render_fragments(self):
+        """Render fragments test case - merge
+
+        Tests that every content is included as its own PDF with an entry in the table
+        of contents.
+        """
+        (pdf, _, tex), _ = self.render()
+        tex = tex.decode(helper.Latex.encoding)
+        self.assertIsNotNone(pdf)
+        self.assertIn(r'\tableofcontents', tex)
+        self.assertEqual(2, tex.count(r'\includepdf'))
+        # Both contents belong to the same topic
+        self.assertEqual(1, tex.count('addtotoc'))
+
+    def test_render_fragments_stream(self):
+        """Render fragments test case - stream
+
+        Tests that the merged PDF is returned as the path of the cache entry.
+        """
+        pdf, _, _ = helper.Latex.render_fragments(dict(self.context),
+                                                  "content/export/base.tex", stream=True)
+        self.assertTrue(pdf.startswith(utils.EXPORT_CACHE_DIR))
+        with open(pdf, 'rb') as file:
+            self.assertTrue(file.read().startswith(b'%PDF'))
+
+    def test_render_fragments_reuse(self):
+        """Render fragments test case - reuse
+
+        Tests that only the changed content is recompiled after an edit.
+        """
+        self.render()
+        latex = model.Latex.objects.get(content=self.context['contents'][1])
+        latex.textfield = 'Changed content'
+        latex.save()
+        self.context['contents'] = list(model.Content.objects.order_by('pk'))
+
+        # One pass for the changed fragment, two passes for the merge
+        _, calls = self.render()
+        self.assertEqual(3, calls)
+
+
+class PlaceholderBenchmarkTestCase(TestCase):
+    """Placeholder benchmark test case
+
+    Benchmarks the resolution of the placeholders of a content with many image attachments
+    against the former substitution with one pass per attachment.
+    """
+    attachment_count = 60
+
+    def setUp(self):
+        """Setup
+
+        Sets up a rendered template which uses every attachment twice.
+        """
+        self.paths = [f'/media/uploads/contents/image-{idx}.png'
+                      for idx in range(self.attachment_count)]
+        lines = ['Some text with {~~escaped} braces and $x^2$.'] * 200
+        for idx in range(self.attachment_count):
+            lines.append(f'\\includegraphics[width=0.5\\textwidth]{{Image-{idx}}}')
+            lines.append(f'\\includegraphics{{Image-{idx}}}')
+        self.rendered_tpl = '\n'.join(lines)
+
+    def substitute_per_attachment(self):
+        """Substitute per attachment
+
+        The former implementation: one substitution over the whole template per attachment.
+
+        :return: the rendered template with the resolved placeholders
+        :rtype: str
+        """
+        rendered_tpl = re.sub('{~~', '{', self.rendered_tpl)
+        for idx, path in enumerate(self.paths):
+            rendered_tpl = re.sub(rf"\\includegraphics(\[.*])?{{Image-{idx}}}",
+                                  rf"\\includegraphics\1{{{path}}}",
+                                  rendered_tpl)
+        return rendered_tpl
+
+    def test_benchmark(self):
+        """Benchmark test case
+
+        Tests that the single pass produces the same code and is faster.
+        """
+        single_pass = helper.Latex.resolve_placeholders(self.rendered_tpl, self.paths)
+        self.assertEqual(self.substitute_per_attachment(), single_pass)
+        self.assertNotIn('Image-', single_pass)
+
+        number = 20
+        per_attachment_time = timeit.timeit(self.substitute_per_attachment, number=number)
+        single_pass_time = timeit.timeit(
+            lambda: helper.Latex.resolve_placeholders(self.rendered_tpl, self.paths),
+            number=number)
+        self.assertLess(single_pass_time, per_attachment_time)
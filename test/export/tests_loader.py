@@ -0,0 +1,146 @@
+"""Purpose of this file
+
+This file contains the test cases for /export/loader.py.
+"""
+
+from test import utils
+from test.test_cases import MediaTestCase
+
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import content.models as model
+
+from base.models import Category, Course, CourseStructureEntry, Favorite, Topic
+
+from export.helper_functions import Latex
+from export.loader import ExportLoader
+
+
+class ExportLoaderTestCase(MediaTestCase):
+    """Export loader test case
+
+    Defines the test cases for the class ExportLoader.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database with a category for the courses.
+        """
+        super().setUp()
+        self.category = Category.objects.get()
+        self.profile = User.objects.first().profile
+
+    def create_course(self, topic_count):
+        """Create course
+
+        Creates a course with the given number of topics. Each topic contains a text,
+        a LaTeX content with an image attachment and a YouTube video.
+
+        :param topic_count: The number of topics
+        :type topic_count: int
+
+        :return: the created course
+        :rtype: Course
+        """
+        course = Course.objects.create(title=f'Course {topic_count}', category=self.category)
+        for index in range(1, topic_count + 1):
+            topic = Topic.objects.create(title=f'Topic {index}', category=self.category)
+            CourseStructureEntry.objects.create(course=course, index=str(index), topic=topic)
+
+            content = utils.create_content(model.TextField.TYPE)
+            content.topic = topic
+            content.save()
+            model.TextField.objects.create(content=content, textfield=f'Text {index}')
+
+            content = utils.create_content(model.Latex.TYPE)
+            content.topic = topic
+            content.save()
+            model.Latex.objects.create(content=content, textfield=r'\includegraphics{Image-0}')
+            utils.generate_attachment(content, 1)
+
+            content = utils.create_content(model.YTVideoContent.TYPE)
+            content.topic = topic
+            content.save()
+            model.YTVideoContent.objects.create(content=content,
+                                                url='https://www.youtube.com/watch?v=test')
+        return course
+
+    @staticmethod
+    def count_queries(function, *args):
+        """Count queries
+
+        Calls the function and counts its queries.
+
+        :param function: The function to call
+        :type function: Callable
+        :param args: The arguments of the function
+        :type args: Any
+
+        :return: the result of the function and the number of queries
+        :rtype: tuple[Any, int]
+        """
+        with CaptureQueriesContext(connection) as queries:
+            result = function(*args)
+        return result, len(queries)
+
+    def test_course_contents_constant_queries(self):
+        """Course contents test case - queries
+
+        Benchmarks the number of queries of a small and a large course, the number must
+        not depend on the number of topics and contents.
+        """
+        small, small_queries = self.count_queries(ExportLoader.course_contents,
+                                                  self.create_course(1))
+        large, large_queries = self.count_queries(ExportLoader.course_contents,
+                                                  self.create_course(20))
+        self.assertEqual(3, len(small))
+        self.assertEqual(60, len(large))
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual(3, large_queries)
+
+    def test_render_without_queries(self):
+        """Render test case - queries
+
+        Tests that rendering the loaded contents does not query the database.
+        """
+        contents = ExportLoader.course_contents(self.create_course(5))
+        with self.assertNumQueries(0):
+            for content in contents:
+                Latex.pre_render(content, True)
+            Latex.assets(contents)
+
+    def test_course_contents_order(self):
+        """Course contents test case - order
+
+        Tests that the contents are ordered by the index of the course structure.
+        """
+        course = self.create_course(0)
+        titles = {'2': 'Second', '10': 'Tenth', '2/1': 'Sub', '1': 'First'}
+        for index, title in titles.items():
+            topic = Topic.objects.create(title=title, category=self.category)
+            CourseStructureEntry.objects.create(course=course, index=index, topic=topic)
+            content = utils.create_content(model.TextField.TYPE)
+            content.topic = topic
+            content.save()
+
+        contents = ExportLoader.course_contents(course)
+        self.assertEqual(['First', 'Second', 'Sub', 'Tenth'],
+                         [content.topic.title for content in contents])
+
+    def test_favorite_contents(self):
+        """Favorite contents test case
+
+        Tests that only the favorites of the user are loaded in constant queries.
+        """
+        course = self.create_course(3)
+        contents = ExportLoader.course_contents(course)
+        for content in contents[::2]:
+            Favorite.objects.create(user=self.profile, course=course, content=content)
+
+        favorites, queries = self.count_queries(ExportLoader.favorite_contents,
+                                                self.profile, course)
+        self.assertEqual(contents[::2], favorites)
+        self.assertEqual(3, queries)
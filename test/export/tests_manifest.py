@@ -0,0 +1,168 @@
+"""Purpose of this file
+
+This file contains the test cases for the incremental coursebook export (ExportManifest).
+"""
+
+import os
+
+from datetime import timedelta
+from unittest import mock
+
+from test import utils
+from test.test_cases import MediaTestCase
+
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.test import override_settings
+from django.utils import timezone
+
+import content.models as model
+
+from base.models import Course, CourseStructureEntry, Favorite, Topic
+
+import export.pool as pool
+
+from export.compiler import pdf_compile
+from export.models import ExportJob, ExportManifest
+
+
+@override_settings(EXPORT_FRAGMENTS=True)
+class ExportManifestTestCase(MediaTestCase):
+    """Export manifest test case
+
+    Defines the test cases for the incremental export of a coursebook.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up a course with three favorite LaTeX contents.
+        """
+        super().setUp()
+        self.user = User.objects.first()
+        self.course = Course.objects.first()
+        topic = Topic.objects.first()
+        CourseStructureEntry.objects.create(course=self.course, index='1', topic=topic)
+        self.latex = []
+        for index in range(3):
+            content = utils.create_content(model.Latex.TYPE)
+            self.latex.append(model.Latex.objects.create(content=content,
+                                                         textfield=f'Section {index}'))
+            Favorite.objects.create(user=self.user.profile, course=self.course, content=content)
+
+    def export(self):
+        """Export
+
+        Exports the coursebook and counts the PDF LaTeX calls.
+
+        :return: the number of PDF LaTeX calls
+        :rtype: int
+        """
+        manifest = ExportManifest.objects.get_or_create(user=self.user.profile,
+                                                        course=self.course)[0]
+        with mock.patch('export.pool.Popen', wraps=pool.Popen) as popen:
+            pdf, _, _ = pdf_compile(self.user, self.course.pk, False, manifest=manifest)
+        self.assertIsNotNone(pdf)
+        return popen.call_count
+
+    def test_manifest(self):
+        """Manifest test case
+
+        Tests that the manifest lists the exported contents.
+        """
+        self.export()
+        manifest = ExportManifest.objects.get(user=self.user.profile, course=self.course)
+        sections = manifest.get_sections()
+        self.assertEqual([latex.content_id for latex in self.latex],
+                         [content_id for content_id, _ in sections])
+        for _, revision in sections:
+            self.assertIsNotNone(manifest.fragment(revision))
+
+    def test_only_changed_sections(self):
+        """Incremental export test case
+
+        Tests that only the changed section is recompiled, even if the compile cache
+        was cleared in the meantime.
+        """
+        self.export()
+        for name in os.listdir(utils.EXPORT_CACHE_DIR):
+            if name.endswith('.pdf'):
+                os.remove(os.path.join(utils.EXPORT_CACHE_DIR, name))
+
+        self.latex[1].textfield = 'Changed section'
+        self.latex[1].save()
+        # One pass for the changed section, two passes for the merge
+        self.assertEqual(3, self.export())
+
+    def test_removed_section(self):
+        """Incremental export test case - removed section
+
+        Tests that the section of a removed favorite is released.
+        """
+        self.export()
+        manifest = ExportManifest.objects.get()
+        revision = manifest.get_sections()[0][1]
+        Favorite.objects.filter(content=self.latex[0].content).delete()
+        self.export()
+        manifest.refresh_from_db()
+        self.assertEqual(2, len(manifest.get_sections()))
+        self.assertIsNone(manifest.fragment(revision))
+
+    def test_delete_manifest(self):
+        """Delete test case
+
+        Tests that the pinned sections are released if the manifest is deleted.
+        """
+        self.export()
+        manifest = ExportManifest.objects.get()
+        directory = manifest.directory()
+        manifest.delete()
+        self.assertFalse(os.path.exists(directory))
+
+    def test_cleanup(self):
+        """Cleanup test case
+
+        Tests that the expired manifests and orphaned pinned sections are released.
+        """
+        self.export()
+        manifest = ExportManifest.objects.get()
+        directory = manifest.directory()
+        orphan = os.path.join(os.path.dirname(directory), '0-0')
+        os.makedirs(orphan)
+        self.assertEqual(0, ExportManifest.cleanup())
+        self.assertTrue(os.path.exists(directory))
+        self.assertFalse(os.path.exists(orphan))
+
+        ExportManifest.objects.update(update_date=timezone.now() - timedelta(days=31))
+        self.assertEqual(1, ExportManifest.cleanup())
+        self.assertFalse(os.path.exists(directory))
+
+    def export_job(self):
+        """Export job
+
+        Exports the coursebook with an export job.
+
+        :return: the executed export job
+        :rtype: ExportJob
+        """
+        job = ExportJob.objects.create(course=self.course, user=self.user.profile,
+                                       exp_all=False, file_name='coursebook')
+        job.execute()
+        self.assertEqual(ExportJob.DONE, job.status)
+        return job
+
+    def test_job_manifest(self):
+        """Manifest test case - job
+
+        Tests that the export job of a coursebook creates the manifest.
+        """
+        self.export_job()
+        self.assertEqual(3, len(ExportManifest.objects.get().get_sections()))
+
+    @override_settings(EXPORT_FRAGMENTS=False)
+    def test_no_fragments(self):
+        """Manifest test case - no fragments
+
+        Tests that exporting without fragments does not create a manifest.
+        """
+        self.export_job()
+        self.assertFalse(ExportManifest.objects.exists())
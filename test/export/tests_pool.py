@@ -0,0 +1,170 @@
+"""Purpose of this file
+
+This file contains the test cases for /export/pool.py.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from unittest import mock
+
+from test.test_cases import MediaTestCase
+
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+import export.pool as pool
+
+from export.pool import CompilePool, CompileTimeout
+
+
+class FakeProcess:
+    """Fake process
+
+    Simulates a PDF LaTeX process and records the number of concurrent processes.
+    """
+    lock = threading.Lock()
+    running = 0
+    max_running = 0
+
+    def __init__(self, *args, **kwargs):
+        """Initializer
+
+        Starts the fake process.
+
+        :param args: The arguments of Popen
+        :type args: Any
+        :param kwargs: The keyword arguments of Popen
+        :type kwargs: Any
+        """
+        self.pid = 0
+        with FakeProcess.lock:
+            FakeProcess.running += 1
+            FakeProcess.max_running = max(FakeProcess.max_running, FakeProcess.running)
+
+    def communicate(self, tex=None, timeout=None):
+        """Communicate
+
+        Waits a moment and returns the input as output.
+
+        :param tex: The input
+        :type tex: bytes
+        :param timeout: The timeout in seconds
+        :type timeout: float
+
+        :return: the output (stdout, stderr)
+        :rtype: tuple[bytes, bytes]
+        """
+        time.sleep(0.05)
+        with FakeProcess.lock:
+            FakeProcess.running -= 1
+        return tex, b''
+
+
+class CompilePoolTestCase(TestCase):
+    """Compile pool test case
+
+    Defines the test cases for the class CompilePool.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up an empty slot directory.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(EXPORT_POOL_DIR=self.directory, EXPORT_POOL_SIZE=2)
+        self.settings.enable()
+
+    def tearDown(self):
+        """Tear down
+
+        Removes the slot directory.
+        """
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_run(self):
+        """Run test case
+
+        Tests that the process receives the input and the output is returned.
+        """
+        stdout, _ = CompilePool.run(['cat'], b'tex', self.directory)
+        self.assertEqual(b'tex', stdout)
+
+    def test_concurrency(self):
+        """Concurrency test case
+
+        Tests that no more processes than the size of the pool run at the same time.
+        """
+        FakeProcess.max_running = 0
+        with mock.patch('export.pool.Popen', FakeProcess):
+            threads = [threading.Thread(target=CompilePool.run, args=(['pdflatex'], b'', '.'))
+                       for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(2, FakeProcess.max_running)
+        self.assertEqual(0, CompilePool.stats()['running'])
+        self.assertEqual(0, CompilePool.stats()['queue_depth'])
+
+    def test_host_slot(self):
+        """Host slot test case
+
+        Tests that the slot file is locked while the slot is held and released afterwards.
+        """
+        if pool.fcntl is None:
+            self.skipTest('File locks are not supported')
+        path = os.path.join(self.directory, 'slot-0.lock')
+        with CompilePool.slot():
+            with open(path, 'a', encoding='utf-8') as slot_file:
+                with self.assertRaises(OSError):
+                    pool.fcntl.flock(slot_file, pool.fcntl.LOCK_EX | pool.fcntl.LOCK_NB)
+        with open(path, 'a', encoding='utf-8') as slot_file:
+            pool.fcntl.flock(slot_file, pool.fcntl.LOCK_EX | pool.fcntl.LOCK_NB)
+
+    @override_settings(EXPORT_POOL_TIMEOUT=0.1)
+    def test_timeout(self):
+        """Timeout test case
+
+        Tests that a process exceeding the time limit is killed and reported as timeout.
+        """
+        timeouts = CompilePool.stats()['timeouts']
+        with self.assertRaises(CompileTimeout) as context:
+            CompilePool.run(['sleep', '10'], b'', self.directory)
+        self.assertIn(b'! Emergency stop', context.exception.output[0])
+        self.assertEqual(timeouts + 1, CompilePool.stats()['timeouts'])
+
+
+class ExportMetricsTestCase(MediaTestCase):
+    """Export metrics test case
+
+    Defines the test cases for the metrics view.
+    """
+
+    def test_metrics_forbidden(self):
+        """Metrics test case - forbidden
+
+        Tests that users without administrator rights are redirected to the login.
+        """
+        response = self.client.get(reverse('frontend:export-metrics'))
+        self.assertEqual(302, response.status_code)
+
+    def test_metrics(self):
+        """Metrics test case
+
+        Tests that the metrics of the pool and the cache are returned to administrators.
+        """
+        user = User.objects.first()
+        user.is_superuser = True
+        user.save()
+        response = self.client.get(reverse('frontend:export-metrics'))
+        data = response.json()
+        self.assertIn('queue_depth', data['pool'])
+        self.assertIn('latency_avg', data['pool'])
+        self.assertIn('hits', data['cache'])
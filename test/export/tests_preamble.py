@@ -0,0 +1,101 @@
+"""Purpose of this file
+
+This file contains the test cases for /export/preamble.py.
+"""
+
+import os
+import shutil
+import tempfile
+
+from unittest import mock
+
+from django.template.loader import get_template
+from django.test import TestCase, override_settings
+
+import export.pool as pool
+
+from export.helper_functions import Latex
+from export.preamble import Preamble
+
+
+class PreambleTestCase(TestCase):
+    """Precompiled preamble test case
+
+    Defines the test cases for the class Preamble.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up an empty cache directory and renders the export template.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.settings = override_settings(EXPORT_CACHE_DIR=self.directory,
+                                          EXPORT_PRECOMPILED_PREAMBLE=True)
+        self.settings.enable()
+        self.tex = get_template("content/export/base.tex").render(
+            {'user': 'user', 'topic': 'topic', 'export_pdf': False}).encode(Latex.encoding) \
+            + b'Text\n\\end{document}'
+
+    def tearDown(self):
+        """Tear down
+
+        Removes the cache directory.
+        """
+        self.settings.disable()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_split(self):
+        """Split test case
+
+        Tests that the template is split at the marker and the remaining code keeps
+        the line numbers.
+        """
+        preamble, body = Preamble.split(self.tex)
+        self.assertIn(b'\\documentclass', preamble)
+        self.assertNotIn(b'\\begin{document}', preamble)
+        self.assertEqual(self.tex.count(b'\n'), body.count(b'\n'))
+        self.assertTrue(body.lstrip(b'\n').startswith(Preamble.marker))
+        self.assertIsNone(Preamble.split(b'\\documentclass{article}'))
+
+    def test_format_reused(self):
+        """Format test case - reused
+
+        Tests that the format is built once and reused for the next compilation.
+        """
+        preamble, _ = Preamble.split(self.tex)
+        path = Preamble.format(preamble)
+        self.assertTrue(os.path.exists(path + Preamble.suffix))
+        with mock.patch.object(Preamble, 'build') as build:
+            self.assertEqual(path, Preamble.format(preamble))
+            build.assert_not_called()
+
+    def test_format_rebuilt(self):
+        """Format test case - rebuilt
+
+        Tests that a changed preamble builds a new format.
+        """
+        preamble, _ = Preamble.split(self.tex)
+        changed = preamble + b'\\usepackage{enumerate}\n'
+        self.assertNotEqual(Preamble.format(preamble), Preamble.format(changed))
+
+    def test_run_with_format(self):
+        """Run test case - format
+
+        Tests that PDF LaTeX starts from the format and still produces a PDF.
+        """
+        with mock.patch('export.pool.Popen', wraps=pool.Popen) as popen:
+            pdf, _ = Latex.run(self.tex)
+        self.assertIsNotNone(pdf)
+        args = popen.call_args[0][0]
+        self.assertTrue(any(arg.startswith('-fmt=') for arg in args))
+
+    @override_settings(EXPORT_PRECOMPILED_PREAMBLE=False)
+    def test_run_without_format(self):
+        """Run test case - disabled
+
+        Tests that the whole code is compiled if the format is disabled.
+        """
+        args, tex = Preamble.args(self.tex)
+        self.assertEqual(['pdflatex'], args)
+        self.assertEqual(self.tex, tex)
@@ -0,0 +1,200 @@
+"""Purpose of this file
+
+This file contains the test cases for /export/views.py.
+"""
+
+import os
+
+from datetime import timedelta
+from unittest import mock
+
+from test.test_cases import MediaTestCase
+
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from base.models import Course
+
+from export.models import ExportJob
+
+
+class ExportJobTestCase(MediaTestCase):
+    """Export job test case
+
+    Defines the test cases for the export job views and the worker.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the test database and the urls of the course.
+        """
+        super().setUp()
+        self.course = Course.objects.first()
+        self.path = reverse('frontend:export-course', args=(self.course.pk,))
+
+    def test_queue_export(self):
+        """Queue export test case
+
+        Tests that the export creates a pending job and redirects to its progress page.
+        """
+        response = self.client.get(self.path)
+        job = ExportJob.objects.get()
+        self.assertEqual(ExportJob.PENDING, job.status)
+        self.assertTrue(job.exp_all)
+        self.assertEqual(self.course.title, job.file_name)
+        self.assertRedirects(response, reverse('frontend:export-job',
+                                               args=(self.course.pk, job.pk)))
+
+    def test_queue_export_reuse(self):
+        """Queue export test case - reuse
+
+        Tests that exporting the same course again while waiting reuses the job.
+        """
+        self.client.get(self.path)
+        self.client.get(self.path)
+        self.assertEqual(1, ExportJob.objects.count())
+
+    def test_queue_export_stale(self):
+        """Queue export test case - stale
+
+        Tests that a job abandoned by a crashed worker is not reused and is failed by the
+        next worker.
+        """
+        self.client.get(self.path)
+        ExportJob.objects.update(status=ExportJob.RUNNING,
+                                 start_date=timezone.now() - timedelta(days=1))
+        self.client.get(self.path)
+        self.assertEqual(2, ExportJob.objects.count())
+
+        with mock.patch('export.models.ExportJob.run'):
+            call_command('runworker', once=True, stdout=mock.MagicMock())
+        self.assertEqual([ExportJob.FAILED, ExportJob.DONE],
+                         list(ExportJob.objects.order_by('pk').values_list('status', flat=True)))
+
+    def test_expired(self):
+        """Expired test case
+
+        Tests that the worker deletes expired exports with their PDFs.
+        """
+        self.client.get(self.path)
+        call_command('runworker', once=True, stdout=mock.MagicMock())
+        path = ExportJob.objects.get().pdf.path
+        self.assertTrue(os.path.exists(path))
+
+        ExportJob.objects.update(end_date=timezone.now() - timedelta(days=30))
+        call_command('runworker', once=True, stdout=mock.MagicMock())
+        self.assertFalse(ExportJob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_status_pending(self):
+        """Status test case - pending
+
+        Tests that the status of a pending job contains no download url.
+        """
+        self.client.get(self.path)
+        job = ExportJob.objects.get()
+        response = self.client.get(reverse('frontend:export-job-status',
+                                           args=(self.course.pk, job.pk)))
+        self.assertEqual({'status': 'pending', 'progress': 0, 'finished': False,
+                          'download_url': None, 'errors': []}, response.json())
+
+    def test_download_pending(self):
+        """Download test case - pending
+
+        Tests that downloading a pending job redirects to the progress page.
+        """
+        self.client.get(self.path)
+        job = ExportJob.objects.get()
+        response = self.client.get(reverse('frontend:export-job-download',
+                                           args=(self.course.pk, job.pk)))
+        self.assertRedirects(response, reverse('frontend:export-job',
+                                               args=(self.course.pk, job.pk)))
+
+    def test_worker(self):
+        """Worker test case
+
+        Tests that the worker compiles the export and that the PDF can be downloaded.
+        """
+        self.client.get(self.path)
+        call_command('runworker', once=True, stdout=mock.MagicMock())
+        job = ExportJob.objects.get()
+        self.assertEqual(ExportJob.DONE, job.status)
+        self.assertEqual(100, job.progress)
+
+        response = self.client.get(reverse('frontend:export-job-download',
+                                           args=(self.course.pk, job.pk)))
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/pdf', response['Content-Type'])
+
+    def test_worker_failed(self):
+        """Worker test case - failed
+
+        Tests that a failed compilation shows the rendering error and lists its errors.
+        """
+        self.client.get(self.path)
+        log = b'! Undefined control sequence.\nl.3 \\foo\n'
+        tex = b'\\begin{document}\n%%% Content 7\n\\foo\n'
+        with mock.patch('export.models.pdf_compile', return_value=(None, (log, b''), tex)):
+            call_command('runworker', once=True, stdout=mock.MagicMock())
+        job = ExportJob.objects.get()
+        self.assertEqual(ExportJob.FAILED, job.status)
+        response = self.client.get(reverse('frontend:export-job-status',
+                                           args=(self.course.pk, job.pk)))
+        self.assertEqual([{'line': 3, 'message': 'Undefined control sequence.', 'content': 7}],
+                         response.json()['errors'])
+
+        response = self.client.get(reverse('frontend:export-job-download',
+                                           args=(self.course.pk, job.pk)))
+        self.assertTemplateUsed(response, 'frontend/coursebook/rendering-error.html')
+
+    def download(self, **headers):
+        """Download
+
+        Exports the course with the worker if not done yet and downloads the PDF.
+
+        :param headers: The headers of the request
+        :type headers: str
+
+        :return: the response of the download
+        :rtype: HttpResponseBase
+        """
+        if not ExportJob.objects.exists():
+            self.client.get(self.path)
+            call_command('runworker', once=True, stdout=mock.MagicMock())
+        job = ExportJob.objects.get()
+        return self.client.get(reverse('frontend:export-job-download',
+                                       args=(self.course.pk, job.pk)), **headers)
+
+    def test_download_range(self):
+        """Download test case - range
+
+        Tests that a byte range of the PDF can be downloaded.
+        """
+        pdf = b''.join(self.download().streaming_content)
+        response = self.download(HTTP_RANGE='bytes=2-5')
+        self.assertEqual(206, response.status_code)
+        self.assertEqual(f'bytes 2-5/{len(pdf)}', response['Content-Range'])
+        self.assertEqual(pdf[2:6], b''.join(response.streaming_content))
+
+        response = self.download(HTTP_RANGE='bytes=-4')
+        self.assertEqual(pdf[-4:], b''.join(response.streaming_content))
+
+    def test_download_range_not_satisfiable(self):
+        """Download test case - range not satisfiable
+
+        Tests that a range beyond the end of the PDF is rejected.
+        """
+        response = self.download(HTTP_RANGE='bytes=100000000-')
+        self.assertEqual(416, response.status_code)
+
+    def test_download_not_modified(self):
+        """Download test case - not modified
+
+        Tests that the PDF is not sent again if the browser has the current version.
+        """
+        response = self.download()
+        self.assertEqual('bytes', response['Accept-Ranges'])
+        response = self.download(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(304, response.status_code)
@@ -0,0 +1,165 @@
+"""Purpose of this file
+
+This file contains the test cases for /frontend/duplicator.py.
+"""
+
+from test import utils
+from test.test_cases import BaseCourseViewTestCase
+
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+import content.models as model
+
+from base.models import Content, Course, CourseStructureEntry, Tag, Topic
+from content.attachment.models import ImageAttachment
+
+from frontend.duplicator import CourseDuplicator
+from frontend.models import DuplicationJob
+
+from search.documents import Documents
+from search.models import SearchDocument
+
+
+class CourseDuplicatorTestCase(BaseCourseViewTestCase):
+    """Course duplicator test case
+
+    Defines the test cases for the class CourseDuplicator.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up a text with a tag and an image attachment in topic 2 of the course.
+        """
+        super().setUp()
+        self.text = utils.create_content(model.TextField.TYPE)
+        self.text.topic = self.topic2
+        self.text.save()
+        self.text.tags.add(Tag.objects.create(title='Tag'))
+        model.TextField.objects.create(content=self.text, textfield='Text', source='src')
+        utils.generate_attachment(self.text, 1)
+        self.target = Course.objects.create(title='Copy', category=self.cat)
+
+    def structure(self, course):
+        """Structure
+
+        Returns the indices and topic titles of the structure of the course.
+
+        :param course: The course
+        :type course: Course
+
+        :return: the indices and topic titles
+        :rtype: list[tuple[str, str]]
+        """
+        entries = CourseStructureEntry.objects.filter(course=course) \
+            .select_related('topic').order_by('position', 'sub_position')
+        return [(entry.index, entry.topic.title) for entry in entries]
+
+    def test_duplicate_structure(self):
+        """Duplicate test case - structure
+
+        Tests that the structure is copied and the topics are shared.
+        """
+        CourseDuplicator.duplicate(self.course1, self.target)
+        self.assertEqual(self.structure(self.course1), self.structure(self.target))
+        self.assertEqual(set(self.course1.topics.all()), set(self.target.topics.all()))
+        self.assertEqual(4, Topic.objects.count())
+
+    def test_duplicate_contents(self):
+        """Duplicate test case - contents
+
+        Tests that the topics, contents, content types, tags and attachments are copied
+        and the files are shared.
+        """
+        CourseDuplicator.duplicate(self.course1, self.target, copy_contents=True)
+        self.assertEqual(self.structure(self.course1), self.structure(self.target))
+        self.assertFalse(set(self.course1.topics.all()) & set(self.target.topics.all()))
+
+        copy = Content.objects.get(topic__courses=self.target)
+        self.assertNotEqual(self.text.pk, copy.pk)
+        self.assertEqual('Text', copy.textfield.textfield)
+        self.assertEqual(['Tag'], [tag.title for tag in copy.tags.all()])
+        self.assertEqual([attachment.image.name
+                          for attachment in self.text.ImageAttachments.all()],
+                         [attachment.image.name for attachment in copy.ImageAttachments.all()])
+        self.assertEqual(2, ImageAttachment.objects.count())
+        self.assertTrue(SearchDocument.objects.filter(kind=Documents.CONTENT,
+                                                      object_id=copy.pk).exists())
+
+    def test_constant_queries(self):
+        """Duplicate test case - queries
+
+        Tests that the number of queries does not depend on the number of contents.
+        """
+        def count_queries(title):
+            target = Course.objects.create(title=title, category=self.cat)
+            with CaptureQueriesContext(connection) as queries:
+                CourseDuplicator.duplicate(self.course1, target, copy_contents=True)
+            return len(queries)
+
+        small = count_queries('Small')
+        for _ in range(20):
+            content = utils.create_content(model.TextField.TYPE)
+            content.topic = self.topic3
+            content.save()
+            model.TextField.objects.create(content=content, textfield='Text')
+            utils.generate_attachment(content, 2)
+        self.assertEqual(small, count_queries('Large'))
+
+
+class DuplicateCourseViewTestCase(BaseCourseViewTestCase):
+    """Duplicate course view test case
+
+    Defines the test cases for the view DuplicateCourseView.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up the data of the duplicate form.
+        """
+        super().setUp()
+        self.client.force_login(self.user)
+        self.path = reverse('frontend:course-duplicate', kwargs={'pk': self.course1.pk})
+        self.data = {'title': 'Copy', 'description': 'desc', 'category': self.cat.pk,
+                     'owners': [self.user.profile.pk], 'copy_contents': 'on'}
+
+    def test_initial(self):
+        """Initial test case
+
+        Tests that the form is filled with the course and the course is not changed.
+        """
+        response = self.client.get(self.path)
+        self.assertEqual('Course Test', response.context['form'].initial['title'])
+        self.assertEqual('Course Test', Course.objects.get(pk=self.course1.pk).title)
+
+    def test_duplicate(self):
+        """Duplicate test case
+
+        Tests that a small course is copied during the request.
+        """
+        self.client.post(self.path, self.data)
+        course = Course.objects.get(title='Copy')
+        self.assertEqual(3, course.topics.count())
+        self.assertFalse(DuplicationJob.objects.exists())
+
+    @override_settings(COURSE_DUPLICATION_SYNC_LIMIT=0)
+    def test_duplicate_background(self):
+        """Duplicate test case - background
+
+        Tests that the contents of a large course are copied by a job.
+        """
+        utils.create_content(model.TextField.TYPE)
+        # Move the contents of the unused topic 1 into the course
+        Content.objects.update(topic=self.topic2)
+        self.client.post(self.path, self.data)
+        job = DuplicationJob.objects.get()
+        self.assertEqual(0, job.course.topics.count())
+
+        job.execute()
+        self.assertEqual(DuplicationJob.DONE, job.status)
+        self.assertEqual(3, job.course.topics.count())
+        self.assertEqual(2, Content.objects.filter(topic__courses=job.course).count())
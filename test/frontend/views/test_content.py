@@ -6,7 +6,7 @@ This file contains the test cases for /frontend/forms/content.py.
 from test import utils
 from test.test_cases import MediaTestCase
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.urls import reverse
 
 from base.models import Content, Course
@@ -20,6 +20,7 @@ from frontend.forms import AddContentForm
 from frontend.views.content import clean_attachment
 
 
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
 class CleanAttachmentTestCase(TestCase):
     """Clean attachment test case
 
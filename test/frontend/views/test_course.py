@@ -4,10 +4,16 @@ This file contains the test cases for /frontend/views/course.py.
 """
 import json
 
+from test import utils
 from test.test_cases import BaseCourseViewTestCase
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from base.models import CourseStructureEntry, Topic
+import content.models as model
+
+from base.models import Course, CourseStructureEntry, Favorite, Tag, Topic
 from frontend.forms.course import CreateTopicForm
 
 
@@ -51,13 +57,13 @@ class CourseViewTestCase(BaseCourseViewTestCase):
                                     **{'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'})
         self.assertEqual(response.status_code, 200)
         # after post the structure of topics should also be accordingly changed
-        self.assertEqual(list(CourseStructureEntry.objects.all()
-                              .values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry
+                          in CourseStructureEntry.objects.all()],
                          ['1', '2', '3'])
         self.assertEqual(list(CourseStructureEntry.objects.all()
                               .values_list("topic_id", flat=True)),
                          [2, 3, 4])
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='3', topic=self.topic3))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=3, topic=self.topic3))
 
     def test_bad_response_course_view(self):
         """CourseView post test case - request is ajax and check is false.
@@ -72,7 +78,8 @@ class CourseViewTestCase(BaseCourseViewTestCase):
     def test_ajax_and_check_and_ids_course_view(self):
         """CourseView post test case - ajax and check and ids[] are true
 
-        Tests CourseView post if request is ajax and check and ids[] are true.
+        Tests CourseView post if request is ajax and check and ids[] are true. The
+        request does not delete unused topics, see the management command cleantopics.
         """
         topic_list = [
             {"value": "Topic1 (Category~*)", "id": 2},
@@ -86,7 +93,7 @@ class CourseViewTestCase(BaseCourseViewTestCase):
         self.client.post(self.path, data,
                          **{'HTTP_X_REQUESTED_WITH': 'XMLHttpRequest'})
         ids = Topic.objects.all().values_list("pk", flat=True)
-        self.assertEqual(list(ids), [2, 3, 4])
+        self.assertEqual(list(ids), [1, 2, 3, 4])
 
 
 class EditStructureViewTestView(BaseCourseViewTestCase):
@@ -152,3 +159,169 @@ class FavoriteTestCase(BaseCourseViewTestCase):
         data['save'] = 'false'
         self.client.post(path, data)
         self.assertEqual(self.user.profile.stared_courses.all().count(), 0)
+
+
+class CourseViewQueriesTestCase(BaseCourseViewTestCase):
+    """CourseView queries test case
+
+    Defines the test cases for the number of queries of the course page.
+    """
+
+    def create_course(self, topic_count):
+        """Create course
+
+        Creates a course with the given number of topics, each with a subtopic. Every
+        topic contains a rated and tagged text, image and YouTube video which are part of
+        the coursebook of the user.
+
+        :param topic_count: The number of topics
+        :type topic_count: int
+
+        :return: the created course
+        :rtype: Course
+        """
+        course = Course.objects.create(title=f'Course {topic_count}', category=self.cat)
+        profile = self.user.profile
+        tag = Tag.objects.create(title='Tag')
+        for index in range(1, topic_count + 1):
+            for position in [str(index), f'{index}/1']:
+                topic = Topic.objects.create(title=f'Topic {position}', category=self.cat)
+                CourseStructureEntry.objects.create(course=course, index=position, topic=topic)
+                payloads = {model.TextField: {'textfield': 'Text'},
+                            model.ImageContent: {'image': utils.generate_image_file(index)},
+                            model.YTVideoContent: {'url': 'https://www.youtube.com/watch?v=test'}}
+                for content_model, payload in payloads.items():
+                    content = utils.create_content(content_model.TYPE)
+                    content.topic = topic
+                    content.save()
+                    content_model.objects.create(content=content, **payload)
+                    content.tags.add(tag)
+                    content.rate_content(profile, 4)
+                    Favorite.objects.create(user=profile, course=course, content=content)
+        return course
+
+    def count_queries(self, course, data=None):
+        """Count queries
+
+        Requests the course page and counts its queries.
+
+        :param course: The course to request
+        :type course: Course
+        :param data: The sort and filter options to post
+        :type data: dict[str, str]
+
+        :return: the number of queries
+        :rtype: int
+        """
+        path = reverse('frontend:course', kwargs={'pk': course.pk})
+        with CaptureQueriesContext(connection) as queries:
+            if data is None:
+                response = self.client.get(path)
+            else:
+                response = self.client.post(path, data)
+        self.assertEqual(200, response.status_code)
+        return len(queries)
+
+    def test_constant_queries(self):
+        """Course page test case - queries
+
+        Tests that the number of queries of the course page does not depend on the
+        number of topics and contents.
+        """
+        small = self.count_queries(self.create_course(1))
+        large = self.count_queries(self.create_course(10))
+        self.assertEqual(small, large)
+
+    def test_constant_queries_sorted(self):
+        """Course page test case - sorted queries
+
+        Tests that the number of queries of the sorted and filtered course page does not
+        depend on the number of topics and contents.
+        """
+        data = {'sort': 'Rating', 'filter': 'Image'}
+        small = self.count_queries(self.create_course(1), data)
+        large = self.count_queries(self.create_course(10), data)
+        self.assertEqual(small, large)
+
+    def test_structure(self):
+        """Course page test case - structure
+
+        Tests that the topics, subtopics and contents are assembled from the loaded rows.
+        """
+        response = self.client.get(reverse('frontend:course', kwargs={'pk': self.course1.pk}))
+        structure = response.context['structure']
+        self.assertEqual([self.topic1, self.topic2], [entry['topic'] for entry in structure])
+        self.assertEqual([self.topic3], [entry['topic'] for entry in structure[1]['subtopics']])
+        self.assertEqual(0, structure[0]['content_count'])
+
+
+class CourseViewCacheTestCase(BaseCourseViewTestCase):
+    """CourseView cache test case
+
+    Defines the test cases for the cached fragments of the course page.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up a text in the first topic and renders the course page once.
+        """
+        super().setUp()
+        self.path = reverse('frontend:course', kwargs={'pk': self.course1.pk})
+        self.content = utils.create_content(model.TextField.TYPE)
+        self.content.topic = self.topic1
+        self.content.description = 'Cached text'
+        self.content.save()
+        model.TextField.objects.create(content=self.content, textfield='Text')
+        self.client.get(self.path)
+
+    def test_cached_sections(self):
+        """Cache test case - hit
+
+        Tests that the contents are not loaded if all sections are cached.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.path)
+        self.assertContains(response, 'Cached text')
+        self.assertFalse([query for query in queries
+                          if 'FROM "base_content"' in query['sql']
+                          and 'FROM "base_coursestructureentry"' not in query['sql']])
+
+    def test_invalidate_content(self):
+        """Cache test case - content
+
+        Tests that a changed content invalidates the section of its topic.
+        """
+        self.content.description = 'Changed text'
+        self.content.save()
+        response = self.client.get(self.path)
+        self.assertContains(response, 'Changed text')
+        self.assertNotContains(response, 'Cached text')
+
+    def test_invalidate_rating(self):
+        """Cache test case - rating
+
+        Tests that a rating invalidates the section of the rated content.
+        """
+        self.assertNotContains(self.client.get(self.path), 'badge badge-info')
+        self.content.rate_content(self.user.profile, 5)
+        self.assertContains(self.client.get(self.path), 'badge badge-info', count=2)
+
+    def test_invalidate_structure(self):
+        """Cache test case - structure
+
+        Tests that a changed structure invalidates the sections of the course.
+        """
+        topic = Topic.objects.create(title='New subtopic', category=self.cat)
+        CourseStructureEntry.objects.create(course=self.course1, index='1/1', topic=topic)
+        self.assertContains(self.client.get(self.path), 'New subtopic', count=2)
+
+    def test_invalidate_favorite(self):
+        """Cache test case - favorite
+
+        Tests that a new favorite invalidates the coursebook of the user.
+        """
+        self.assertContains(self.client.get(self.path), 'Cached text', count=1)
+        Favorite.objects.create(user=self.user.profile, course=self.course1,
+                                content=self.content)
+        self.assertContains(self.client.get(self.path), 'Cached text', count=2)
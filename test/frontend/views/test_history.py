@@ -11,6 +11,7 @@ import reversion
 from reversion import set_comment, is_registered
 from reversion.models import Version
 
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
 from django.urls import reverse
 
 from content.attachment.models import ImageAttachment
@@ -173,6 +174,22 @@ class ContentHistoryCompareViewTestCase(MediaTestCase):
         # topic id should not be changed
         self.assertEqual(text1.content.topic_id, 1)
 
+    def test_textfield_revert_keeps_ratings(self):
+        """Revert version test case - Ratings
+
+        Tests that a revert keeps the aggregates of the ratings, which are not versioned.
+        """
+        content = Content.objects.get(pk=2)
+        content.rate_content(User.objects.create(username='rater').profile, 4)
+        self.client.post(self.textfield_path, {'ver_pk': '2'})
+
+        content.refresh_from_db()
+        self.assertEqual((4, 1), (content.rating_sum, content.rating_count))
+        # Removing the rating must not violate the positive constraints
+        content.rating_set.all().delete()
+        content.refresh_from_db()
+        self.assertEqual((0, 0), (content.rating_sum, content.rating_count))
+
     def assert_revert_to_2nd_version(self):
         """assert revert to 2nd version
 
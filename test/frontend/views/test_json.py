@@ -3,8 +3,12 @@
 This file contains the test cases for /frontend/views/json.py.
 """
 
+import json
+
 from test.test_cases import BaseCourseViewTestCase
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from frontend.views.json import JsonHandler
 
@@ -95,11 +99,37 @@ class ValidateTopicsTestCase(BaseCourseViewTestCase):
         self.assertRaises(ValidationError, JsonHandler.validate_topics, json_data)
 
 
+    def test_validate_topics_all_missing_reported(self):
+        """Validate topics test case - All missing topics
+
+        Tests that all missing topics are reported with a single query.
+        """
+        json_data = [{'id': 2}, {'id': 8, 'children': [{'id': 4}, {'id': 9}]}, {'id': 10}]
+        with self.assertNumQueries(1):
+            with self.assertRaises(ValidationError) as context:
+                JsonHandler.validate_topics(json_data)
+        self.assertEqual([f'The topic with the id {topic_id} does not exist'
+                          for topic_id in [8, 9, 10]], context.exception.messages)
+
+    def test_validate_topics_invalid_structure(self):
+        """Validate topics test case - Invalid structure
+
+        Tests that invalid structures are rejected without querying the database.
+        """
+        invalid = [{'id': 2},
+                   [{'value': 'Topic1 (Category)'}],
+                   [{'id': '2'}],
+                   [{'id': 2, 'children': {'id': 3}}],
+                   [{'id': 2, 'children': [{'id': 3, 'children': [{'id': 4}]}]}]]
+        for json_data in invalid:
+            with self.assertNumQueries(0):
+                self.assertRaises(ValidationError, JsonHandler.validate_topics, json_data)
+
 class CleanTestCase(BaseCourseViewTestCase):
     """ test cases for JsonHandlers clean methods
 
     Defines the test cases for JsonHandler.clean_structure_topic,
-    clean_structure_sub_topic, clean_topics
+    clean_structure_sub_topic
     """
 
     def add_subtopics(self):
@@ -117,47 +147,6 @@ class CleanTestCase(BaseCourseViewTestCase):
                                          index=f'{index}/{sub_index + i}', topic=topic)
             entry.save()
 
-    def test_clean_topics_no_deletion(self):
-        """Clean topics test case - No deletion
-
-        Tests the function clean_topics if the result of it does not not delete any topics
-        since the topics were used in the course structure.
-        """
-        ids = [2, 3, 4]
-        JsonHandler.clean_topics(ids)
-        ids = Topic.objects.all().values_list("pk", flat=True)
-        # The not used id 1 should still be there
-        # See also at setup
-        self.assertEqual(list(ids), [1, 2, 3, 4])
-
-    def test_clean_topics_deletion_one(self):
-        """Clean topics test case - Deletion of one topic
-
-        Tests the function clean_topics if the result of it deletes one topic
-        since the topic were not used in the course structure.
-        """
-        ids = [1, 2, 3, 4]
-        JsonHandler.clean_topics(ids)
-        ids = Topic.objects.all().values_list("pk", flat=True)
-        # The not used id 1 will now be deleted
-        self.assertEqual(list(ids), [2, 3, 4])
-
-    def test_clean_topics_deletion_many(self):
-        """Clean topics test case - Deletion of many topics
-
-        Tests the function clean_topics if the result of it deletes many topics
-        since the topics were not used in the course structure.
-        """
-        title = 'Topic'
-        index = 4
-        for i in range(3):
-            Topic.objects.create(title=f'{title}{index + i}', category=self.cat)
-        ids = [1, 2, 3, 4, 5, 6, 7, 8]
-        JsonHandler.clean_topics(ids)
-        ids = Topic.objects.all().values_list("pk", flat=True)
-        # unused ids 1, 5, 6, 7 should be deleted, and 8 has not effect
-        self.assertEqual(list(ids), [2, 3, 4])
-
     def test_clean_structure_sub_topic_no_deletion(self):
         """Clean structure sub topics test case - No deletion
 
@@ -178,7 +167,7 @@ class CleanTestCase(BaseCourseViewTestCase):
         JsonHandler.clean_structure_sub_topic(self.course1, 2, 1)
         # the course should only has two topics now
         self.assertEqual(self.course1.topics.all().count(), 2)
-        self.assertEqual(list(CourseStructureEntry.objects.all().values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry in CourseStructureEntry.objects.all()],
                          ['1', '2'])
 
     def test_clean_structure_sub_topic_deletion_many(self):
@@ -194,7 +183,7 @@ class CleanTestCase(BaseCourseViewTestCase):
         ids = self.course1.topics.all().values_list("pk", flat=True)
         # the course should be same as before
         self.assertEqual(list(ids), [2, 3, 4])
-        self.assertEqual(list(CourseStructureEntry.objects.all().values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry in CourseStructureEntry.objects.all()],
                          ['1', '2', '2/1'])
 
     def test_clean_structure_topics_no_deletion(self):
@@ -207,7 +196,8 @@ class CleanTestCase(BaseCourseViewTestCase):
         # There should be no topics deleted
         ids = self.course1.topics.all().values_list("pk", flat=True)
         self.assertEqual(list(ids), [2, 3, 4])
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='2/1', topic=self.topic3))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=2, sub_position=1,
+                                                              topic=self.topic3))
 
     def test_clean_structure_topics_deletion_one(self):
         """Clean structure topics test case - Deletion of one topic
@@ -338,14 +328,15 @@ class JsonTestCase(BaseCourseViewTestCase):
                      {'value': 'Topic1 (Category)', 'id': 2,
                      'children': [{'value': 'Topic3 (Category)', 'id': 4}]}]
         JsonHandler.json_to_topics_structure(self.course1, json_data)
-        self.assertEqual(list(CourseStructureEntry.objects.all()
-                              .values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry
+                          in CourseStructureEntry.objects.all()],
                          ['1', '2', '2/1'])
         self.assertEqual(list(CourseStructureEntry.objects.all()
                               .values_list("topic_id", flat=True)),
                          [2, 3, 4])
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='2/1', topic=self.topic3))
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='1', topic=self.topic2))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=2, sub_position=1,
+                                                              topic=self.topic3))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=1, topic=self.topic2))
 
     def test_update_json_to_topics_structure_update_main_create_sub(self):
         """Json to topics structure - Update main topic and creating sub topic
@@ -369,14 +360,15 @@ class JsonTestCase(BaseCourseViewTestCase):
                       'children': [{'value': 'Topic3 (Category)', 'id': 4}]},
                      {'value': 'Topic1 (Category)', 'id': 2}]
         JsonHandler.json_to_topics_structure(self.course1, json_data)
-        self.assertEqual(list(CourseStructureEntry.objects.all()
-                              .values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry
+                          in CourseStructureEntry.objects.all()],
                          ['1', '2', '1/1'])
         self.assertEqual(list(CourseStructureEntry.objects.all()
                               .values_list("topic_id", flat=True)),
                          [2, 3, 4])
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='1/1', topic=self.topic3))
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='1', topic=self.topic2))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=1, sub_position=1,
+                                                              topic=self.topic3))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=1, topic=self.topic2))
 
     def test_json_to_topics_structure_new_main(self):
         """Json to topics structure - New main topics
@@ -390,13 +382,13 @@ class JsonTestCase(BaseCourseViewTestCase):
                       'children': [{'value': 'Topic3 (Category)', 'id': 4}]},
                      {'value': 'Topic4 (Category)', 'id': 5}]  # entry for a new topic
         JsonHandler.json_to_topics_structure(self.course1, json_data)
-        self.assertEqual(list(CourseStructureEntry.objects.all()
-                              .values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry
+                          in CourseStructureEntry.objects.all()],
                          ['1', '2', '2/1', '3'])
         self.assertEqual(list(CourseStructureEntry.objects.all()
                               .values_list("topic_id", flat=True)),
                          [2, 3, 4, 5])
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='3', topic=topic4))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=3, topic=topic4))
 
     def test_new_children_json_to_topics_structure(self):
         """Json to topics structure - New sub topics
@@ -415,11 +407,82 @@ class JsonTestCase(BaseCourseViewTestCase):
                      ]
         JsonHandler.json_to_topics_structure(self.course1, json_data)
         # the new structure should subject to the new json data
-        self.assertEqual(list(CourseStructureEntry.objects.all()
-                              .values_list("index", flat=True)),
+        self.assertEqual([entry.index for entry
+                          in CourseStructureEntry.objects.all()],
                          ['1', '2', '2/1', '1/1', '2/2'])
         self.assertEqual(list(CourseStructureEntry.objects.all()
                               .values_list("topic_id", flat=True)),
                          [2, 3, 4, 5, 6])
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='2/2', topic=topic4))
-        self.assertIsNotNone(CourseStructureEntry.objects.get(index='1/1', topic=topic5))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=2, sub_position=2,
+                                                              topic=topic4))
+        self.assertIsNotNone(CourseStructureEntry.objects.get(position=1, sub_position=1,
+                                                              topic=topic5))
+
+    def test_json_to_topics_structure_constant_queries(self):
+        """Json to topics structure - queries
+
+        Tests that saving a structure costs the same number of queries for a small and a
+        large course and that an unchanged structure writes nothing.
+        """
+        topics = [Topic.objects.create(title=f'Topic{index}', category=self.cat)
+                  for index in range(60)]
+
+        def save(count):
+            json_data = [{'id': topic.id, 'children': [{'id': self.topic1.id}]}
+                         for topic in reversed(topics[:count])]
+            with CaptureQueriesContext(connection) as queries:
+                JsonHandler.json_to_topics_structure(self.course1, json_data)
+            return len(queries)
+
+        small = save(5)
+        self.assertEqual(small, save(60))
+        self.assertEqual(120, CourseStructureEntry.objects.filter(course=self.course1).count())
+        # Reordering a large structure and removing the sub topics
+        json_data = [{'id': topic.id} for topic in topics]
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(JsonHandler.json_to_topics_structure(self.course1, json_data))
+        self.assertLess(len(queries), 10)
+        self.assertEqual([topic.id for topic in topics],
+                         list(CourseStructureEntry.objects.filter(course=self.course1)
+                              .order_by('position', 'sub_position')
+                              .values_list('topic_id', flat=True)))
+        self.assertFalse(JsonHandler.json_to_topics_structure(self.course1, json_data))
+
+    def test_topics_structure_to_json_repeated_topic(self):
+        """Topics structure to json test case - repeated topic
+
+        Tests that a topic which occurs multiple times in the course is converted with a
+        single query.
+        """
+        CourseStructureEntry.objects.create(course=self.course1, index='3', topic=self.topic1)
+        CourseStructureEntry.objects.create(course=self.course1, index='3/1', topic=self.topic3)
+        with self.assertNumQueries(1):
+            json_obj = JsonHandler.topics_structure_to_json(self.course1)
+        self.assertEqual(json_obj,
+                         [{'value': 'Topic1 (Category)', 'id': 2},
+                          {'value': 'Topic2 (Category)', 'id': 3,
+                           'children': [{'value': 'Topic3 (Category)', 'id': 4}]},
+                          {'value': 'Topic1 (Category)', 'id': 2,
+                           'children': [{'value': 'Topic3 (Category)', 'id': 4}]}])
+
+    def test_cached_topics_structure_json(self):
+        """Cached structure json test case
+
+        Tests that the json of the structure is cached and invalidated if the structure or
+        a topic changes.
+        """
+        def structure():
+            return json.loads(JsonHandler.cached_topics_structure_json(self.course1))
+
+        self.assertEqual(JsonHandler.topics_structure_to_json(self.course1), structure())
+        with CaptureQueriesContext(connection) as queries:
+            structure()
+        self.assertFalse([query for query in queries
+                          if 'base_coursestructureentry' in query['sql']])
+
+        JsonHandler.json_to_topics_structure(self.course1, [{'id': self.topic2.id}])
+        self.assertEqual([{'value': 'Topic2 (Category)', 'id': 3}], structure())
+
+        self.topic2.title = 'Renamed'
+        self.topic2.save()
+        self.assertEqual([{'value': 'Renamed (Category)', 'id': 3}], structure())
@@ -0,0 +1,138 @@
+"""Purpose of this file
+
+This file contains the test cases for /frontend/views/search.py.
+"""
+
+from test.test_cases import BaseCourseViewTestCase
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from base.models import Category, Content, Course
+
+from search.documents import Documents
+from search.models import SearchDocument
+
+
+class SearchViewTestCase(BaseCourseViewTestCase):
+    """Search view test case
+
+    Defines the test cases for the view SearchView.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Moves the content of the test database into topic 2 of the course.
+        """
+        super().setUp()
+        self.client.force_login(self.user)
+        self.path = reverse('frontend:search')
+        Content.objects.update(topic=self.topic2)
+        self.content = Content.objects.get()
+        # Update the document after the queryset update
+        self.content.save()
+
+    def test_search(self):
+        """Search test case
+
+        Tests that courses, topics and contents are found and linked.
+        """
+        response = self.client.get(self.path, {'q': 'topic2'})
+        results = response.context['search_results']
+        self.assertEqual(['topic', 'content'], [result.kind for result in results])
+        self.assertEqual(reverse('frontend:course', args=(self.course1.pk,)), results[0].url)
+        self.assertEqual(reverse('frontend:content',
+                                 args=(self.course1.pk, self.topic2.pk, self.content.pk)),
+                         results[1].url)
+
+        response = self.client.get(self.path, {'q': 'course test'})
+        self.assertEqual([self.course1.pk],
+                         [result.object_id for result in response.context['search_results']])
+
+    def test_empty_query(self):
+        """Empty query test case
+
+        Tests that an empty query has no results.
+        """
+        response = self.client.get(self.path)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([], list(response.context['search_results']))
+
+    def test_cursor_paging(self):
+        """Cursor paging test case
+
+        Tests that all results are reached with the cursors and every page costs the
+        same number of queries.
+        """
+        Course.objects.bulk_create(Course(title=f'Algebra {index}',
+                                          category=Category.objects.first())
+                                   for index in range(45))
+        SearchDocument.index(Documents.COURSE, Course.objects.values_list('pk', flat=True))
+        pages, queries = [], []
+        params = {'q': 'algebra'}
+        while True:
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.path, params)
+            queries.append(len(context))
+            pages.append([result.object_id for result in response.context['search_results']])
+            page = response.context['page_obj']
+            if not page.has_next():
+                break
+            params['cursor'] = page.next_cursor
+
+        self.assertEqual([20, 20, 5], [len(ids) for ids in pages])
+        self.assertEqual(45, len(set(sum(pages, []))))
+        self.assertEqual(1, len(set(queries)))
+        self.assertEqual(45, response.context['search_count'])
+
+        response = self.client.get(self.path, {'q': 'algebra', 'cursor': page.previous_cursor})
+        self.assertEqual(pages[1], [result.object_id
+                                    for result in response.context['search_results']])
+        self.assertTrue(response.context['page_obj'].has_previous())
+
+    @override_settings(SEARCH_COUNT_LIMIT=1)
+    def test_estimate(self):
+        """Estimate test case
+
+        Tests that a large number of results is not counted exactly.
+        """
+        response = self.client.get(self.path, {'q': 'topic'})
+        self.assertFalse(response.context['search_count_exact'])
+        self.assertContains(response, 'More than 1 results')
+
+    def test_invalid_cursor(self):
+        """Invalid cursor test case
+
+        Tests that an invalid cursor is not found.
+        """
+        response = self.client.get(self.path, {'q': 'topic', 'cursor': 'invalid'})
+        self.assertEqual(404, response.status_code)
+
+
+class SearchAutocompleteTestCase(BaseCourseViewTestCase):
+    """Search autocomplete test case
+
+    Defines the test cases for the view search_autocomplete.
+    """
+
+    def test_suggestions(self):
+        """Suggestions test case
+
+        Tests that courses are linked to their page and topics to the search.
+        """
+        # Rebuild the index of the rolled back objects of the previous tests
+        cache.clear()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('frontend:search-autocomplete'), {'q': 'topic1'})
+        self.assertEqual([{'kind': 'topic', 'label': 'Topic', 'title': self.topic1.title,
+                           'url': reverse('frontend:search') + '?q=' + self.topic1.title}],
+                         response.json()['suggestions'])
+
+        response = self.client.get(reverse('frontend:search-autocomplete'),
+                                   {'q': self.course1.title})
+        self.assertEqual(reverse('frontend:course', args=(self.course1.pk,)),
+                         response.json()['suggestions'][0]['url'])
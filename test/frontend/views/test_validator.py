@@ -6,7 +6,7 @@ This file contains the test cases for this /frontend/views/validator.py.
 from test import utils
 
 from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 from base.models import Topic, Content
 
@@ -16,6 +16,7 @@ import content.forms as form
 from frontend.views.validator import Validator
 
 
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
 class ValidatorTestCase(TestCase):
     """Validator test case
 
@@ -0,0 +1,131 @@
+"""Purpose of this file
+
+This file contains the test cases for /search/autocomplete.py.
+"""
+
+import threading
+
+from test.test_cases import MediaTestCase
+
+from django.core.cache import cache
+
+from base.models import Category, Course, Tag, Topic
+
+from search.autocomplete import AutocompleteIndex, autocomplete_index
+
+
+class AutocompleteIndexTestCase(MediaTestCase):
+    """Autocomplete index test case
+
+    Defines the test cases for the prefix index of the autocompletion.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up a course, a topic and a tag.
+        """
+        super().setUp()
+        category = Category.objects.first()
+        self.course = Course.objects.create(title='Linear Algebra', category=category)
+        self.topic = Topic.objects.create(title='Eigenvalues of Matrices', category=category)
+        self.tag = Tag.objects.create(title='Algebraic')
+
+    @staticmethod
+    def search(query, limit=10):
+        """Search
+
+        Returns the kinds and titles of the suggestions for the query.
+
+        :param query: The query
+        :type query: str
+        :param limit: The maximum number of suggestions
+        :type limit: int
+
+        :return: the kinds and titles
+        :rtype: list[tuple[str, str]]
+        """
+        return [(kind, title) for kind, _, title in autocomplete_index.search(query, limit)]
+
+    def test_prefix(self):
+        """Prefix test case
+
+        Tests that the query matches the beginning of every word of the titles.
+        """
+        self.assertEqual([('course', 'Linear Algebra'), ('tag', 'Algebraic')],
+                         self.search('ALG'))
+        self.assertEqual([('course', 'Linear Algebra')], self.search('linear  alg'))
+        self.assertEqual([('topic', 'Eigenvalues of Matrices')], self.search('matri'))
+        self.assertEqual([('course', 'Linear Algebra')], self.search('alg', 1))
+        self.assertEqual([], self.search('gebra'))
+        self.assertEqual([], self.search(' '))
+
+    def test_no_queries(self):
+        """Queries test case
+
+        Tests that a current index answers without database queries.
+        """
+        self.search('alg')
+        with self.assertNumQueries(0):
+            self.search('eig')
+
+    def test_signals(self):
+        """Signals test case
+
+        Tests that saved and deleted objects are updated without rebuilding the index.
+        """
+        self.search('alg')
+        self.course.title = 'Geometry'
+        self.course.save()
+        with self.assertNumQueries(0):
+            self.assertEqual([('course', 'Geometry')], self.search('geo'))
+            self.assertEqual([('tag', 'Algebraic')], self.search('alg'))
+
+        self.tag.delete()
+        with self.assertNumQueries(0):
+            self.assertEqual([], self.search('alg'))
+
+    def test_duplicate_titles(self):
+        """Duplicate titles test case
+
+        Tests that objects of the same kind with the same title are suggested once.
+        """
+        Topic.objects.create(title='Eigenvalues of matrices', category=Category.objects.first())
+        self.assertEqual([('topic', 'Eigenvalues of Matrices')], self.search('eigen'))
+
+    def test_other_process(self):
+        """Other process test case
+
+        Tests that the changes of another process are applied and the index is rebuilt if
+        they are lost.
+        """
+        other = AutocompleteIndex()
+        self.assertEqual([('course', 'Linear Algebra')], self.search('lin'))
+        other.update('course', self.course.pk, 'Geometry')
+        with self.assertNumQueries(0):
+            self.assertEqual([('course', 'Geometry')], self.search('geo'))
+
+        cache.clear()
+        Course.objects.filter(pk=self.course.pk).update(title='Analysis')
+        self.assertEqual([('course', 'Analysis')], self.search('ana'))
+
+    def test_threads(self):
+        """Threads test case
+
+        Tests that the index can be changed and searched by several threads.
+        """
+        index = AutocompleteIndex()
+        index.rebuild()
+
+        def work(number):
+            for object_id in range(100):
+                index.update('tag', 1000 * number + object_id, f'Tag {number} {object_id}')
+                index.search('tag', 10)
+
+        threads = [threading.Thread(target=work, args=(number,)) for number in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(400, len(index.search('tag', 1000)))
+        self.assertEqual(index._keys, sorted(index._keys))  # pylint: disable=protected-access
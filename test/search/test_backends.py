@@ -0,0 +1,197 @@
+"""Purpose of this file
+
+This file contains the test cases for /search/backends.py, /search/models.py and the
+management command rebuildindex.
+"""
+
+from io import StringIO
+
+from test import utils
+from test.test_cases import MediaTestCase
+
+from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.db import connection
+
+import content.models as model
+
+from base.models import Category, Comment, Content, Course, Tag, Topic
+
+from search.backends import DatabaseBackend, FTS5Backend, PostgresBackend
+from search.documents import Documents
+from search.models import SearchDocument
+
+
+class SearchIndexTestCase(MediaTestCase):
+    """Search index test case
+
+    Defines the test cases for the documents of the search index. The ranking backend of
+    the database of the tests is used.
+    """
+
+    @staticmethod
+    def ranking_backend():
+        """Ranking backend
+
+        Returns the ranking backend of the database of the tests.
+
+        :return: the backend
+        :rtype: SearchBackend
+        """
+        return PostgresBackend() if connection.vendor == 'postgresql' else FTS5Backend()
+
+    def setUp(self):
+        """Setup
+
+        Sets up a text content in the topic of the test database.
+        """
+        super().setUp()
+        self.backend = self.ranking_backend()
+        self.topic = Topic.objects.first()
+        self.content = utils.create_content(model.TextField.TYPE)
+        self.text = model.TextField.objects.create(content=self.content,
+                                                   textfield='Eigenvalues of matrices')
+
+    def ids(self, query, kinds=None):
+        """Ids
+
+        Returns the kinds and ids of the results of the query.
+
+        :param query: The query
+        :type query: str
+        :param kinds: The kinds of the searched objects
+        :type kinds: None or list[str]
+
+        :return: the kinds and ids of the results
+        :rtype: list[tuple[str, int]]
+        """
+        return [(result.kind, result.object_id)
+                for result in self.backend.search(query, kinds)[:100]]
+
+    def test_content_body(self):
+        """Content test case
+
+        Tests that the text, the tags and the comments of a content are found.
+        """
+        self.content.tags.add(Tag.objects.create(title='Algebra'))
+        Comment.objects.create(content=self.content, author=User.objects.first().profile,
+                               text='Great explanation')
+        expected = [(Documents.CONTENT, self.content.pk)]
+        self.assertEqual(expected, self.ids('eigenvalues'))
+        self.assertEqual(expected, self.ids('algebra'))
+        self.assertEqual(expected, self.ids('great explanation'))
+
+    def test_update(self):
+        """Update test case
+
+        Tests that changed and deleted objects are updated in the index.
+        """
+        self.text.textfield = 'Determinants'
+        self.text.save()
+        self.assertEqual([], self.ids('eigenvalues'))
+        self.assertEqual([(Documents.CONTENT, self.content.pk)], self.ids('determinants'))
+
+        self.topic.title = 'Linear Algebra'
+        self.topic.save()
+        self.assertEqual({(Documents.TOPIC, self.topic.pk)}
+                         | {(Documents.CONTENT, pk)
+                            for pk in Content.objects.values_list('pk', flat=True)},
+                         set(self.ids('linear')))
+
+        self.content.delete()
+        self.assertFalse(SearchDocument.objects.filter(kind=Documents.CONTENT,
+                                                       object_id=self.content.pk).exists())
+
+    def test_prefix_and_rank(self):
+        """Rank test case
+
+        Tests that the terms are prefixes and matches in titles are ranked higher.
+        """
+        course = Course.objects.create(title='Matrices', category=Category.objects.first())
+        self.assertEqual([(Documents.COURSE, course.pk), (Documents.CONTENT, self.content.pk)],
+                         self.ids('matri'))
+        self.assertEqual([(Documents.CONTENT, self.content.pk)],
+                         self.ids('matri', [Documents.CONTENT]))
+        self.assertEqual([], self.ids('eigen matrices determinants'))
+
+    def test_snippet(self):
+        """Snippet test case
+
+        Tests that the snippet is escaped and marks the matches.
+        """
+        self.text.textfield = '<script>alert(1)</script> eigenvalues'
+        self.text.save()
+        result = self.backend.search('eigen')[:1][0]
+        self.assertIn('&lt;script&gt;', result.snippet)
+        self.assertIn('<mark>eigenvalues</mark>', result.snippet)
+
+    def test_paging(self):
+        """Paging test case
+
+        Tests that the results can be paginated and a page costs a constant number of
+        queries.
+        """
+        Course.objects.bulk_create(Course(title=f'Course {index}',
+                                          category=Category.objects.first())
+                                   for index in range(45))
+        SearchDocument.index(Documents.COURSE, Course.objects.values_list('pk', flat=True))
+        paginator = Paginator(self.backend.search('course'), 20)
+        with self.assertNumQueries(2):
+            page = paginator.page(3)
+            self.assertEqual(6, len(page.object_list))
+        self.assertEqual(46, paginator.count)
+
+    def test_cursor(self):
+        """Cursor test case
+
+        Tests that the pages of the cursors continue the results in both directions for
+        both backends.
+        """
+        Course.objects.bulk_create(Course(title=f'Course {index}',
+                                          category=Category.objects.first())
+                                   for index in range(25))
+        SearchDocument.index(Documents.COURSE, Course.objects.values_list('pk', flat=True))
+        for self.backend in (self.ranking_backend(), DatabaseBackend()):
+            results = self.backend.search('course')
+            expected = [(result.kind, result.object_id) for result in results[:100]]
+            pages = [results.page(None, 10)]
+            while pages[-1].has_next():
+                pages.append(results.page(pages[-1].next_cursor, 10))
+            self.assertEqual(expected, [(result.kind, result.object_id)
+                                        for page in pages for result in page])
+            self.assertFalse(pages[0].has_previous())
+            previous = results.page(pages[-1].previous_cursor, 10)
+            self.assertEqual([result.object_id for result in pages[-2]],
+                             [result.object_id for result in previous])
+
+    def test_estimate(self):
+        """Estimate test case
+
+        Tests that at most SEARCH_COUNT_LIMIT results are counted.
+        """
+        Course.objects.create(title='Matrices', category=Category.objects.first())
+        with self.settings(SEARCH_COUNT_LIMIT=1):
+            self.assertEqual((1, False), self.backend.search('matri').estimate())
+        with self.settings(SEARCH_COUNT_LIMIT=2):
+            self.assertEqual((2, True), self.backend.search('matri').estimate())
+
+    def test_rebuild(self):
+        """Rebuild test case
+
+        Tests that the command rebuildindex restores missing and removes stale documents.
+        """
+        SearchDocument.objects.all().delete()
+        SearchDocument.objects.create(kind=Documents.TOPIC, object_id=999, title='Stale')
+        call_command('rebuildindex', '--batch-size', '1', stdout=StringIO())
+        self.assertEqual([(Documents.CONTENT, self.content.pk)], self.ids('eigenvalues'))
+        self.assertEqual([], self.ids('stale'))
+
+    def test_database_backend(self):
+        """Database backend test case
+
+        Tests that the database backend finds the same documents.
+        """
+        self.backend = DatabaseBackend()
+        self.assertEqual([(Documents.CONTENT, self.content.pk)], self.ids('eigenvalues matrices'))
+        self.assertEqual([], self.ids('eigenvalues determinants'))
@@ -0,0 +1,190 @@
+"""Purpose of this file
+
+This file contains the test cases for /search/extraction.py.
+"""
+
+from io import BytesIO
+from unittest import mock
+
+from test import utils
+from test.test_cases import MediaTestCase
+
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from django.urls import reverse
+
+import content.models as model
+
+from base.models import Course, CourseStructureEntry, Job
+
+from frontend.views.search import SearchView
+
+from search.backends import FTS5Backend
+from search.documents import Documents
+from search.extraction import PDFTextExtractor
+from search.models import ExtractedPDF, ExtractionJob, SearchDocument
+
+
+class PDFTextExtractorTestCase(MediaTestCase):
+    """PDF text extractor test case
+
+    Defines the test cases for the extraction of the text of PDF contents. The output of
+    pdftotext is simulated.
+    """
+
+    def setUp(self):
+        """Setup
+
+        Sets up a PDF content in the topic of the test database.
+        """
+        super().setUp()
+        self.content = utils.create_content(model.PDFContent.TYPE)
+        self.pdf = model.PDFContent(content=self.content)
+        self.pdf.pdf.save('test.pdf', ContentFile(b'%PDF-1.4 first'))
+
+    @staticmethod
+    def popen(output, exit_code=0):
+        """Popen
+
+        Returns a patch of the process of pdftotext with the given output.
+
+        :param output: The output of pdftotext
+        :type output: bytes
+        :param exit_code: The exit code of pdftotext
+        :type exit_code: int
+
+        :return: the patch
+        :rtype: mock._patch
+        """
+        patch = mock.patch('search.extraction.Popen')
+        popen = patch.start()
+        process = popen.return_value.__enter__.return_value
+        process.stdout = BytesIO(output)
+        process.wait.return_value = exit_code
+        process.poll.return_value = exit_code
+        return patch
+
+    def run_job(self):
+        """Run job
+
+        Runs the pending extraction job of the content.
+
+        :return: the executed job
+        :rtype: ExtractionJob
+        """
+        job = ExtractionJob.objects.get(content=self.content, status=Job.PENDING)
+        job.execute()
+        return job
+
+    def pages(self):
+        """Pages
+
+        Returns the page numbers and texts of the indexed pages of the content.
+
+        :return: the pages
+        :rtype: list[tuple[int, str]]
+        """
+        return list(SearchDocument.objects.filter(kind=Documents.PAGE, object_id=self.content.pk)
+                    .order_by('page').values_list('page', 'body'))
+
+    def test_job_queued_once(self):
+        """Queue test case
+
+        Tests that saving the PDF queues one extraction until it is processed.
+        """
+        self.pdf.save()
+        self.assertEqual(1, ExtractionJob.objects.filter(content=self.content,
+                                                          status=Job.PENDING).count())
+
+    def test_extract(self):
+        """Extract test case
+
+        Tests that the pages are indexed and can be found with their page number.
+        """
+        patch = self.popen(b'Introduction\n\f\fEigenvalues of matrices\n\f')
+        try:
+            job = self.run_job()
+        finally:
+            patch.stop()
+        self.assertEqual(Job.DONE, job.status)
+        self.assertEqual([(1, 'Introduction\n'), (3, 'Eigenvalues of matrices\n')],
+                         self.pages())
+        self.assertEqual(3, ExtractedPDF.objects.get(content=self.content).page_count)
+
+        results = FTS5Backend().search('eigenvalues', [Documents.PAGE])[:10]
+        self.assertEqual([(self.content.pk, 3)],
+                         [(result.object_id, result.page) for result in results])
+        course = Course.objects.first()
+        CourseStructureEntry.objects.create(course=course, position=1,
+                                            topic=self.content.topic)
+        SearchView.link(results)
+        self.assertEqual(reverse('frontend:content',
+                                 args=(course.pk, self.content.topic_id, self.content.pk))
+                         + '?page=3', results[0].url)
+
+    def test_unchanged_file(self):
+        """Unchanged file test case
+
+        Tests that a PDF is only extracted again if its hash changed.
+        """
+        patch = self.popen(b'First\f')
+        try:
+            PDFTextExtractor.extract(self.content.pk)
+            self.assertIsNone(PDFTextExtractor.extract(self.content.pk))
+        finally:
+            patch.stop()
+        self.assertEqual([(1, 'First')], self.pages())
+
+        self.pdf.pdf.save('test.pdf', ContentFile(b'%PDF-1.4 second'))
+        patch = self.popen(b'Second\f')
+        try:
+            self.assertEqual(1, PDFTextExtractor.extract(self.content.pk))
+        finally:
+            patch.stop()
+        self.assertEqual([(1, 'Second')], self.pages())
+
+    @override_settings(SEARCH_PDF_PAGE_LENGTH=5)
+    def test_streaming(self):
+        """Streaming test case
+
+        Tests that the output is read in chunks which may split characters and that the
+        pages are truncated.
+        """
+        patch = self.popen('Äquivalenz\fÜber'.encode())
+        try:
+            with mock.patch.object(PDFTextExtractor, 'chunk_size', 3):
+                self.assertEqual(['Äquiv', 'Über'],
+                                 list(PDFTextExtractor.pages(self.pdf.pdf.path)))
+        finally:
+            patch.stop()
+
+    def test_failure(self):
+        """Failure test case
+
+        Tests that a failing pdftotext fails the job and keeps the PDF unextracted.
+        """
+        patch = self.popen(b'', exit_code=1)
+        try:
+            job = self.run_job()
+        finally:
+            patch.stop()
+        self.assertEqual(Job.FAILED, job.status)
+        self.assertFalse(ExtractedPDF.objects.filter(content=self.content).exists())
+
+    def test_delete(self):
+        """Delete test case
+
+        Tests that the pages are removed with their content and renamed with its topic.
+        """
+        patch = self.popen(b'First\f')
+        try:
+            PDFTextExtractor.extract(self.content.pk)
+        finally:
+            patch.stop()
+        topic = self.content.topic
+        topic.title = 'Renamed'
+        topic.save()
+        self.assertEqual('Renamed', SearchDocument.objects.get(kind=Documents.PAGE).title)
+
+        self.content.delete()
+        self.assertEqual([], self.pages())
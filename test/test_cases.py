@@ -8,13 +8,14 @@ from test import utils
 import reversion
 from reversion import set_comment
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.contrib.auth.models import User  # pylint: disable=imported-auth-user
 
 from base.models import Category, Course, Topic, CourseStructureEntry
 
 
-@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=utils.MEDIA_ROOT, EXPORT_CACHE_DIR=utils.EXPORT_CACHE_DIR)
 class MediaTestCase(TestCase):
     """Media test case
 
@@ -24,8 +25,9 @@ class MediaTestCase(TestCase):
     def setUp(self):
         """Setup
 
-        Sets up the test database.
+        Sets up the test database and clears the cached fragments of the previous test.
         """
+        cache.clear()
         utils.setup_database()
         self.client.force_login(User.objects.first())
 
@@ -36,6 +38,7 @@ class MediaTestCase(TestCase):
         Deletes the generated files after running the tests.
         """
         shutil.rmtree(utils.MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(utils.EXPORT_CACHE_DIR, ignore_errors=True)
         super().tearDownClass()
 
     def assert_contains_html(self, response, *args):
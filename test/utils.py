@@ -23,6 +23,9 @@ from frontend.views.validator import Validator
 # Temporary media directory
 MEDIA_ROOT = tempfile.mkdtemp()
 
+# Temporary export cache directory
+EXPORT_CACHE_DIR = tempfile.mkdtemp()
+
 
 def generate_image_file(image_file_number):
     """ Generate image file